@@ -38,6 +38,7 @@ from waffle.models import Flag, Sample, Switch
 import amo
 import mkt
 from amo.urlresolvers import get_url_prefix, Prefixer, reverse, set_url_prefix
+from lib.es import connections
 from lib.es.management.commands import reindex_mkt
 from lib.post_request_task import task as post_request_task
 from mkt.access.acl import check_ownership
@@ -47,8 +48,8 @@ from mkt.constants.applications import DEVICE_TYPES
 from mkt.files.helpers import copyfileobj
 from mkt.files.models import File, Platform
 from mkt.prices.models import AddonPremium, Price, PriceCurrency
-from mkt.search.indexers import BaseIndexer
 from mkt.site.fixtures import fixture
+from mkt.translations.cache import translation_cache
 from mkt.translations.models import Translation
 from mkt.users.models import UserProfile
 from mkt.versions.models import Version
@@ -237,7 +238,7 @@ def stop_es_mock():
         patch.stop()
 
     # Reset cached Elasticsearch objects.
-    BaseIndexer._es = {}
+    connections.reset()
 
 
 def mock_es(f):
@@ -318,6 +319,8 @@ class TestCase(MockEsMixin, RedisTest, MockBrowserIdMixin,
     def _pre_setup(self):
         super(TestCase, self)._pre_setup()
         self.mock_browser_id()
+        # The translation ids are reused from one test to the next.
+        translation_cache.clear()
 
     @contextmanager
     def activate(self, locale=None, app=None):
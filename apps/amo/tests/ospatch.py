@@ -112,7 +112,6 @@ class _Patch(object):
                 # These need to operate on local files.
                 or 'amo/utils.py:rm_local_tmp_dir' in file_fn
                 or 'amo/utils.py:rm_local_tmp_file' in file_fn
-                or 'files/utils.py:extract_xpi' in file_fn
                 or 'payments/models.py:generate_private_key' in file_fn
                 # Ignore some test code.
                 or 'tests/test_views_edit.py:setup_image_status' in file_fn
@@ -2,9 +2,11 @@ import json
 import os
 import shutil
 import tempfile
+import time
 from base64 import b64decode
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 
 import commonware.log
@@ -14,11 +16,15 @@ from django_statsd.clients import statsd
 from signing_clients.apps import JarExtractor
 
 import amo
+from lib.post_request_task.task import task as post_request_task
 from mkt.versions.models import Version
 
 
 log = commonware.log.getLogger('z.crypto')
 
+# How long to wait between checks while another process signs a version.
+LOCK_POLL_INTERVAL = 0.5
+
 
 class SigningError(Exception):
     pass
@@ -153,6 +159,39 @@ def sign(version_id, reviewer=False, resign=False, **kw):
         log.info('[Webapp:%s] Already signed app exists.' % app.id)
         return path
 
+    # Only one process signs a version at once, the others wait for it to
+    # finish and use the file it signed. If the lock can't be had within
+    # SIGNED_APPS_LOCK_TIMEOUT, because the holder died or the cache is
+    # down, sign without it.
+    lock = sign_lock_key(version_id, reviewer)
+    timeout = settings.SIGNED_APPS_LOCK_TIMEOUT
+    locked = cache.add(lock, 1, timeout)
+    waited = 0
+    while not locked and waited < timeout:
+        statsd.incr('services.sign.app.wait')
+        time.sleep(LOCK_POLL_INTERVAL)
+        waited += LOCK_POLL_INTERVAL
+        if storage.exists(path) and not resign:
+            log.info('[Webapp:%s] App was signed while waiting.' % app.id)
+            return path
+        locked = cache.add(lock, 1, timeout)
+
+    if not locked:
+        log.warning('[Webapp:%s] Gave up waiting for the signing lock.' %
+                    app.id)
+        statsd.incr('services.sign.app.lock_timeout')
+    try:
+        if storage.exists(path) and not resign:
+            log.info('[Webapp:%s] App was signed while waiting.' % app.id)
+            return path
+        _sign(version_id, app, file_obj, path, reviewer)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return path
+
+
+def _sign(version_id, app, file_obj, path, reviewer):
     ids = json.dumps({
         'id': app.guid,
         'version': version_id
@@ -166,4 +205,23 @@ def sign(version_id, reviewer=False, resign=False, **kw):
                 storage.delete(path)
             raise
     log.info('[Webapp:%s] Signing complete.' % app.id)
-    return path
+
+
+def sign_lock_key(version_id, reviewer=False):
+    return 'crypto:sign:%s:%s' % (version_id,
+                                  'reviewer' if reviewer else 'public')
+
+
+@post_request_task(merge_arg=0)
+def presign(version_ids, **kw):
+    """
+    Signs the public versions ahead of time, so that downloads don't have to
+    wait for the signing server. A version that fails is signed on download
+    instead.
+    """
+    for version_id in version_ids:
+        try:
+            sign(version_id)
+        except Exception:
+            log.error('Presigning version %s failed' % version_id,
+                      exc_info=True)
@@ -1,4 +1,7 @@
 import json
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 from django_statsd.clients import statsd
@@ -6,15 +9,107 @@ from django_statsd.clients import statsd
 import commonware.log
 import jwt
 import requests
+import requests.adapters
 
 
 log = commonware.log.getLogger('z.crypto')
 
 
+# The signing server errors that are worth retrying.
+RETRY_STATUSES = (502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_pool = None
+
+
 class SigningError(Exception):
     pass
 
 
+def get_session():
+    """
+    Returns the requests session shared by the calls to the signing server,
+    which keeps up to SIGNING_SERVER_POOL_SIZE connections to it open.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.SIGNING_SERVER_POOL_SIZE,
+                    pool_block=True)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_pool():
+    """
+    Returns the thread pool shared by the batches of receipts sent to the
+    signing server, one thread for each of its pooled connections.
+    """
+    global _pool
+    if _pool is None:
+        with _session_lock:
+            if _pool is None:
+                _pool = ThreadPool(settings.SIGNING_SERVER_POOL_SIZE)
+    return _pool
+
+
+def post(destination, data, metric):
+    """
+    Posts to the signing server. Connection errors and 50x errors from a
+    proxy are retried SIGNING_SERVER_RETRIES times, waiting a little longer
+    each time.
+    """
+    headers = {'Content-Type': 'application/json'}
+    timeout = settings.SIGNING_SERVER_TIMEOUT
+    retries = settings.SIGNING_SERVER_RETRIES
+
+    for attempt in range(retries + 1):
+        if attempt:
+            statsd.incr('%s.retry' % metric)
+            time.sleep(settings.SIGNING_SERVER_RETRY_BACKOFF *
+                       2 ** (attempt - 1))
+        try:
+            with statsd.timer(metric):
+                req = get_session().post(destination, data=data,
+                                         headers=headers, timeout=timeout)
+        except requests.Timeout:
+            statsd.incr('%s.timeout' % metric)
+            log.error('Posting to receipt signing timed out')
+            raise SigningError('Posting to receipt signing timed out')
+        except requests.ConnectionError:
+            if attempt < retries:
+                log.warning('Connecting to receipt signing failed, retrying')
+                continue
+            statsd.incr('%s.error' % metric)
+            log.error('Posting to receipt signing failed', exc_info=True)
+            raise SigningError('Posting to receipt signing failed')
+        except requests.RequestException:
+            # Will occur when some other error occurs.
+            statsd.incr('%s.error' % metric)
+            log.error('Posting to receipt signing failed', exc_info=True)
+            raise SigningError('Posting to receipt signing failed')
+
+        if req.status_code in RETRY_STATUSES and attempt < retries:
+            log.warning('Posting to signing failed: %s, retrying'
+                        % req.status_code)
+            continue
+        break
+
+    if req.status_code != 200:
+        statsd.incr('%s.error' % metric)
+        log.error('Posting to signing failed: %s' % req.status_code)
+        raise SigningError('Posting to signing failed: %s'
+                           % req.status_code)
+    return req
+
+
 def sign(receipt):
     """
     Send the receipt to the signing service.
@@ -26,35 +121,27 @@ def sign(receipt):
         return ValueError('Invalid config. SIGNING_SERVER empty.')
 
     destination = settings.SIGNING_SERVER + '/1.0/sign'
-    timeout = settings.SIGNING_SERVER_TIMEOUT
 
     receipt_json = json.dumps(receipt)
     log.info('Calling service: %s' % destination)
     log.info('Receipt contents: %s' % receipt_json)
-    headers = {'Content-Type': 'application/json'}
     data = receipt if isinstance(receipt, basestring) else receipt_json
 
-    try:
-        with statsd.timer('services.sign.receipt'):
-            req = requests.post(destination, data=data, headers=headers,
-                                timeout=timeout)
-    except requests.Timeout:
-        statsd.incr('services.sign.receipt.timeout')
-        log.error('Posting to receipt signing timed out')
-        raise SigningError('Posting to receipt signing timed out')
-    except requests.RequestException:
-        # Will occur when some other error occurs.
-        statsd.incr('services.sign.receipt.error')
-        log.error('Posting to receipt signing failed', exc_info=True)
-        raise SigningError('Posting to receipt signing failed')
+    req = post(destination, data, 'services.sign.receipt')
+    return json.loads(req.content)['receipt']
 
-    if req.status_code != 200:
-        statsd.incr('services.sign.receipt.error')
-        log.error('Posting to signing failed: %s' % req.status_code)
-        raise SigningError('Posting to signing failed: %s'
-                           % req.status_code)
 
-    return json.loads(req.content)['receipt']
+def sign_many(receipts):
+    """
+    Send a list of receipts to the signing service. The signing service
+    signs one receipt per request, so they are sent at the same time over the
+    pooled connections. Returns the signed receipts in the same order.
+    """
+    if not receipts:
+        return []
+
+    with statsd.timer('services.sign.receipt.batch'):
+        return get_pool().map(sign, receipts)
 
 
 def decode(receipt):
@@ -9,12 +9,13 @@ from django.core.files.storage import default_storage as storage
 
 import jwt
 import mock
-from nose.tools import eq_, raises
-from requests import Timeout
+from nose.tools import eq_, ok_, raises
+from requests import ConnectionError, Timeout
 
 import amo.tests
 from lib.crypto import packaged
-from lib.crypto.receipt import crack, sign, SigningError
+from lib.crypto.receipt import (crack, get_pool, sign, sign_many,
+                                SigningError)
 from mkt.site.fixtures import fixture
 from mkt.versions.models import Version
 from mkt.webapps.models import Webapp
@@ -38,7 +39,8 @@ def mock_sign(version_id, reviewer=False):
     return path
 
 
-@mock.patch('lib.crypto.receipt.requests.post')
+@mock.patch('lib.crypto.receipt.requests.Session.post')
+@mock.patch('lib.crypto.receipt.time.sleep', lambda s: None)
 @mock.patch.object(settings, 'SIGNING_SERVER', 'http://localhost')
 class TestReceipt(amo.tests.TestCase):
 
@@ -75,6 +77,52 @@ class TestReceipt(amo.tests.TestCase):
         req.return_value = self.get_response(206)
         sign('x')
 
+    def test_retry_unavailable(self, req):
+        req.side_effect = [self.get_response(503), self.get_response(200)]
+        sign('x')
+        eq_(req.call_count, 2)
+
+    @raises(SigningError)
+    def test_retry_unavailable_gives_up(self, req):
+        req.return_value = self.get_response(503)
+        try:
+            sign('x')
+        finally:
+            eq_(req.call_count, settings.SIGNING_SERVER_RETRIES + 1)
+
+    def test_retry_connection_error(self, req):
+        req.side_effect = [ConnectionError, self.get_response(200)]
+        sign('x')
+        eq_(req.call_count, 2)
+
+    @raises(SigningError)
+    def test_no_retry_timeout(self, req):
+        req.side_effect = Timeout
+        try:
+            sign('x')
+        finally:
+            eq_(req.call_count, 1)
+
+    def test_sign_many(self, req):
+        def post(url, data, **kw):
+            return mock.Mock(status_code=200,
+                             content=json.dumps({'receipt': data + '!'}))
+        req.side_effect = post
+        eq_(sign_many(['a', 'b', 'c']), ['a!', 'b!', 'c!'])
+        eq_(req.call_count, 3)
+
+    def test_sign_many_pool(self, req):
+        eq_(get_pool(), get_pool())
+
+    def test_sign_many_empty(self, req):
+        eq_(sign_many([]), [])
+        assert not req.called
+
+    @raises(SigningError)
+    def test_sign_many_error(self, req):
+        req.return_value = self.get_response(403)
+        sign_many(['a', 'b'])
+
 
 class TestCrack(amo.tests.TestCase):
 
@@ -140,6 +188,61 @@ class TestPackaged(PackagedApp, amo.tests.TestCase):
         assert packaged.sign(self.version.pk)
         assert not sign_app.called
 
+    @mock.patch('lib.crypto.packaged.sign_app')
+    def test_lock_released(self, sign_app):
+        packaged.sign(self.version.pk)
+        assert sign_app.called
+        ok_(packaged.cache.add(packaged.sign_lock_key(self.version.pk), 1))
+
+    @mock.patch('lib.crypto.packaged.sign_app')
+    def test_lock_released_on_error(self, sign_app):
+        sign_app.side_effect = packaged.SigningError
+        with self.assertRaises(packaged.SigningError):
+            packaged.sign(self.version.pk)
+        ok_(packaged.cache.add(packaged.sign_lock_key(self.version.pk), 1))
+
+    @mock.patch('lib.crypto.packaged.time.sleep')
+    @mock.patch('lib.crypto.packaged.sign_app')
+    def test_waits_for_other_signer(self, sign_app, sleep):
+        lock = packaged.sign_lock_key(self.version.pk)
+        packaged.cache.add(lock, 1)
+
+        def other_signer_done(seconds):
+            storage.open(self.file.signed_file_path, 'w').close()
+            packaged.cache.delete(lock)
+        sleep.side_effect = other_signer_done
+
+        eq_(packaged.sign(self.version.pk), self.file.signed_file_path)
+        eq_(sleep.call_count, 1)
+        assert not sign_app.called
+
+    @mock.patch('lib.crypto.packaged.time.sleep')
+    @mock.patch('lib.crypto.packaged.cache.add')
+    @mock.patch('lib.crypto.packaged.sign_app')
+    def test_lock_unavailable(self, sign_app, add, sleep):
+        add.return_value = False
+        with self.settings(SIGNED_APPS_LOCK_TIMEOUT=2):
+            eq_(packaged.sign(self.version.pk), self.file.signed_file_path)
+        eq_(sleep.call_count, 2 / packaged.LOCK_POLL_INTERVAL)
+        assert sign_app.called
+
+    @mock.patch('lib.crypto.packaged.time.sleep')
+    @mock.patch('lib.crypto.packaged.cache.add')
+    @mock.patch('lib.crypto.packaged.sign_app')
+    def test_lock_unavailable_signed_meanwhile(self, sign_app, add, sleep):
+        add.return_value = False
+        sleep.side_effect = lambda seconds: storage.open(
+            self.file.signed_file_path, 'w').close()
+        eq_(packaged.sign(self.version.pk), self.file.signed_file_path)
+        eq_(sleep.call_count, 1)
+        assert not sign_app.called
+
+    @mock.patch('lib.crypto.packaged.sign')
+    def test_presign(self, sign):
+        sign.side_effect = [packaged.SigningError, None]
+        packaged.presign([1, 2])
+        eq_([c[0][0] for c in sign.call_args_list], [1, 2])
+
     @mock.patch('lib.crypto.packaged.sign_app')
     def test_resign_already_exists(self, sign_app):
         storage.open(self.file.signed_file_path, 'w')
@@ -0,0 +1,105 @@
+"""
+The Elasticsearch clients shared by the search, feed and indexing code.
+
+There is one client per use, such as `search` or `indexing`, so that each can
+have its own timeout. Each client keeps a pool of HTTP connections to every
+host in ES_HOSTS, stops using hosts that fail for a while and times its
+requests in statsd.
+"""
+import threading
+
+from django.conf import settings
+
+import elasticsearch
+from django_statsd.clients import statsd
+from elasticsearch.connection import Urllib3HttpConnection
+from elasticsearch.connection_pool import ConnectionPool
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+class InstrumentedConnection(Urllib3HttpConnection):
+    """A connection to one host that times every request."""
+
+    def __init__(self, use='default', **kwargs):
+        super(InstrumentedConnection, self).__init__(**kwargs)
+        self.use = use
+
+    def perform_request(self, *args, **kwargs):
+        with statsd.timer('z.es.request.%s' % self.use):
+            return super(InstrumentedConnection, self).perform_request(
+                *args, **kwargs)
+
+
+class InstrumentedConnectionPool(ConnectionPool):
+    """
+    Picks the connection for each request, skipping the hosts that have been
+    marked as dead until their timeout is up.
+    """
+
+    def __init__(self, connections, use='default', **kwargs):
+        super(InstrumentedConnectionPool, self).__init__(connections,
+                                                         **kwargs)
+        self.use = use
+
+    def get_connection(self):
+        with statsd.timer('z.es.pool.checkout.%s' % self.use):
+            return super(InstrumentedConnectionPool, self).get_connection()
+
+    def mark_dead(self, connection, *args, **kwargs):
+        statsd.incr('z.es.pool.dead.%s' % self.use)
+        return super(InstrumentedConnectionPool, self).mark_dead(
+            connection, *args, **kwargs)
+
+
+def get_config(use, **overrides):
+    """
+    Returns the arguments for the Elasticsearch client for this use. The
+    defaults come from the ES_* settings, then ES_CONNECTIONS[use] and then
+    `overrides`.
+    """
+    config = {
+        'hosts': settings.ES_HOSTS,
+        'timeout': settings.ES_TIMEOUT,
+        'maxsize': settings.ES_POOL_MAXSIZE,
+        'dead_timeout': settings.ES_DEAD_TIMEOUT,
+        'sniff_on_connection_fail': settings.ES_SNIFF,
+        'sniffer_timeout': settings.ES_SNIFF_INTERVAL if settings.ES_SNIFF
+                           else None,
+    }
+    config.update(settings.ES_CONNECTIONS.get(use, {}))
+    config.update(overrides)
+    config.update({
+        'use': use,
+        'connection_class': InstrumentedConnection,
+        'connection_pool_class': InstrumentedConnectionPool,
+    })
+    return config
+
+
+def get_es(use='default', **overrides):
+    """
+    Returns the shared Elasticsearch client for this use, creating it the
+    first time.
+
+    - use: what the client is for, such as `search` or `indexing`, see
+      ES_CONNECTIONS
+    - overrides: any other arguments for the client
+    """
+    key = (use, repr(sorted(overrides.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = elasticsearch.Elasticsearch(
+                    **get_config(use, **overrides))
+                _clients[key] = client
+    return client
+
+
+def reset():
+    """Drops all the clients, mostly for the tests."""
+    _clients.clear()
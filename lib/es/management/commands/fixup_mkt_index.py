@@ -18,7 +18,7 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         index = WebappIndexer.get_index()
         doctype = WebappIndexer.get_mapping_type_name()
-        es = WebappIndexer.get_es()
+        es = WebappIndexer.get_es('indexing')
 
         app_ids = Webapp.objects.values_list('id', flat=True)
 
@@ -10,13 +10,15 @@ import time
 from optparse import make_option
 
 import elasticsearch
-from celery import task
+from celery import chord, task
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
 
 import mkt.feed.indexers as f_indexers
 from amo.utils import chunked, timestamp_index
+from lib.es import connections
 from lib.es.models import Reindexing
 from mkt.webapps.indexers import WebappIndexer
 
@@ -52,12 +54,22 @@ INDEX_DICT = {
     'feeditems': [INDEXES[5]],
 }
 
-ES = elasticsearch.Elasticsearch(hosts=settings.ES_HOSTS)
+ES = connections.get_es('indexing')
 
 
 job = 'lib.es.management.commands.reindex_mkt.run_indexing'
 time_limits = settings.CELERY_TIME_LIMITS[job]
 
+# How many times a chunk is tried before giving up on the whole reindex.
+CHUNK_ATTEMPTS = 3
+
+# How many indexing tasks are run in parallel for each index by default.
+DEFAULT_CONCURRENCY = 4
+
+
+def progress_key(index):
+    return 'reindex_mkt:progress:%s' % index
+
 
 @task
 def delete_index(old_index):
@@ -96,24 +108,86 @@ def create_index(new_index, alias, indexer, settings):
                       wait_for_relocating_shards=0)
 
 
-@task(time_limit=time_limits['hard'], soft_time_limit=time_limits['soft'])
-def run_indexing(index, indexer, chunk_size):
-    """Index the objects.
+@task(time_limit=time_limits['hard'], soft_time_limit=time_limits['soft'],
+      ignore_result=False)
+def run_indexing(index, indexer, chunks, total):
+    """Index a share of the objects.
 
     - index: name of the index
+    - chunks: a list of lists of ids, each list is sent to ES in one go
+    - total: how many objects are being indexed into the index in all
+
+    These tasks are run in parallel in the header of a chord, so the alias is
+    only updated once every one of them has succeeded. A failing chunk is
+    retried CHUNK_ATTEMPTS times before the task fails.
 
     Note: Our ES doc sizes are about 5k in size. Chunking by 100 sends ~500kb
     of data to ES at a time.
 
-    TODO: Use celery chords here to parallelize these indexing chunks. This
-          requires celery 3 (bug 825938).
+    """
+    for ids in chunks:
+        for attempt in range(1, CHUNK_ATTEMPTS + 1):
+            try:
+                indexer.run_indexing(ids, ES, index=index)
+                break
+            except Exception as e:
+                if attempt == CHUNK_ATTEMPTS:
+                    raise
+                logger.warning('Failed to index chunk into %s, attempt %s: '
+                               '%s' % (index, attempt, e))
+                time.sleep(attempt)
+
+        try:
+            done = cache.incr(progress_key(index), len(ids))
+        except ValueError:
+            # The progress counter has gone, which doesn't matter much.
+            continue
+        sys.stdout.write('Indexed %s/%s into index: %s\n'
+                         % (done, total, index))
+
+
+@task
+def index_chunks(index, indexer, chunk_size, concurrency, callback):
+    """Read the ids to index and share them out between indexing tasks.
+
+    - index: name of the index
+    - chunk_size: how many objects are sent to ES in one go
+    - concurrency: how many run_indexing tasks to run in parallel
+    - callback: what to run once all of them have succeeded
+
+    This runs after the database has been flagged, so every object changed
+    from then on is also indexed into the new index by the usual tasks, and
+    none is missing once the alias is updated.
 
     """
-    sys.stdout.write('Indexing apps into index: %s\n' % index)
+    ids = list(indexer.get_indexable().values_list('id', flat=True))
+    chunks = list(chunked(ids, chunk_size))
+    cache.set(progress_key(index), 0, 60 * 60 * 24)
+    shares = filter(None, [chunks[i::concurrency]
+                           for i in range(concurrency)])
+    sys.stdout.write('Indexing %s objects into index: %s\n'
+                     % (len(ids), index))
+    if shares:
+        chord([run_indexing.si(index, indexer, share, len(ids))
+               for share in shares])(shares_done.s(index, callback))
+    else:
+        callback.apply_async()
+
+
+@task
+def shares_done(results, index, callback):
+    """Run the callback only if every share has been indexed.
 
-    qs = indexer.get_indexable().values_list('id', flat=True)
-    for ids in chunked(list(qs), chunk_size):
-        indexer.run_indexing(ids, ES, index=index)
+    Chords don't propagate errors from their header, so the results of the
+    run_indexing tasks are passed here and a failed one is an exception.
+
+    """
+    failed = [result for result in results if isinstance(result, Exception)]
+    if failed:
+        logger.error('Failed to index %s shares into %s, not updating the '
+                     'alias: %s' % (len(failed), index, failed[0]))
+        return
+    callback.apply_async()
 
 
 @task
@@ -186,6 +260,9 @@ class Command(BaseCommand):
                     help=('Bypass the database flag that says '
                           'another indexation is ongoing'),
                     default=False),
+        make_option('--concurrency', action='store', type='int',
+                    help='How many indexing tasks to run at once per index',
+                    default=DEFAULT_CONCURRENCY),
     )
 
     def handle(self, *args, **kwargs):
@@ -199,6 +276,7 @@ class Command(BaseCommand):
         index_choice = kwargs.get('index', None)
         prefix = kwargs.get('prefix', '')
         force = kwargs.get('force', False)
+        concurrency = max(kwargs.get('concurrency') or DEFAULT_CONCURRENCY, 1)
 
         if index_choice:
             # If we only want to reindex a subset of indexes.
@@ -210,7 +288,7 @@ class Command(BaseCommand):
         elif force:
             unflag_database()
 
-        chain = None
+        steps = []
         old_indexes = []
         for ALIAS, INDEXER, CHUNK_SIZE in INDEXES:
             # Get the old index if it exists.
@@ -239,10 +317,7 @@ class Command(BaseCommand):
                                settings.ES_DEFAULT_NUM_SHARDS)
 
             # Flag the database to mark as currently indexing.
-            if not chain:
-                chain = flag_database.si(new_index, old_index, ALIAS)
-            else:
-                chain |= flag_database.si(new_index, old_index, ALIAS)
+            chain = flag_database.si(new_index, old_index, ALIAS)
 
             # Create the indexes and mappings.
             # Note: We set num_replicas=0 here to lower load while re-indexing.
@@ -254,16 +329,15 @@ class Command(BaseCommand):
                 'store.compress.tv': True, 'store.compress.stored': True,
                 'refresh_interval': '-1'})
 
-            # Index all the things!
-            chain |= run_indexing.si(new_index, INDEXER, CHUNK_SIZE)
-
             # After indexing we optimize the index, adjust settings, and point
             # alias to the new index.
-            chain |= update_alias.si(new_index, old_index, ALIAS, {
+            alias_task = update_alias.si(new_index, old_index, ALIAS, {
                 'number_of_replicas': num_replicas, 'refresh_interval': '5s'})
 
+            steps.append((chain, new_index, INDEXER, CHUNK_SIZE, alias_task))
+
         # Unflag the database to mark as done indexing.
-        chain |= unflag_database.si()
+        chain = unflag_database.si()
 
         # Delete the old index, if any.
         for old_index in old_indexes:
@@ -273,6 +347,16 @@ class Command(BaseCommand):
         # All done!
         chain |= output_summary.si()
 
+        # Index all the things! The ids are read once the database is
+        # flagged and shared out between `concurrency` tasks that run in
+        # parallel. Everything after that, starting with updating the alias,
+        # is run once they have all succeeded, so the chain is built from the
+        # last index back.
+        for start, new_index, INDEXER, CHUNK_SIZE, alias_task in (
+                reversed(steps)):
+            chain = start | index_chunks.si(new_index, INDEXER, CHUNK_SIZE,
+                                            concurrency, alias_task | chain)
+
         # Ship it.
         self.stdout.write('\nNew index and indexing tasks all queued up.\n')
         os.environ['FORCE_INDEXING'] = '1'
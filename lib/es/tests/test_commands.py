@@ -0,0 +1,69 @@
+import mock
+from nose.tools import eq_
+
+import amo.tests
+from lib.es.management.commands import reindex_mkt
+
+
+@mock.patch.object(reindex_mkt.time, 'sleep', lambda s: None)
+class TestRunIndexing(amo.tests.TestCase):
+
+    def setUp(self):
+        self.indexer = mock.Mock()
+        reindex_mkt.cache.set(reindex_mkt.progress_key('foo'), 0)
+
+    def test_chunks(self):
+        reindex_mkt.run_indexing('foo', self.indexer, [[1, 2], [3]], 3)
+        eq_([c[0][0] for c in self.indexer.run_indexing.call_args_list],
+            [[1, 2], [3]])
+        eq_(reindex_mkt.cache.get(reindex_mkt.progress_key('foo')), 3)
+
+    def test_retry_chunk(self):
+        self.indexer.run_indexing.side_effect = [Exception, None, None]
+        reindex_mkt.run_indexing('foo', self.indexer, [[1, 2], [3]], 3)
+        eq_([c[0][0] for c in self.indexer.run_indexing.call_args_list],
+            [[1, 2], [1, 2], [3]])
+
+    def test_give_up(self):
+        self.indexer.run_indexing.side_effect = Exception
+        with self.assertRaises(Exception):
+            reindex_mkt.run_indexing('foo', self.indexer, [[1, 2], [3]], 3)
+        eq_(self.indexer.run_indexing.call_count, reindex_mkt.CHUNK_ATTEMPTS)
+
+
+class TestIndexChunks(amo.tests.TestCase):
+
+    def setUp(self):
+        self.indexer = mock.Mock()
+        self.indexer.get_indexable.return_value.values_list.return_value = [
+            1, 2, 3]
+        self.callback = mock.Mock()
+
+    @mock.patch.object(reindex_mkt, 'chord')
+    def test_shares(self, chord):
+        reindex_mkt.index_chunks('foo', self.indexer, 1, 2, self.callback)
+        header = chord.call_args[0][0]
+        eq_([task.args[2] for task in header], [[[1], [3]], [[2]]])
+        body = chord.return_value.call_args[0][0]
+        eq_(body.task, reindex_mkt.shares_done.name)
+        eq_(body.args, ('foo', self.callback))
+        eq_(reindex_mkt.cache.get(reindex_mkt.progress_key('foo')), 0)
+
+    @mock.patch.object(reindex_mkt, 'chord')
+    def test_nothing_to_index(self, chord):
+        self.indexer.get_indexable.return_value.values_list.return_value = []
+        reindex_mkt.index_chunks('foo', self.indexer, 1, 2, self.callback)
+        assert not chord.called
+        assert self.callback.apply_async.called
+
+    def test_shares_done(self):
+        reindex_mkt.shares_done([None, None], 'foo', self.callback)
+        assert self.callback.apply_async.called
+
+    @mock.patch.object(reindex_mkt.update_alias, 'apply_async')
+    def test_share_failed(self, update_alias):
+        callback = reindex_mkt.update_alias.si('foo', None, 'alias', {})
+        reindex_mkt.shares_done([None, Exception('boom')], 'foo', callback)
+        assert not update_alias.called
+        reindex_mkt.shares_done([None, None], 'foo', callback)
+        assert update_alias.called
@@ -0,0 +1,37 @@
+import mock
+from nose.tools import eq_
+
+import amo.tests
+from lib.es import connections
+
+
+class TestConnections(amo.tests.TestCase):
+
+    def setUp(self):
+        connections.reset()
+
+    def tearDown(self):
+        connections.reset()
+
+    def test_shared(self):
+        eq_(id(connections.get_es('search')), id(connections.get_es('search')))
+
+    def test_per_use(self):
+        assert connections.get_es('search') is not connections.get_es(
+            'indexing')
+
+    def test_config(self):
+        with self.settings(ES_TIMEOUT=30,
+                           ES_CONNECTIONS={'indexing': {'timeout': 120}}):
+            eq_(connections.get_config('search')['timeout'], 30)
+            eq_(connections.get_config('indexing')['timeout'], 120)
+            eq_(connections.get_config('indexing', timeout=5)['timeout'], 5)
+
+    @mock.patch('lib.es.connections.statsd')
+    @mock.patch('elasticsearch.connection.Urllib3HttpConnection'
+                '.perform_request')
+    def test_request_timed(self, perform_request, statsd):
+        connection = connections.InstrumentedConnection(use='search')
+        connection.perform_request('GET', '/')
+        statsd.timer.assert_called_with('z.es.request.search')
+        assert perform_request.called
@@ -3,12 +3,18 @@ import threading
 from django.conf import settings
 
 import commonware.log
+import requests
+import requests.adapters
+from django_statsd.clients import statsd
 
 from mkt.monolith import record_stat
 
 
 log = commonware.log.getLogger('z.metrics')
 
+_monolith_clients = {}
+_monolith_lock = threading.Lock()
+
 
 def record_action(action, request, data=None):
     """Records the given action by sending it to the metrics servers.
@@ -30,18 +36,89 @@ def record_action(action, request, data=None):
     record_stat(action, request, **data)
 
 
-def get_monolith_client():
-    _locals = threading.local()
-    if not hasattr(_locals, 'monolith'):
-        server = getattr(settings, 'MONOLITH_SERVER', None)
-        index = getattr(settings, 'MONOLITH_INDEX', 'time_*')
-        if server is None:
-            raise ValueError('You need to configure MONOLITH_SERVER')
+class TimeoutHTTPAdapter(requests.adapters.HTTPAdapter):
+    """An HTTP adapter that gives up on requests after `timeout` seconds,
+    unless they set their own timeout."""
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super(TimeoutHTTPAdapter, self).__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super(TimeoutHTTPAdapter, self).send(request, timeout=timeout,
+                                                    **kwargs)
+
+
+class InstrumentedMonolithClient(object):
+    """Wraps a monolith client to time its queries.
+
+    Calling the client returns a generator that only queries as it is
+    consumed, so the results are read into a list while timing.
+
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def __call__(self, *args, **kwargs):
+        with statsd.timer('monolith.client.query'):
+            return list(self.client(*args, **kwargs))
+
+    def raw(self, *args, **kwargs):
+        with statsd.timer('monolith.client.raw'):
+            return self.client.raw(*args, **kwargs)
 
-        statsd = {'statsd.host': getattr(settings, 'STATSD_HOST', 'localhost'),
-                  'statsd.port': getattr(settings, 'STATSD_PORT', 8125)}
+    def __getattr__(self, name):
+        return getattr(self.client, name)
 
-        from monolith.client import Client as MonolithClient
-        _locals.monolith = MonolithClient(server, index, **statsd)
 
-    return _locals.monolith
+def get_monolith_client():
+    """Returns the monolith client shared by the whole process, creating it
+    the first time.
+
+    Creating the client asks the monolith server for its configuration, so if
+    that fails, requests.ConnectionError is raised and the next call tries
+    again.
+
+    """
+    server = getattr(settings, 'MONOLITH_SERVER', None)
+    index = getattr(settings, 'MONOLITH_INDEX', 'time_*')
+    key = (server, index)
+    client = _monolith_clients.get(key)
+    if client is not None:
+        return client
+
+    with _monolith_lock:
+        client = _monolith_clients.get(key)
+        if client is None:
+            client = _create_monolith_client(server, index)
+            _monolith_clients[key] = client
+    return client
+
+
+def _create_monolith_client(server, index):
+    if server is None:
+        raise ValueError('You need to configure MONOLITH_SERVER')
+
+    statsd_config = {
+        'statsd.host': getattr(settings, 'STATSD_HOST', 'localhost'),
+        'statsd.port': getattr(settings, 'STATSD_PORT', 8125)}
+
+    from monolith.client import Client as MonolithClient
+    with statsd.timer('monolith.client.create'):
+        client = MonolithClient(server, index, **statsd_config)
+
+    # Share a pool of connections to monolith and ElasticSearch between the
+    # queries, and don't let them hang.
+    adapter = TimeoutHTTPAdapter(timeout=settings.MONOLITH_TIMEOUT,
+                                 pool_maxsize=settings.MONOLITH_POOL_MAXSIZE)
+    client.session.mount('http://', adapter)
+    client.session.mount('https://', adapter)
+    return InstrumentedMonolithClient(client)
+
+
+def reset_monolith_clients():
+    """Drops the monolith clients, mostly for the tests."""
+    _monolith_clients.clear()
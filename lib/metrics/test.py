@@ -1,8 +1,11 @@
 # -*- coding: utf8 -*-
 import mock
+import requests
+from nose.tools import eq_
 
 import amo.tests
-from lib.metrics import record_action
+from lib import metrics
+from lib.metrics import get_monolith_client, record_action
 
 
 class TestMetrics(amo.tests.TestCase):
@@ -16,3 +19,61 @@ class TestMetrics(amo.tests.TestCase):
         record_action('install', request, {})
         record_stat.assert_called_with('install', request,
             **{'locale': 'en', 'src': 'foo', 'user-agent': 'py'})
+
+
+@mock.patch('lib.metrics._create_monolith_client')
+class TestMonolithClient(amo.tests.TestCase):
+
+    def setUp(self):
+        metrics.reset_monolith_clients()
+        self.addCleanup(metrics.reset_monolith_clients)
+
+    def test_reused(self, create):
+        with self.settings(MONOLITH_SERVER='http://monolith'):
+            eq_(get_monolith_client(), create.return_value)
+            eq_(get_monolith_client(), create.return_value)
+        eq_(create.call_count, 1)
+
+    def test_per_server(self, create):
+        with self.settings(MONOLITH_SERVER='http://monolith'):
+            get_monolith_client()
+        with self.settings(MONOLITH_SERVER='http://other'):
+            get_monolith_client()
+        eq_(create.call_count, 2)
+
+    def test_error_not_kept(self, create):
+        create.side_effect = [requests.ConnectionError, mock.Mock()]
+        with self.settings(MONOLITH_SERVER='http://monolith'):
+            with self.assertRaises(requests.ConnectionError):
+                get_monolith_client()
+            get_monolith_client()
+        eq_(create.call_count, 2)
+
+
+class TestInstrumentedMonolithClient(amo.tests.TestCase):
+
+    @mock.patch('lib.metrics.statsd')
+    def test_query(self, statsd):
+        timed = []
+
+        def results():
+            timed.append(statsd.timer.return_value.__exit__.called)
+            yield {'count': 1}
+
+        client = mock.Mock()
+        client.return_value = results()
+        wrapped = metrics.InstrumentedMonolithClient(client)
+        eq_(wrapped('install', 1, 2, interval='day'), [{'count': 1}])
+        client.assert_called_with('install', 1, 2, interval='day')
+        statsd.timer.assert_called_with('monolith.client.query')
+        # The query ran before the timer stopped.
+        eq_(timed, [False])
+        eq_(wrapped.fields, client.fields)
+
+    @mock.patch('lib.metrics.statsd')
+    def test_raw(self, statsd):
+        client = mock.Mock()
+        wrapped = metrics.InstrumentedMonolithClient(client)
+        eq_(wrapped.raw({'query': {}}), client.raw.return_value)
+        client.raw.assert_called_with({'query': {}})
+        statsd.timer.assert_called_with('monolith.client.raw')
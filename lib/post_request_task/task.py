@@ -4,9 +4,10 @@ from functools import partial
 from django.core.signals import got_request_exception, request_finished
 
 import commonware.log
-from celery import task as base_task
+from celery import current_app, task as base_task
 from celery import Task
 from celery.signals import task_postrun
+from django_statsd.clients import statsd
 
 
 log = commonware.log.getLogger('z.post_request_task')
@@ -20,32 +21,154 @@ def _get_task_queue():
     return _locals.__dict__.setdefault('task_queue', [])
 
 
+def _get_task_keys():
+    """Returns the position of each task in the queue, see `_task_key`."""
+    return _locals.__dict__.setdefault('task_keys', {})
+
+
+def _get_task_items():
+    """Returns the items of each merged task, by position in the queue."""
+    return _locals.__dict__.setdefault('task_items', {})
+
+
+def _get_task_stats():
+    """Returns how many task calls were deduped and merged."""
+    return _locals.__dict__.setdefault('task_stats',
+                                       {'deduped': 0, 'merged': 0})
+
+
+def _reset():
+    """Empties the queue and returns what was in it."""
+    queue, stats = _get_task_queue(), _get_task_stats()
+    _locals.task_queue = []
+    _locals.task_keys = {}
+    _locals.task_items = {}
+    _locals.task_stats = {'deduped': 0, 'merged': 0}
+    return queue, stats
+
+
 def _send_tasks(**kwargs):
-    """Sends all delayed Celery tasks."""
-    queue = _get_task_queue()
-    while queue:
-        cls, args, kwargs = queue.pop(0)
-        cls.original_apply_async(*args, **kwargs)
+    """Sends all delayed Celery tasks, over a single broker connection."""
+    # Tasks delayed while these are sent, by eager tasks for example, go in
+    # a new queue and are sent by their own `_send_tasks`.
+    queue, stats = _reset()
+    if not queue:
+        return
+
+    for stat, count in stats.items():
+        if count:
+            statsd.incr('post_request_task.%s' % stat, count)
+    statsd.incr('post_request_task.sent', len(queue))
+
+    if current_app.conf.CELERY_ALWAYS_EAGER:
+        for cls, (args, kwargs), options in queue:
+            cls.original_apply_async(args, kwargs, **options)
+        return
+
+    with current_app.producer_or_acquire() as producer:
+        for cls, (args, kwargs), options in queue:
+            cls.original_apply_async(args, kwargs, producer=producer,
+                                     **options)
 
 
 def _discard_tasks(**kwargs):
     """Discards all delayed Celery tasks."""
-    _get_task_queue()[:] = []
+    _reset()
+
+
+def _freeze(obj):
+    """Returns a hashable version of task arguments or options."""
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(item) for item in obj)
+    if isinstance(obj, set):
+        return frozenset(obj)
+    return obj
+
+
+def _task_key(t):
+    """Returns the key identifying a task call in the queue, and whether the
+    calls with that key are merged rather than deduped.
+
+    Tasks declared with `merge_arg=<position>` take a list as the positional
+    argument at that position, and the calls that only differ by that list
+    have the same key.
+
+    Raises TypeError if the arguments can't be hashed.
+
+    """
+    cls, (args, kwargs), options = t
+    position = getattr(cls, 'merge_arg', None)
+    if position is None or not args or len(args) <= position:
+        key = (cls.name, _freeze(args), _freeze(kwargs), _freeze(options))
+        hash(key)
+        return key, False
+
+    others = list(args[:position]) + list(args[position + 1:])
+    key = (cls.name, position, len(args), _freeze(others), _freeze(kwargs),
+           _freeze(options))
+    hash(key)
+    frozenset(args[position])
+    return key, True
+
+
+def _merge_task(i, t):
+    """Merge a task into the call of the same task at position `i` in the
+    queue, adding the items of its list that aren't there already.
+
+    """
+    cls, (args, kwargs), options = t
+    position = cls.merge_arg
+    queue, items = _get_task_queue(), _get_task_items()
+
+    qcls, (qargs, qkwargs), qoptions = queue[i]
+    if i not in items:
+        # Copy the list, the caller might still be using it.
+        qargs = list(qargs)
+        qargs[position] = list(qargs[position])
+        queue[i] = (qcls, (tuple(qargs), qkwargs), qoptions)
+        items[i] = set(qargs[position])
+
+    merged = qargs[position]
+    for item in args[position]:
+        if item not in items[i]:
+            items[i].add(item)
+            merged.append(item)
 
 
 def _append_task(t):
     """Append a task to the queue.
 
-    Expected argument is a tuple of the (task class, args, kwargs).
+    Expected argument is a tuple of the (task class, (args, kwargs), options)
+    as passed to `apply_async`.
 
-    This doesn't append to queue if the argument is already in the queue.
+    This doesn't append to queue if the argument is already in the queue, or
+    if it can be merged with a task in the queue, see `_task_key`.
 
     """
-    queue = _get_task_queue()
-    if t not in queue:
+    queue, keys, stats = _get_task_queue(), _get_task_keys(), _get_task_stats()
+    try:
+        key, merge = _task_key(t)
+    except TypeError:
+        # Unhashable arguments, fall back on comparing them with every task.
+        if t in queue:
+            stats['deduped'] += 1
+            log.debug('Removed duplicate task: %s' % (t,))
+        else:
+            queue.append(t)
+        return
+
+    if key not in keys:
+        keys[key] = len(queue)
         queue.append(t)
-    else:
+    elif not merge:
+        stats['deduped'] += 1
         log.debug('Removed duplicate task: %s' % (t,))
+    else:
+        stats['merged'] += 1
+        _merge_task(keys[key], t)
+        log.debug('Merged task: %s' % (t,))
 
 
 class PostRequestTask(Task):
@@ -54,14 +177,17 @@ class PostRequestTask(Task):
     This simply wraps celery's `@task` decorator and stores the task calls
     until after the request is finished, then fires them off.
 
+    Pass `merge_arg=<position>` to the decorator to merge the calls that
+    only differ by the list at that position, see `_task_key`.
+
     """
     abstract = True
 
     def original_apply_async(self, *args, **kwargs):
         return super(PostRequestTask, self).apply_async(*args, **kwargs)
 
-    def apply_async(self, *args, **kwargs):
-        _append_task((self, args, kwargs))
+    def apply_async(self, args=None, kwargs=None, **options):
+        _append_task((self, (args, kwargs), options))
 
 
 # Replacement `@task` decorator.
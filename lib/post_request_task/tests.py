@@ -2,10 +2,11 @@ from django.core.signals import request_finished
 from django.test import TestCase
 
 from celery.signals import task_postrun
-from mock import Mock, patch
+from mock import MagicMock, Mock, patch
 from nose.tools import eq_
 
-from lib.post_request_task.task import task, _get_task_queue, _discard_tasks
+from lib.post_request_task.task import (task, _get_task_queue,
+                                        _discard_tasks, _send_tasks)
 
 
 task_mock = Mock()
@@ -16,6 +17,11 @@ def test_task():
     task_mock()
 
 
+@task(merge_arg=0)
+def test_merge_task(ids, other):
+    task_mock(ids, other)
+
+
 class TestTask(TestCase):
 
     def tearDown(self):
@@ -87,3 +93,66 @@ class TestTask(TestCase):
             test_task.delay()
 
         self._verify_task_filled()
+
+    def test_merge(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_merge_task.delay([1, 2], 'a')
+            test_merge_task.delay([2, 3], 'a')
+            test_merge_task.delay([4], 'b')
+
+        queue = _get_task_queue()
+        eq_(len(queue), 2)
+        eq_(queue[0][1], (([1, 2, 3], 'a'), {}))
+        eq_(queue[1][1], (([4], 'b'), {}))
+
+    def test_merge_different_options(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_merge_task.apply_async(args=[[1], 'a'])
+            test_merge_task.apply_async(args=[[2], 'a'], countdown=5)
+
+        eq_(len(_get_task_queue()), 2)
+
+    def test_merge_many(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            for i in range(10):
+                test_merge_task.delay([i % 5], 'a')
+
+        queue = _get_task_queue()
+        eq_(len(queue), 1)
+        eq_(queue[0][1], (([0, 1, 2, 3, 4], 'a'), {}))
+
+    def test_merge_copies_list(self):
+        ids = [1]
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_merge_task.delay(ids, 'a')
+            test_merge_task.delay([2], 'a')
+        eq_(ids, [1])
+
+    def test_unhashable(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_merge_task.delay([{'id': 1}], 'a')
+            test_merge_task.delay([{'id': 1}], 'a')
+            test_merge_task.delay([{'id': 2}], 'a')
+        eq_(len(_get_task_queue()), 2)
+
+    @patch('lib.post_request_task.task.statsd')
+    @patch('lib.post_request_task.task.current_app')
+    @patch('lib.post_request_task.task.PostRequestTask.original_apply_async')
+    def test_send_one_connection(self, _mock, app, statsd):
+        app.conf.CELERY_ALWAYS_EAGER = False
+        producer = app.producer_or_acquire.return_value = MagicMock()
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_task.delay()
+            test_task.delay()
+            test_merge_task.delay([1], 'a')
+            test_merge_task.delay([2], 'a')
+
+        _send_tasks()
+        eq_(app.producer_or_acquire.call_count, 1)
+        eq_(_mock.call_count, 2)
+        for call in _mock.call_args_list:
+            eq_(call[1]['producer'], producer.__enter__.return_value)
+        statsd.incr.assert_any_call('post_request_task.deduped', 1)
+        statsd.incr.assert_any_call('post_request_task.merged', 1)
+        statsd.incr.assert_any_call('post_request_task.sent', 2)
+        self._verify_task_empty()
@@ -1,9 +1,10 @@
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
 
+import mock
 from nose.tools import eq_
 
-from lib.utils import static_url, validate_settings
+from lib.utils import LRUCache, static_url, validate_settings
 
 
 class TestValidate(TestCase):
@@ -46,3 +47,24 @@ class TestURL(TestCase):
         with self.settings(ADDON_ICON_URL='/v', DEBUG=True,
                            SERVE_TMP_PATH=True):
             eq_(static_url('ADDON_ICON_URL'), 'http://testserver/tmp/v')
+
+
+class TestLRUCache(TestCase):
+
+    def test_size(self):
+        lru = LRUCache(2, 60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        eq_(lru.get('a'), 1)
+        lru.set('c', 3)
+        eq_(lru.get('b'), None)
+        eq_(lru.get('a'), 1)
+        eq_(lru.get('c'), 3)
+
+    @mock.patch('lib.utils.time.time')
+    def test_timeout(self, time_):
+        lru = LRUCache(2, 60)
+        time_.return_value = 1000
+        lru.set('a', 1)
+        time_.return_value = 1061
+        eq_(lru.get('a'), None)
@@ -1,3 +1,6 @@
+import threading
+import time
+from collections import OrderedDict
 from urlparse import urljoin
 
 from django.conf import settings
@@ -47,3 +50,46 @@ def static_url(url):
         value = '/' + value if not value.startswith('/') else value
         return urljoin(prefix[url], '/tmp' + value)
     return urljoin(prefix[url], value)
+
+
+class LRUCache(object):
+    """
+    A small, thread safe, in process cache. It holds at most `size` items and
+    drops the least recently used one when it gets full. Items expire after
+    `timeout` seconds.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value, expires = self.data.pop(key)
+            except KeyError:
+                return None
+
+            if expires < time.time():
+                return None
+
+            # Put it back at the end, as the most recently used item.
+            self.data[key] = (value, expires)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = (value, time.time() + self.timeout)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
@@ -23,7 +23,8 @@ from multidb.middleware import PinningRouterMiddleware
 from oauthlib.common import Request
 from oauthlib.oauth1.rfc5849 import signature
 
-from mkt.api.models import Access, ACCESS_TOKEN, Token
+from mkt.access.models import Group
+from mkt.api.models import Access, ACCESS_TOKEN, principal_key, Token
 from mkt.api.oauth import server, validator
 from mkt.carriers import get_carrier
 from mkt.users.models import UserProfile
@@ -78,12 +79,12 @@ class RestOAuthMiddleware(object):
                 log.error(u'Cannot find APIAccess token with that key: %s'
                           % oauth_req.attempted_key)
                 return
-            uid = Token.objects.filter(
-                token_type=ACCESS_TOKEN,
-                key=oauth_req.resource_owner_key).values_list(
-                    'user_id', flat=True)[0]
-            request.user = UserProfile.objects.select_related(
-                'user').get(pk=uid)
+            uid, roles = self.get_principal(
+                Token, oauth_req.resource_owner_key,
+                lambda: Token.objects.filter(
+                    token_type=ACCESS_TOKEN,
+                    key=oauth_req.resource_owner_key).values_list(
+                        'user_id', flat=True)[0])
         else:
             # This is 2-legged OAuth.
             log.info('Trying 2 legged OAuth')
@@ -98,27 +99,50 @@ class RestOAuthMiddleware(object):
             except ValueError:
                 log.error('ValueError on verifying_request', exc_info=True)
                 return
-            uid = Access.objects.filter(
-                key=client_key).values_list(
-                    'user_id', flat=True)[0]
-            request.user = UserProfile.objects.select_related(
-                'user').get(pk=uid)
+            uid, roles = self.get_principal(
+                Access, client_key,
+                lambda: Access.objects.filter(
+                    key=client_key).values_list(
+                        'user_id', flat=True)[0])
 
         # But you cannot have one of these roles.
         denied_groups = set(['Admins'])
-        roles = set(request.user.groups.values_list('name', flat=True))
         if roles and roles.intersection(denied_groups):
-            log.info(u'Attempt to use API with denied role, user: %s'
-                     % request.user.pk)
+            log.info(u'Attempt to use API with denied role, user: %s' % uid)
             # Set request user back to Anonymous.
             request.user = AnonymousUser()
             return
 
+        request.user = UserProfile.objects.select_related('user').get(pk=uid)
+
         if request.user.is_authenticated():
             request.authed_from.append('RestOAuth')
 
         log.info('Successful OAuth with user: %s' % request.user)
 
+    def get_principal(self, model, key, get_uid):
+        """
+        Returns the user id and the names of the groups of the user for an
+        Access or Token key, cached for a little while since API clients
+        make lots of requests with the same key.
+
+        `get_uid` looks the user id up when it isn't cached.
+        """
+        cache_key = principal_key(model, key)
+        principal = cache.get(cache_key)
+        if principal is not None:
+            statsd.incr('api.oauth.principal.hit')
+            return principal
+
+        statsd.incr('api.oauth.principal.miss')
+        uid = get_uid()
+        roles = set(Group.objects.filter(users=uid)
+                                 .values_list('name', flat=True))
+        principal = (uid, roles)
+        cache.set(cache_key, principal,
+                  settings.API_OAUTH_PRINCIPAL_CACHE_TIMEOUT)
+        return principal
+
 
 class TwoLeggedOAuthError(Exception):
     pass
@@ -1,11 +1,15 @@
+import hashlib
 import os
 import time
 
+from django.core.cache import cache
 from django.db import models
+from django.dispatch import receiver
 
 from aesfield.field import AESField
 
 from amo.models import ModelBase
+from mkt.access.models import GroupUser
 from mkt.users.models import UserProfile
 
 
@@ -64,3 +68,41 @@ class Nonce(ModelBase):
 
 def generate():
     return os.urandom(64).encode('hex')
+
+
+def principal_key(model, key):
+    """
+    The cache key for the user id and groups resolved by RestOAuthMiddleware
+    for an Access or Token key.
+    """
+    key = hashlib.md5(unicode(key).encode('utf-8')).hexdigest()
+    return 'api:oauth:%s:%s' % (model._meta.model_name, key)
+
+
+@receiver(models.signals.post_save, sender=Access,
+          dispatch_uid='access.principal.invalidate')
+@receiver(models.signals.post_delete, sender=Access,
+          dispatch_uid='access.principal.invalidate_delete')
+@receiver(models.signals.post_save, sender=Token,
+          dispatch_uid='token.principal.invalidate')
+@receiver(models.signals.post_delete, sender=Token,
+          dispatch_uid='token.principal.invalidate_delete')
+def invalidate_principal(sender, instance, **kw):
+    cache.delete(principal_key(sender, instance.key))
+
+
+@receiver(models.signals.post_save, sender=GroupUser,
+          dispatch_uid='groupuser.principal.invalidate')
+@receiver(models.signals.post_delete, sender=GroupUser,
+          dispatch_uid='groupuser.principal.invalidate_delete')
+def invalidate_user_principals(sender, instance, **kw):
+    """The user's groups changed, forget them for each of its keys."""
+    keys = [principal_key(Access, key) for key in
+            Access.objects.filter(user=instance.user_id)
+                          .values_list('key', flat=True)]
+    keys += [principal_key(Token, key) for key in
+             Token.objects.filter(user=instance.user_id,
+                                  token_type=ACCESS_TOKEN)
+                          .values_list('key', flat=True)]
+    if keys:
+        cache.delete_many(keys)
@@ -73,6 +73,25 @@ class TestRestOAuthAuthentication(TestCase):
         self.add_group_user(self.profile, 'App Reviewers')
         ok_(self.auth.authenticate(Request(self.call())))
 
+    @patch('mkt.api.middleware.statsd')
+    def test_principal_cached(self, statsd):
+        self.call()
+        statsd.incr.assert_called_with('api.oauth.principal.miss')
+        req = self.call()
+        statsd.incr.assert_called_with('api.oauth.principal.hit')
+        eq_(req.user, self.profile)
+
+    def test_principal_cache_group_added(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        self.add_group_user(self.profile, 'Admins')
+        ok_(not self.auth.authenticate(Request(self.call())))
+
+    def test_principal_cache_access_deleted(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        client = OAuthClient(self.access)
+        self.access.delete()
+        ok_(not self.auth.authenticate(Request(self.call(client=client))))
+
 
 class TestRestAnonymousAuthentication(TestCase):
 
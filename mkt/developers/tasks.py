@@ -4,6 +4,7 @@ import hashlib
 import json
 import logging
 import os
+import pkg_resources
 import shutil
 import subprocess
 import sys
@@ -15,6 +16,7 @@ from datetime import date
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.utils.http import urlencode
 
@@ -63,7 +65,8 @@ def validator(upload_id, **kw):
         return
 
     try:
-        validation_result = run_validator(upload.path, url=kw.get('url'))
+        validation_result = run_validator(upload.path, url=kw.get('url'),
+                                          hash_=upload.hash)
         if upload.validation:
             # If there's any preliminary validation result, merge it with the
             # actual validation result.
@@ -108,13 +111,56 @@ def file_validator(file_id, **kw):
         return
     # Unlike upload validation, let the validator raise an exception if there
     # is one.
-    result = run_validator(file.file_path, url=file.version.addon.manifest_url)
+    result = run_validator(file.file_path, url=file.version.addon.manifest_url,
+                           hash_=file.hash)
     return FileValidation.from_json(file, result)
 
 
-def run_validator(file_path, url=None):
-    """A pre-configured wrapper around the app validator."""
+def _validator_version():
+    try:
+        return pkg_resources.get_distribution('app-validator').version
+    except pkg_resources.DistributionNotFound:
+        return ''
+
+
+VALIDATOR_VERSION = _validator_version()
+
+
+def validation_cache_key(hash_, url=None):
+    """
+    The cache key for the validation result of the content with this hash.
+    The result also depends on the validator, its settings and the manifest
+    URL for hosted apps.
+    """
+    key = hashlib.md5(repr((hash_, url, VALIDATOR_VERSION,
+                            settings.VALIDATOR_IAF_URLS))).hexdigest()
+    return '%s:validation:%s' % (settings.CACHE_PREFIX, key)
+
+
+def run_validator(file_path, url=None, hash_=None):
+    """
+    A pre-configured wrapper around the app validator.
+
+    If the `hash_` of the content is given, the result is cached and the
+    validator is skipped for content that has been validated already.
+    """
+    if not hash_:
+        return _run_validator(file_path, url=url)
+
+    key = validation_cache_key(hash_, url=url)
+    result = cache.get(key)
+    if result is not None:
+        log.info(u'Using the cached validation for path: %s' % file_path)
+        statsd.incr('mkt.developers.validator.cache.hit')
+        return result
+
+    statsd.incr('mkt.developers.validator.cache.miss')
+    result = _run_validator(file_path, url=url)
+    cache.set(key, result, settings.VALIDATOR_CACHE_TIMEOUT)
+    return result
+
 
+def _run_validator(file_path, url=None):
     with statsd.timer('mkt.developers.validator'):
         is_packaged = zipfile.is_zipfile(file_path)
         if is_packaged:
@@ -194,6 +194,31 @@ class TestValidator(amo.tests.TestCase):
         tasks.validator(self.upload.pk)
         assert _mock.called
 
+    @mock.patch('mkt.developers.tasks._run_validator')
+    def test_validation_cached(self, _mock):
+        _mock.return_value = '{"errors": 0}'
+        self.upload.update(hash='sha256:abc')
+        other = FileUpload.objects.create(hash='sha256:abc')
+        tasks.validator(self.upload.pk)
+        tasks.validator(other.pk)
+        eq_(_mock.call_count, 1)
+        assert FileUpload.objects.get(pk=other.pk).valid
+
+    @mock.patch('mkt.developers.tasks._run_validator')
+    def test_validation_cached_by_url(self, _mock):
+        _mock.return_value = '{"errors": 0}'
+        self.upload.update(hash='sha256:abc')
+        tasks.validator(self.upload.pk, url='http://foo.com/manifest.webapp')
+        tasks.validator(self.upload.pk, url='http://bar.com/manifest.webapp')
+        eq_(_mock.call_count, 2)
+
+    @mock.patch('mkt.developers.tasks._run_validator')
+    def test_validation_not_cached_without_hash(self, _mock):
+        _mock.return_value = '{"errors": 0}'
+        tasks.validator(self.upload.pk)
+        tasks.validator(self.upload.pk)
+        eq_(_mock.call_count, 2)
+
 
 storage_open = storage.open
 
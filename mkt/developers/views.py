@@ -58,6 +58,7 @@ from mkt.files.models import File, FileUpload
 from mkt.files.utils import parse_addon
 from mkt.purchase.models import Contribution
 from mkt.reviewers.models import QUEUE_TARAKO
+from mkt.reviewers.utils import invalidate_queue_counts
 from mkt.submit.forms import AppFeaturesForm, NewWebappVersionForm
 from mkt.users.models import UserProfile
 from mkt.users.views import _login
@@ -213,7 +214,8 @@ def status(request, addon_id, addon):
             # Update addon status now that the new version was saved.
             addon.update_status()
 
-            res = run_validator(ver.all_files[0].file_path)
+            file_ = ver.all_files[0]
+            res = run_validator(file_.file_path, hash_=file_.hash)
             validation_result = json.loads(res)
 
             # Escalate the version if it uses prerelease permissions.
@@ -494,6 +496,7 @@ def version_publicise(request, addon_id, addon):
 
     if version.all_files[0].status == amo.STATUS_APPROVED:
         File.objects.filter(version=version).update(status=amo.STATUS_PUBLIC)
+        invalidate_queue_counts('updates')
         amo.log(amo.LOG.CHANGE_VERSION_STATUS, unicode(version.status[0]),
                 version)
         # Call update_version, so various other bits of data update.
@@ -0,0 +1,80 @@
+"""
+Caches the serialized consumer feed.
+
+The feed only depends on the region, carrier, device and page asked for, and
+only changes when curators edit it, so whole responses are cached. Edits bump
+a generation number rather than deleting the responses: the responses from an
+older generation are stale, and keep being served to other requests while one
+request rebuilds them.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_statsd.clients import statsd
+
+
+GENERATION_KEY = 'feed:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the time so that the responses cached before the
+        # generation was evicted are stale.
+        generation = int(time.time())
+        cache.add(GENERATION_KEY, generation,
+                  settings.CACHE_FEED_STALE_TIMEOUT)
+    return generation
+
+
+def invalidate():
+    """Makes all the cached feed responses stale."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, int(time.time()),
+                  settings.CACHE_FEED_STALE_TIMEOUT)
+
+
+def make_key(*parts):
+    return 'feed:response:%s' % hashlib.md5(
+        u':'.join(map(unicode, parts)).encode('utf-8')).hexdigest()
+
+
+def get(key, build):
+    """
+    Returns the cached value for `key`, or calls `build` to make it and
+    caches that.
+
+    When the cached value is stale, the first request rebuilds it and the
+    others are given the stale value until it's done.
+    """
+    generation = get_generation()
+    entry = cache.get(key)
+    lock = '%s:lock' % key
+
+    if entry is not None:
+        if (entry['generation'] == generation and
+                entry['built'] + settings.CACHE_FEED_TIMEOUT > time.time()):
+            statsd.incr('mkt.feed.cache.hit')
+            return entry['value']
+
+        if not cache.add(lock, 1, settings.CACHE_FEED_REBUILD_TIMEOUT):
+            # Another request is rebuilding it.
+            statsd.incr('mkt.feed.cache.stale')
+            return entry['value']
+        statsd.incr('mkt.feed.cache.rebuild')
+    else:
+        statsd.incr('mkt.feed.cache.miss')
+
+    try:
+        value = build()
+        cache.set(key, {'generation': generation, 'built': time.time(),
+                        'value': value}, settings.CACHE_FEED_STALE_TIMEOUT)
+    finally:
+        if entry is not None:
+            cache.delete(lock)
+    return value
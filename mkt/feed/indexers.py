@@ -7,6 +7,7 @@ from amo.utils import attach_trans_dict
 import mkt.carriers
 import mkt.feed.constants as feed
 import mkt.regions
+from mkt.feed import cache as feed_cache
 from mkt.search.indexers import BaseIndexer
 from mkt.translations.utils import format_translation_es
 from mkt.webapps.models import Webapp
@@ -23,7 +24,14 @@ def get_slug_multifield():
     }
 
 
-class FeedAppIndexer(BaseIndexer):
+class BaseFeedIndexer(BaseIndexer):
+    @classmethod
+    def indexed(cls, ids):
+        """The cached feed responses are stale once ES has the changes."""
+        feed_cache.invalidate()
+
+
+class FeedAppIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         """Returns the Django model this MappingType relates to"""
@@ -96,7 +104,7 @@ class FeedAppIndexer(BaseIndexer):
         return doc
 
 
-class FeedBrandIndexer(BaseIndexer):
+class FeedBrandIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedBrand
@@ -136,7 +144,7 @@ class FeedBrandIndexer(BaseIndexer):
         }
 
 
-class FeedCollectionIndexer(BaseIndexer):
+class FeedCollectionIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedCollection
@@ -212,7 +220,7 @@ class FeedCollectionIndexer(BaseIndexer):
         return doc
 
 
-class FeedShelfIndexer(BaseIndexer):
+class FeedShelfIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedShelf
@@ -269,7 +277,7 @@ class FeedShelfIndexer(BaseIndexer):
         return doc
 
 
-class FeedItemIndexer(BaseIndexer):
+class FeedItemIndexer(BaseFeedIndexer):
     @classmethod
     def get_model(cls):
         from mkt.feed.models import FeedItem
@@ -26,6 +26,7 @@ import mkt.carriers
 import mkt.regions
 from mkt.collections.fields import ColorField
 from mkt.constants.categories import CATEGORY_CHOICES
+from mkt.feed import cache as feed_cache
 from mkt.feed import indexers
 from mkt.ratings.validators import validate_rating
 from mkt.translations.fields import PurifiedField, save_signal
@@ -440,6 +441,17 @@ def delete_search_index(sender, instance, **kw):
     instance.get_indexer().unindex(instance.id)
 
 
+# Make the cached feed responses stale.
+def invalidate_feed_cache(sender, **kw):
+    feed_cache.invalidate()
+
+for cls in [FeedApp, FeedBrand, FeedCollection, FeedItem, FeedShelf]:
+    models.signals.post_save.connect(invalidate_feed_cache, sender=cls,
+                                     dispatch_uid='feed_cache_invalidate')
+    post_delete.connect(invalidate_feed_cache, sender=cls,
+                        dispatch_uid='feed_cache_invalidate')
+
+
 # Save translations when saving instance with translated fields.
 models.signals.pre_save.connect(
     save_signal, sender=FeedApp,
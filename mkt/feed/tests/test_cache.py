@@ -0,0 +1,56 @@
+from django.conf import settings
+
+import mock
+from nose.tools import eq_
+
+import amo.tests
+from mkt.feed import cache as feed_cache
+from mkt.feed.tests.test_models import FeedTestMixin
+
+
+class TestFeedCache(FeedTestMixin, amo.tests.TestCase):
+
+    def setUp(self):
+        self.key = feed_cache.make_key(1, 'en-US', '/api/v2/feed/get/')
+        self.build = mock.Mock(return_value='feed')
+
+    def test_miss(self):
+        eq_(feed_cache.get(self.key, self.build), 'feed')
+        eq_(self.build.call_count, 1)
+
+    def test_hit(self):
+        feed_cache.get(self.key, self.build)
+        eq_(feed_cache.get(self.key, self.build), 'feed')
+        eq_(self.build.call_count, 1)
+
+    def test_invalidate(self):
+        feed_cache.get(self.key, self.build)
+        feed_cache.invalidate()
+        self.build.return_value = 'new feed'
+        eq_(feed_cache.get(self.key, self.build), 'new feed')
+        eq_(self.build.call_count, 2)
+
+    @mock.patch.object(feed_cache.time, 'time')
+    def test_expired(self, time_mock):
+        time_mock.return_value = 1000
+        feed_cache.get(self.key, self.build)
+        time_mock.return_value = 1001
+        feed_cache.get(self.key, self.build)
+        eq_(self.build.call_count, 1)
+        time_mock.return_value += settings.CACHE_FEED_TIMEOUT
+        feed_cache.get(self.key, self.build)
+        eq_(self.build.call_count, 2)
+
+    def test_stale_while_rebuilding(self):
+        feed_cache.get(self.key, self.build)
+        feed_cache.invalidate()
+        # Another request is rebuilding the feed.
+        feed_cache.cache.add('%s:lock' % self.key, 1)
+        self.build.return_value = 'new feed'
+        eq_(feed_cache.get(self.key, self.build), 'feed')
+        eq_(self.build.call_count, 1)
+
+    def test_save_invalidates(self):
+        generation = feed_cache.get_generation()
+        self.feed_app_factory()
+        assert feed_cache.get_generation() > generation
@@ -18,6 +18,7 @@ import mkt.regions
 from amo.tests import app_factory
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.constants import applications
+from mkt.feed.indexers import FeedItemIndexer
 from mkt.feed.models import (FeedApp, FeedBrand, FeedCollection, FeedItem,
                              FeedShelf)
 from mkt.feed.tests.test_models import FeedAppMixin, FeedTestMixin
@@ -1349,6 +1350,33 @@ class TestFeedView(BaseTestFeedESView, BaseTestFeedItemViewSet):
         res, data = self._get(region='us')
         eq_(len(data['objects']), len(feed_items))
 
+    def test_restofworld_fallback_single_msearch(self):
+        feed_items = self.feed_factory()
+        es = FeedItemIndexer.get_es()
+        with mock.patch.object(es, 'msearch', wraps=es.msearch) as msearch:
+            res, data = self._get(region='us')
+        eq_(len(data['objects']), len(feed_items))
+        eq_(msearch.call_count, 1)
+        # A header and a body for the region and the RoW queries.
+        eq_(len(msearch.call_args[1]['body']), 4)
+
+    def test_cached(self):
+        self.feed_factory()
+        res, data = self._get()
+        es = FeedItemIndexer.get_es()
+        with mock.patch.object(es, 'msearch') as msearch:
+            cached_res, cached_data = self._get()
+        ok_(not msearch.called)
+        eq_(cached_res.status_code, 200)
+        eq_(cached_data, data)
+
+    def test_restofworld_no_fallback(self):
+        self.feed_factory()
+        es = FeedItemIndexer.get_es()
+        with mock.patch.object(es, 'msearch', wraps=es.msearch) as msearch:
+            self._get(carrier=None)
+        eq_(len(msearch.call_args[1]['body']), 2)
+
     def test_order(self):
         """Test feed elements are ordered by their order attribute."""
         feed_items = [self.feed_item_factory(order=i + 1) for i in xrange(4)]
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.core.files.storage import default_storage as storage
 from django.db.models import Q
+from django.utils.translation import get_language
 
 from django_statsd.clients import statsd
 from elasticsearch_dsl import filter as es_filter
@@ -26,9 +27,11 @@ from mkt.constants import applications
 from mkt.constants.applications import DEVICE_CHOICES_IDS
 from mkt.developers.tasks import pngcrush_image
 from mkt.feed.indexers import FeedItemIndexer
+from mkt.search.utils import MultiSearch
 from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import Webapp
 
+from . import cache as feed_cache
 from .authorization import FeedAuthorization
 from .fields import ImageURLField
 from .models import FeedApp, FeedBrand, FeedCollection, FeedItem, FeedShelf
@@ -597,7 +600,8 @@ class FeedElementSearchView(BaseFeedESView):
 class FeedView(MarketplaceView, BaseFeedESView, generics.GenericAPIView):
     """
     THE feed view. It hits ES with:
-    - a weighted function score query to get feed items
+    - a msearch of weighted function score queries to get feed items for the
+      region and RoW
     - a filter to deserialize feed elements
     - a mget to deserialize apps
     """
@@ -656,6 +660,26 @@ class FeedView(MarketplaceView, BaseFeedESView, generics.GenericAPIView):
 
         return sq.filter(es_filter.Bool(should=filters))[0:len(feed_items)]
 
+    def get_es_feed_items(self, es, region, carrier):
+        """
+        Returns a page of FeedItems for the region and carrier, falling back
+        to RoW if there are none. Both queries are sent in the same msearch
+        so the fallback doesn't cost another round trip to ES.
+        """
+        searches = [self.get_es_feed_query(FeedItemIndexer.search(using=es),
+                                           region=region, carrier=carrier)]
+        if region != mkt.regions.RESTOFWORLD.id or carrier is not None:
+            searches.append(self.get_es_feed_query(
+                FeedItemIndexer.search(using=es)))
+        multi = MultiSearch(es, FeedItemIndexer.get_index(),
+                            FeedItemIndexer.get_mapping_type_name(), searches)
+
+        feed_items = self.paginate_queryset(multi[0])
+        if not feed_items:
+            # No items returned; fall back to RoW.
+            feed_items = self.paginate_queryset(multi[len(searches) - 1])
+        return feed_items
+
     def _get(self, request, *args, **kwargs):
         es = FeedItemIndexer.get_es()
 
@@ -667,31 +691,18 @@ class FeedView(MarketplaceView, BaseFeedESView, generics.GenericAPIView):
             carrier = mkt.carriers.CARRIER_MAP[q['carrier']].id
 
         # Fetch FeedItems.
-        sq = self.get_es_feed_query(FeedItemIndexer.search(using=es),
-                                    region=region, carrier=carrier)
-        feed_items = self.paginate_queryset(sq)
-
-        # No items returned; try to fall back to RoW.
-        if not feed_items:
-            world_sq = self.get_es_feed_query(FeedItemIndexer.search(using=es))
-            world_feed_items = self.paginate_queryset(world_sq)
-
-            # No RoW feed items, either. Let's 404.
-            if not world_feed_items:
-                world_meta = mkt.api.paginator.CustomPaginationSerializer(
-                    world_feed_items,
-                    context={'request': request}).data['meta']
-                return response.Response({'meta': world_meta, 'objects': []},
-                                         status=status.HTTP_404_NOT_FOUND)
-
-            # Return RoW items.
-            else:
-                feed_items = world_feed_items
+        with statsd.timer('mkt.feed.view.feed_items'):
+            feed_items = self.get_es_feed_items(es, region, carrier)
 
         # Build the meta object.
         meta = mkt.api.paginator.CustomPaginationSerializer(
             feed_items, context={'request': request}).data['meta']
 
+        # No RoW feed items, either. Let's 404.
+        if not feed_items:
+            return response.Response({'meta': meta, 'objects': []},
+                                     status=status.HTTP_404_NOT_FOUND)
+
         # Set up serializer context.
         feed_element_map = {
             feed.FEED_TYPE_APP: {},
@@ -704,21 +715,27 @@ class FeedView(MarketplaceView, BaseFeedESView, generics.GenericAPIView):
         apps = []
         sq = self.get_es_feed_element_query(
             Search(using=es, index=self.get_feed_element_index()), feed_items)
-        for feed_elm in sq.execute().hits:
+        with statsd.timer('mkt.feed.view.feed_elements'):
+            feed_elements = sq.execute().hits
+        for feed_elm in feed_elements:
             # Store the feed elements to attach to FeedItems later.
             feed_element_map[feed_elm['item_type']][feed_elm['id']] = feed_elm
             # Store the apps to retrieve later.
             apps += self.get_app_ids(feed_elm)
 
-        # Fetch apps to attach to feed elements later (with mget).
-        app_map = self.mget_apps(apps)
+        # Fetch apps to attach to feed elements later (with mget). The app
+        # IDs are only known once the feed elements are back, so this can't
+        # be sent along with the searches above.
+        with statsd.timer('mkt.feed.view.apps'):
+            app_map = self.mget_apps(apps)
 
         # Super serialize.
-        feed_items = FeedItemESSerializer(feed_items, many=True, context={
-            'app_map': app_map,
-            'feed_element_map': feed_element_map,
-            'request': request
-        }).data
+        with statsd.timer('mkt.feed.view.serialize'):
+            feed_items = FeedItemESSerializer(feed_items, many=True, context={
+                'app_map': app_map,
+                'feed_element_map': feed_element_map,
+                'request': request
+            }).data
 
         # Filter excluded apps. If there are feed items that have all their
         # apps excluded, they will be removed from the feed.
@@ -733,8 +750,17 @@ class FeedView(MarketplaceView, BaseFeedESView, generics.GenericAPIView):
                                  status=status.HTTP_200_OK)
 
     def get(self, request, *args, **kwargs):
+        # The full path holds the carrier, device and page asked for.
+        key = feed_cache.make_key(request.REGION.id, get_language(),
+                                  request.get_full_path())
+
+        def build():
+            res = self._get(request, *args, **kwargs)
+            return res.data, res.status_code
+
         with statsd.timer('mkt.feed.view'):
-            return self._get(request, *args, **kwargs)
+            data, status_code = feed_cache.get(key, build)
+        return response.Response(data, status=status_code)
 
 
 class FeedElementGetView(BaseFeedESView):
@@ -1,10 +1,15 @@
 import codecs
+import collections
+import hashlib
 import json
 import mimetypes
 import os
-import stat
+import StringIO
+import time
+import zipfile
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
 from django.template.defaultfilters import filesizeformat
@@ -13,15 +18,14 @@ from django.utils.encoding import smart_unicode
 
 import commonware.log
 import jinja2
-from cache_nuggets.lib import memoize, Message
+from cache_nuggets.lib import Message
 from jingo import env, register
 from tower import ugettext as _
 from appvalidator.testcases.packagelayout import (blacklisted_extensions,
                                                   blacklisted_magic_numbers)
 
 import amo
-from amo.utils import rm_local_tmp_dir
-from mkt.files.utils import extract_xpi, get_md5
+from mkt.files.utils import SafeUnzip
 
 
 # Allow files with a shebang through.
@@ -29,6 +33,11 @@ blacklisted_magic_numbers = [
     b for b in list(blacklisted_magic_numbers) if b != (0x23, 0x21)]
 blacklisted_extensions = [
     b for b in list(blacklisted_extensions) if b != 'sh']
+# Nested archives that are listed like directories, and how deep to go.
+EXPAND_EXTENSIONS = ('.jar', '.xpi')
+EXPAND_DEPTH = 10
+# How long the lists of files in packages are cached.
+FILES_CACHE_TIMEOUT = 60 * 60
 task_log = commonware.log.getLogger('z.task')
 
 
@@ -64,9 +73,11 @@ def file_tree(files, selected):
 
 class FileViewer(object):
     """
-    Provide access to a storage-managed file by copying it locally and
-    extracting info from it. `src` is a storage-managed path and `dest` is a
-    local temp path.
+    Provide access to the files in a storage-managed package without
+    extracting it. The list of files comes from the zip's index and is kept
+    in the cache, the contents are read straight out of the archive. Nested
+    archives are only opened once they are browsed. `src` is a
+    storage-managed path.
     """
 
     def __init__(self, file_obj):
@@ -75,8 +86,6 @@ class FileViewer(object):
         self.src = (file_obj.guarded_file_path
                     if file_obj.status == amo.STATUS_DISABLED
                     else file_obj.file_path)
-        self.dest = os.path.join(settings.TMP_PATH, 'file_viewer',
-                                 str(file_obj.pk))
         self._files, self.selected = None, None
 
     def __str__(self):
@@ -86,44 +95,54 @@ class FileViewer(object):
         return ('%s:file-viewer:extraction-in-progress:%s' %
                 (settings.CACHE_PREFIX, self.file.id))
 
+    def _extracted_cache_key(self):
+        return '%s:file-viewer:extracted:%s' % (settings.CACHE_PREFIX,
+                                                self.file.id)
+
+    def _files_cache_key(self, archive=u''):
+        key = '%s:file-viewer:files:%s' % (settings.CACHE_PREFIX, self.file.id)
+        if archive:
+            key += ':' + hashlib.md5(archive.encode('utf-8')).hexdigest()
+        return key
+
     def extract(self):
         """
-        Will make all the directories and expand the files.
-        Raises error on nasty files.
+        Reads the list of files from the package and caches it, nothing is
+        written to disk. Raises error on nasty files.
         """
         try:
-            os.makedirs(os.path.dirname(self.dest))
-        except OSError, err:
-            pass
-
-        # This is called `extract_xpi` but it unzips like a zip file.
-        try:
-            extract_xpi(self.src, self.dest, expand=True)
+            files = self._get_files()
         except Exception, err:
-            task_log.error('Error (%s) extracting %s' % (err, self.src))
+            task_log.error('Error (%s) reading %s' % (err, self.src))
             raise
+        self._files = files
+        cache.set(self._files_cache_key(), files, FILES_CACHE_TIMEOUT)
+        # The list of files can be too big for the cache, so that the package
+        # has been read is kept on its own.
+        cache.set(self._extracted_cache_key(), True, FILES_CACHE_TIMEOUT)
 
     def cleanup(self):
-        if os.path.exists(self.dest):
-            rm_local_tmp_dir(self.dest)
+        cache.delete_many([self._extracted_cache_key(),
+                           self._files_cache_key()])
 
     def is_extracted(self):
-        """If the file has been extracted or not."""
-        return (os.path.exists(self.dest) and not
-                Message(self._extraction_cache_key()).get())
+        """If the list of files has been read or not."""
+        return bool(cache.get(self._extracted_cache_key()) and not
+                    Message(self._extraction_cache_key()).get())
 
-    def _is_binary(self, mimetype, path):
-        """Uses the filename to see if the file can be shown in HTML or not."""
+    def _is_binary(self, mimetype, path, head):
+        """
+        Uses the filename and the first bytes of the file, `head`, to see if
+        the file can be shown in HTML or not.
+        """
         # Re-use the blacklisted data from amo-validator to spot binaries.
         ext = os.path.splitext(path)[1][1:]
         if ext in blacklisted_extensions:
             return True
 
-        if os.path.exists(path) and not os.path.isdir(path):
-            with storage.open(path, 'r') as rfile:
-                bytes = tuple(map(ord, rfile.read(4)))
-            if any(bytes[:len(x)] == x for x in blacklisted_magic_numbers):
-                return True
+        bytes = tuple(map(ord, head))
+        if any(bytes[:len(x)] == x for x in blacklisted_magic_numbers):
+            return True
 
         if mimetype:
             major, minor = mimetype.split('/')
@@ -147,7 +166,7 @@ class FileViewer(object):
                 file_data = self._process_manifest(file_data)
 
             return file_data
-        except (IOError, OSError):
+        except (IOError, OSError, KeyError, zipfile.BadZipfile):
             self.selected['msg'] = _('That file no longer exists.')
             return ''
 
@@ -162,17 +181,49 @@ class FileViewer(object):
             self.selected['msg'] = msg
             return ''
 
-        with storage.open(self.selected['full'], 'r') as opened:
-            cont = opened.read()
-            codec = 'utf-16' if cont.startswith(codecs.BOM_UTF16) else 'utf-8'
-            try:
-                return cont.decode(codec)
-            except UnicodeDecodeError:
-                cont = cont.decode(codec, 'ignore')
-                #L10n: {0} is the filename.
-                self.selected['msg'] = (
-                    _('Problems decoding {0}.').format(codec))
-                return cont
+        cont = self.get_contents(self.selected)
+        codec = 'utf-16' if cont.startswith(codecs.BOM_UTF16) else 'utf-8'
+        try:
+            return cont.decode(codec)
+        except UnicodeDecodeError:
+            cont = cont.decode(codec, 'ignore')
+            #L10n: {0} is the filename.
+            self.selected['msg'] = (
+                _('Problems decoding {0}.').format(codec))
+            return cont
+
+    def _open(self, package, archives):
+        """
+        Opens the archive at `archives`, the names of the nested archives
+        down to it, from the open `package`. Nested archives are read into
+        memory.
+        """
+        archive = zipfile.ZipFile(package)
+        for name in archives:
+            archive = zipfile.ZipFile(StringIO.StringIO(archive.read(name)))
+        return archive
+
+    def get_contents(self, file_):
+        """Returns the contents of one of the files from `get_files`."""
+        archive_path = file_['archive_path']
+        with storage.open(self.src, 'rb') as package:
+            return (self._open(package, archive_path[:-1])
+                    .read(archive_path[-1]))
+
+    def iter_contents(self, file_, chunk_size=64 * 1024):
+        """Yields the contents of one of the files from `get_files`."""
+        archive_path = file_['archive_path']
+        with storage.open(self.src, 'rb') as package:
+            opened = (self._open(package, archive_path[:-1])
+                      .open(archive_path[-1]))
+            for chunk in iter(lambda: opened.read(chunk_size), ''):
+                yield chunk
+
+    def _get_md5(self, file_):
+        md5 = hashlib.md5()
+        for chunk in self.iter_contents(file_, chunk_size=2 ** 20):
+            md5.update(chunk)
+        return md5.hexdigest()
 
     def _process_manifest(self, data):
         """
@@ -203,7 +254,21 @@ class FileViewer(object):
         return json.dumps(format_dict(json_data), indent=2)
 
     def select(self, file_):
-        self.selected = self.get_files().get(file_)
+        self.selected = self.get_files(file_).get(file_)
+
+    def hash_selected(self):
+        """
+        Adds the MD5 of the selected file, for showing it. Reading the whole
+        file is needed for that, so the index's CRC32 is used everywhere
+        else.
+        """
+        if self.selected and 'md5' not in self.selected:
+            try:
+                self.selected['md5'] = (self._get_md5(self.selected)
+                                        if not self.selected['directory']
+                                        else '')
+            except (IOError, OSError, KeyError, zipfile.BadZipfile):
+                self.selected['md5'] = ''
 
     def is_binary(self):
         if self.selected:
@@ -227,24 +292,62 @@ class FileViewer(object):
 
         return 'manifest.webapp'
 
-    def get_files(self):
+    def get_files(self, key=None):
         """
         Returns a SortedDict, ordered by the filename of all the files in the
         addon-file. Full of all the useful information you'll need to serve
         this file, build templates etc.
+
+        The files in nested archives are only listed once they, or the
+        archive itself, are asked for as `key`.
         """
-        if self._files:
-            return self._files
+        if self._files is None:
+            if not self.is_extracted():
+                return {}
+            files = cache.get(self._files_cache_key())
+            if files is None:
+                # The list was too big for the cache or has been evicted.
+                try:
+                    files = self._get_files()
+                except (IOError, OSError, zipfile.BadZipfile):
+                    return {}
+            self._files = files
 
-        if not self.is_extracted():
-            return {}
-        # In case a cron job comes along and deletes the files
-        # mid tree building.
-        try:
-            self._files = self._get_files()
-            return self._files
-        except (OSError, IOError):
-            return {}
+        if key:
+            parts = key.split('/')
+            for i in range(1, len(parts) + 1):
+                archive = self._files.get('/'.join(parts[:i]))
+                if archive and archive['archive']:
+                    self._expand(archive)
+        return self._files
+
+    def _expand(self, archive):
+        """
+        Adds the files in a nested archive to the list, reading the archive
+        into memory. If it turns out not to be an archive, it is shown as a
+        plain file.
+        """
+        short = archive['short']
+        key = self._files_cache_key(short)
+        cached = cache.get(key)
+        if cached is None:
+            entries = {}
+            try:
+                valid = self._read_index(
+                    StringIO.StringIO(self.get_contents(archive)), entries,
+                    short + '/', archive['archive_path'])
+            except (IOError, OSError, KeyError, zipfile.BadZipfile):
+                return
+            cached = (valid, dict((name, self._make_file(name, entry))
+                                  for name, entry in entries.items()))
+            cache.set(key, cached, FILES_CACHE_TIMEOUT)
+
+        valid, files = cached
+        files = dict(files)
+        files.update((name, value) for name, value in self._files.items()
+                     if name != short)
+        files[short] = dict(archive, archive=False, directory=valid)
+        self._files = self._sort(files)
 
     def truncate(self, filename, pre_length=15, post_length=10,
                  ellipsis=u'..'):
@@ -283,53 +386,100 @@ class FileViewer(object):
                 return short
         return 'plain'
 
-    @memoize(prefix='file-viewer', time=60 * 60)
+    def _read_index(self, source, entries, prefix=u'', archive_path=()):
+        """
+        Reads the index of the archive `source` into `entries`, keyed by the
+        path in the package. Nested archives, up to EXPAND_DEPTH deep, are
+        listed like directories but only opened by `_expand`.
+        """
+        zip = SafeUnzip(source)
+        if not zip.is_valid(fatal=not archive_path):
+            return False
+
+        for info in zip.info:
+            short = prefix + smart_unicode(info.filename.rstrip('/'),
+                                           errors='replace')
+            entry = {'archive': False,
+                     'archive_path': archive_path + (info.filename,),
+                     'crc32': '',
+                     'directory': info.filename.endswith('/'),
+                     'head': '',
+                     'modified': time.mktime(info.date_time + (0, 0, -1)),
+                     'size': 0}
+            if not entry['directory']:
+                entry.update(crc32='%08x' % (info.CRC & 0xffffffff),
+                             head=zip.zip.open(info).read(4),
+                             size=info.file_size)
+                if (len(archive_path) < EXPAND_DEPTH and
+                        os.path.splitext(short)[1] in EXPAND_EXTENSIONS):
+                    entry.update(archive=True, directory=True)
+            entries[short] = entry
+
+            # Archives don't have to list their directories, so add any
+            # that are missing.
+            parent = short.rpartition('/')[0]
+            while (parent and len(parent) >= len(prefix) and
+                   parent not in entries):
+                entries[parent] = dict(entry, archive=False,
+                                       archive_path=None, crc32='',
+                                       directory=True, head='', size=0)
+                parent = parent.rpartition('/')[0]
+        return True
+
     def _get_files(self):
-        all_files, res = [], SortedDict()
-        # Not using os.path.walk so we get just the right order.
-
-        def iterate(path):
-            path_dirs, path_files = storage.listdir(path)
-            for dirname in sorted(path_dirs):
-                full = os.path.join(path, dirname)
-                all_files.append(full)
-                iterate(full)
-
-            for filename in sorted(path_files):
-                full = os.path.join(path, filename)
-                all_files.append(full)
-
-        iterate(self.dest)
-
-        for path in all_files:
-            filename = smart_unicode(os.path.basename(path), errors='replace')
-            short = smart_unicode(path[len(self.dest) + 1:], errors='replace')
-            mime, encoding = mimetypes.guess_type(filename)
-            if not mime and filename == 'manifest.webapp':
-                mime = 'application/x-web-app-manifest+json'
-            directory = os.path.isdir(path)
-
-            res[short] = {
-                'binary': self._is_binary(mime, path),
-                'depth': short.count(os.sep),
-                'directory': directory,
-                'filename': filename,
-                'full': path,
-                'md5': get_md5(path) if not directory else '',
-                'mimetype': mime or 'application/octet-stream',
-                'syntax': self.get_syntax(filename),
-                'modified': os.stat(path)[stat.ST_MTIME],
-                'short': short,
-                'size': os.stat(path)[stat.ST_SIZE],
-                'truncated': self.truncate(filename),
-                'url': reverse('mkt.files.list',
-                               args=[self.file.id, 'file', short]),
-                'url_serve': reverse('mkt.files.redirect',
-                                     args=[self.file.id, short]),
-                'version': self.file.version.version,
-            }
-
-        return res
+        entries = {}
+        with storage.open(self.src, 'rb') as package:
+            self._read_index(package, entries)
+        return self._sort(dict((short, self._make_file(short, entry))
+                               for short, entry in entries.items()))
+
+    def _sort(self, files):
+        """Orders the files like a directory listing, directories first."""
+        children = collections.defaultdict(list)
+        for short in files:
+            children[short.rpartition('/')[0]].append(short)
+
+        order = []
+
+        def iterate(parent):
+            names = sorted(children[parent])
+            for short in names:
+                if files[short]['directory']:
+                    order.append(short)
+                    iterate(short)
+            order.extend(short for short in names
+                         if not files[short]['directory'])
+
+        iterate(u'')
+        return SortedDict([(short, files[short]) for short in order])
+
+    def _make_file(self, short, entry):
+        filename = short.rpartition('/')[2]
+        mime, encoding = mimetypes.guess_type(filename)
+        if not mime and filename == 'manifest.webapp':
+            mime = 'application/x-web-app-manifest+json'
+
+        return {
+            'archive': entry['archive'],
+            'archive_path': entry['archive_path'],
+            'binary': self._is_binary(mime, filename, entry['head']),
+            'crc32': entry['crc32'],
+            'depth': short.count('/'),
+            'directory': entry['directory'],
+            'etag': '%s-%s' % (entry['crc32'], entry['size']),
+            'filename': filename,
+            'mimetype': mime or 'application/octet-stream',
+            'syntax': self.get_syntax(filename),
+            'modified': entry['modified'],
+            'short': short,
+            'size': entry['size'],
+            'truncated': self.truncate(filename),
+            'url': reverse('mkt.files.list',
+                           args=[self.file.id, 'file', short]),
+            'url_serve': reverse('mkt.files.redirect',
+                                 args=[self.file.id, short]),
+            'version': self.file.version.version,
+        }
 
 
 class DiffHelper(object):
@@ -370,7 +520,11 @@ class DiffHelper(object):
         different = []
         for key, file in left_files.items():
             file['url'] = self.get_url(file['short'])
-            diff = file['md5'] != right_files.get(key, {}).get('md5')
+            # The CRC32 and size from the archives' index are enough to tell
+            # the files apart without reading them.
+            right = right_files.get(key, {})
+            diff = ((file['crc32'], file['size']) !=
+                    (right.get('crc32'), right.get('size')))
             file['diff'] = diff
             if diff:
                 different.append(file)
@@ -442,12 +596,3 @@ def copyfileobj(fsrc, fdst, length=64 * 1024):
         if not buf:
             break
         fdst.write(buf)
-
-
-def rmtree(prefix):
-    dirs, files = storage.listdir(prefix)
-    for fname in files:
-        storage.delete(os.path.join(prefix, fname))
-    for d in dirs:
-        rmtree(os.path.join(prefix, d))
-    storage.delete(prefix)
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import os
+import shutil
+import tempfile
 import zipfile
 
 from django import forms
@@ -19,6 +22,30 @@ root = os.path.join(settings.ROOT, 'mkt/files/fixtures/files')
 get_file = lambda x: '%s/%s' % (root, x)
 
 
+def copy_file(name):
+    """Copies one of the packages so that the test can change it."""
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(name)[1],
+                                dir=settings.TMP_PATH)
+    os.close(fd)
+    shutil.copyfile(get_file(name), path)
+    return path
+
+
+def change_file(src, filename, contents=None):
+    """
+    Rewrites the package at `src` with `filename` set to `contents`, or
+    without `filename` if `contents` is None.
+    """
+    with zipfile.ZipFile(src) as zip:
+        files = [(info, zip.read(info)) for info in zip.infolist()
+                 if info.filename != filename]
+    with zipfile.ZipFile(src, 'w') as zip:
+        for info, data in files:
+            zip.writestr(info, data)
+        if contents is not None:
+            zip.writestr(filename, contents)
+
+
 def make_file(pk, file_path, **kwargs):
     obj = Mock()
     obj.id = pk
@@ -36,10 +63,13 @@ def make_file(pk, file_path, **kwargs):
 class TestFileHelper(amo.tests.TestCase):
 
     def setUp(self):
-        self.viewer = FileViewer(make_file(1, get_file('dictionary-test.xpi')))
+        self.src = copy_file('dictionary-test.xpi')
+        self.viewer = FileViewer(make_file(1, self.src))
 
     def tearDown(self):
         self.viewer.cleanup()
+        if os.path.exists(self.src):
+            os.remove(self.src)
 
     def test_files_not_extracted(self):
         eq_(self.viewer.is_extracted(), False)
@@ -56,12 +86,43 @@ class TestFileHelper(amo.tests.TestCase):
     def test_recurse_contents(self):
         self.viewer.src = get_file('recurse.xpi')
         self.viewer.extract()
-        files = self.viewer.get_files()
         nm = ['recurse/recurse.xpi/chrome/test-root.txt',
               'recurse/somejar.jar/recurse/recurse.xpi/chrome/test.jar',
               'recurse/somejar.jar/recurse/recurse.xpi/chrome/test.jar/test']
         for name in nm:
-            eq_(name in files, True, 'File %r not extracted' % name)
+            eq_(name in self.viewer.get_files(name), True,
+                'File %r not extracted' % name)
+
+    def test_recurse_lazy(self):
+        self.viewer.src = get_file('recurse.xpi')
+        self.viewer.extract()
+        files = self.viewer.get_files()
+        eq_(files['recurse/somejar.jar']['directory'], True)
+        eq_('recurse/somejar.jar/recurse' in files, False)
+        files = self.viewer.get_files('recurse/somejar.jar')
+        eq_('recurse/somejar.jar/recurse' in files, True)
+        eq_(files['recurse/somejar.jar']['archive'], False)
+
+    def test_recurse_not_a_zip(self):
+        change_file(self.src, 'notazip.jar', 'foo')
+        self.viewer.extract()
+        files = self.viewer.get_files('notazip.jar')
+        eq_(files['notazip.jar']['directory'], False)
+
+    def test_recurse_read(self):
+        self.viewer.src = get_file('recurse.xpi')
+        self.viewer.extract()
+        self.viewer.select('recurse/somejar.jar/recurse/recurse.xpi/chrome/'
+                           'test.jar/test/test.text')
+        eq_(self.viewer.is_directory(), False)
+        eq_(self.viewer.read_file(), u'')
+        eq_(self.viewer.selected.get('msg'), None)
+
+    def test_files_evicted(self):
+        self.viewer.extract()
+        cache.delete(self.viewer._files_cache_key())
+        files = FileViewer(self.viewer.file).get_files()
+        eq_(files.keys(), self.viewer.get_files().keys())
 
     def test_cleanup(self):
         self.viewer.extract()
@@ -107,12 +168,31 @@ class TestFileHelper(amo.tests.TestCase):
         eq_(files['dictionaries/license.txt']['depth'], 1)
 
     def test_bom(self):
-        dest = os.path.join(settings.TMP_PATH, 'test_bom')
-        open(dest, 'w').write('foo'.encode('utf-16'))
+        change_file(self.src, 'foo', u'foo'.encode('utf-16'))
+        self.viewer.extract()
         self.viewer.select('foo')
-        self.viewer.selected = {'full': dest, 'size': 1}
         eq_(self.viewer.read_file(), u'foo')
-        os.remove(dest)
+
+    def test_read_file(self):
+        self.viewer.extract()
+        self.viewer.select('install.js')
+        eq_(self.viewer.read_file(),
+            zipfile.ZipFile(self.src).read('install.js').decode('utf-8'))
+
+    def test_md5(self):
+        self.viewer.extract()
+        self.viewer.select('install.js')
+        eq_('md5' in self.viewer.selected, False)
+        self.viewer.hash_selected()
+        eq_(self.viewer.selected['md5'],
+            hashlib.md5(zipfile.ZipFile(self.src).read('install.js'))
+                   .hexdigest())
+
+    def test_crc32(self):
+        self.viewer.extract()
+        info = zipfile.ZipFile(self.src).getinfo('install.js')
+        eq_(self.viewer.get_files()['install.js']['crc32'],
+            '%08x' % info.CRC)
 
     def test_syntax(self):
         for filename, syntax in [('foo.rdf', 'xml'),
@@ -127,13 +207,9 @@ class TestFileHelper(amo.tests.TestCase):
             eq_(self.viewer.get_syntax(filename), syntax)
 
     def test_file_order(self):
+        change_file(self.src, 'chrome.manifest', '')
+        change_file(self.src, 'chrome/foo', '')
         self.viewer.extract()
-        dest = self.viewer.dest
-        open(os.path.join(dest, 'chrome.manifest'), 'w')
-        subdir = os.path.join(dest, 'chrome')
-        os.mkdir(subdir)
-        open(os.path.join(subdir, 'foo'), 'w')
-        cache.clear()
         files = self.viewer.get_files().keys()
         rt = files.index(u'chrome')
         eq_(files[rt:rt + 3], [u'chrome', u'chrome/foo', u'dictionaries'])
@@ -167,26 +243,41 @@ class TestFileHelper(amo.tests.TestCase):
     def test_delete_mid_read(self):
         self.viewer.extract()
         self.viewer.select('install.js')
-        os.remove(os.path.join(self.viewer.dest, 'install.js'))
+        os.remove(self.src)
+        res = self.viewer.read_file()
+        eq_(res, '')
+        assert self.viewer.selected['msg'].startswith('That file no')
+
+    def test_changed_mid_read(self):
+        self.viewer.extract()
+        self.viewer.select('install.js')
+        change_file(self.src, 'install.js')
         res = self.viewer.read_file()
         eq_(res, '')
         assert self.viewer.selected['msg'].startswith('That file no')
 
-    @patch('mkt.files.helpers.get_md5')
-    def test_delete_mid_tree(self, get_md5):
-        get_md5.side_effect = IOError('ow')
+    def test_extract_deleted(self):
+        os.remove(self.src)
+        self.assertRaises(IOError, self.viewer.extract)
+        eq_(self.viewer.is_extracted(), False)
+
+    def test_extract_writes_nothing(self):
+        listdir = os.listdir(settings.TMP_PATH)
         self.viewer.extract()
-        eq_({}, self.viewer.get_files())
+        eq_(os.listdir(settings.TMP_PATH), listdir)
 
 
 class TestDiffHelper(amo.tests.TestCase):
 
     def setUp(self):
-        src = os.path.join(settings.ROOT, get_file('dictionary-test.xpi'))
-        self.helper = DiffHelper(make_file(1, src), make_file(2, src))
+        self.helper = DiffHelper(
+            make_file(1, copy_file('dictionary-test.xpi')),
+            make_file(2, copy_file('dictionary-test.xpi')))
 
     def tearDown(self):
         self.helper.cleanup()
+        os.remove(self.helper.left.src)
+        os.remove(self.helper.right.src)
 
     def test_files_not_extracted(self):
         eq_(self.helper.is_extracted(), False)
@@ -205,8 +296,8 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.is_diffable()
 
     def test_diffable_one_missing(self):
+        change_file(self.helper.right.src, 'install.js')
         self.helper.extract()
-        os.remove(os.path.join(self.helper.right.dest, 'install.js'))
         self.helper.select('install.js')
         assert self.helper.is_diffable()
 
@@ -221,8 +312,8 @@ class TestDiffHelper(amo.tests.TestCase):
         assert not self.helper.is_diffable()
 
     def test_diffable_deleted_files(self):
+        change_file(self.helper.left.src, 'install.js')
         self.helper.extract()
-        os.remove(os.path.join(self.helper.left.dest, 'install.js'))
         eq_('install.js' in self.helper.get_deleted_files(), True)
 
     def test_diffable_one_binary_same(self):
@@ -232,18 +323,16 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.is_binary()
 
     def test_diffable_one_binary_diff(self):
+        self.change(self.helper.left.src, 'asd')
         self.helper.extract()
-        self.change(self.helper.left.dest, 'asd')
-        cache.clear()
         self.helper.select('install.js')
         self.helper.left.selected['binary'] = True
         assert self.helper.is_binary()
 
     def test_diffable_two_binary_diff(self):
+        self.change(self.helper.left.src, 'asd')
+        self.change(self.helper.right.src, 'asd123')
         self.helper.extract()
-        self.change(self.helper.left.dest, 'asd')
-        self.change(self.helper.right.dest, 'asd123')
-        cache.clear()
         self.helper.select('install.js')
         self.helper.left.selected['binary'] = True
         self.helper.right.selected['binary'] = True
@@ -257,19 +346,22 @@ class TestDiffHelper(amo.tests.TestCase):
         assert self.helper.left.selected['msg'].startswith('This file')
 
     def test_diffable_parent(self):
-        self.helper.extract()
-        self.change(self.helper.left.dest, 'asd',
+        self.change(self.helper.left.src, 'asd',
                     filename='__MACOSX/._dictionaries')
-        cache.clear()
+        self.helper.extract()
         files = self.helper.get_files()
         eq_(files['__MACOSX/._dictionaries']['diff'], True)
         eq_(files['__MACOSX']['diff'], True)
 
-    def change(self, file, text, filename='install.js'):
-        path = os.path.join(file, filename)
-        data = open(path, 'r').read()
-        data += text
-        open(path, 'w').write(data)
+    def test_diff_same(self):
+        self.helper.extract()
+        files = self.helper.get_files()
+        eq_(files['install.js']['diff'], False)
+        eq_(files['__MACOSX']['diff'], False)
+
+    def change(self, src, text, filename='install.js'):
+        data = zipfile.ZipFile(src).read(filename)
+        change_file(src, filename, data + text)
 
 
 class TestSafeUnzipFile(amo.tests.TestCase, amo.tests.AMOPaths):
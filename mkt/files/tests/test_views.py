@@ -2,6 +2,7 @@ import json
 import os
 import shutil
 import urlparse
+import zipfile
 
 from django.conf import settings
 from django.core.cache import cache
@@ -10,7 +11,6 @@ from django.utils.http import http_date
 
 from cache_nuggets.lib import Message
 from mock import patch
-from nose import SkipTest
 from nose.tools import eq_
 from pyquery import PyQuery as pq
 
@@ -18,6 +18,7 @@ import amo
 import amo.tests
 from mkt.files.helpers import DiffHelper, FileViewer
 from mkt.files.models import File
+from mkt.files.tests.test_helpers import change_file
 from mkt.site.fixtures import fixture
 from mkt.users.models import UserProfile
 from mkt.webapps.models import Webapp
@@ -118,11 +119,21 @@ class FilesBase(object):
         self.file_viewer.extract()
         self.file_viewer.select('manifest.webapp')
         obj = getattr(self.file_viewer, 'left', self.file_viewer)
-        etag = obj.selected.get('md5')
+        etag = obj.selected.get('etag')
         res = self.client.get(self.file_url('manifest.webapp'),
                               HTTP_IF_NONE_MATCH=etag)
         eq_(res.status_code, 304)
 
+    @patch.object(FileViewer, '_get_md5')
+    def test_content_headers_etag_not_hashed(self, _get_md5):
+        self.file_viewer.extract()
+        self.file_viewer.select('manifest.webapp')
+        obj = getattr(self.file_viewer, 'left', self.file_viewer)
+        res = self.client.get(self.file_url('manifest.webapp'),
+                              HTTP_IF_NONE_MATCH=obj.selected.get('etag'))
+        eq_(res.status_code, 304)
+        assert not _get_md5.called
+
     def test_content_headers_if_modified(self):
         self.file_viewer.extract()
         self.file_viewer.select('manifest.webapp')
@@ -236,8 +247,8 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
                     (url, status_code, status))
 
     def add_file(self, name, contents):
-        dest = os.path.join(self.file_viewer.dest, name)
-        open(dest, 'w').write(contents)
+        change_file(self.file_viewer.src, name, contents)
+        self.file_viewer.cleanup()
 
     def test_files_xss(self):
         self.file_viewer.extract()
@@ -278,7 +289,9 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
         self.add_file('file.php', '<script>alert("foo")</script>')
         res = self.client.get(self.file_url('file.php'))
         eq_(res.status_code, 200)
-        assert self.file_viewer.get_files()['file.php']['md5'] in res.content
+        self.file_viewer.select('file.php')
+        self.file_viewer.hash_selected()
+        assert self.file_viewer.selected['md5'] in res.content
 
     def test_tree_no_file(self):
         self.file_viewer.extract()
@@ -321,16 +334,13 @@ class TestFileViewer(FilesBase, amo.tests.WebappTestCase):
         res = self.client.get(url)
         eq_(res.status_code, 403)
 
-    def test_bounce(self):
-        # Don't run this test if the server has x-sendfile turned off.
-        if not settings.XSENDFILE:
-            raise SkipTest()
-
+    def test_serve(self):
         self.file_viewer.extract()
         res = self.client.get(self.files_redirect(binary), follow=True)
         eq_(res.status_code, 200)
-        eq_(res[settings.XSENDFILE_HEADER],
-            self.file_viewer.get_files().get(binary)['full'])
+        eq_(res['Content-Type'], 'image/png')
+        eq_(''.join(res.streaming_content),
+            zipfile.ZipFile(self.file.file_path).read(binary))
 
     @patch.object(settings, 'FILE_VIEWER_SIZE_LIMIT', 5)
     def test_file_size(self):
@@ -369,9 +379,9 @@ class TestDiffViewer(FilesBase, amo.tests.WebappTestCase):
         return reverse('mkt.files.compare.poll', args=[self.files[0].pk,
                                                        self.files[1].pk])
 
-    def add_file(self, file_obj, name, contents):
-        dest = os.path.join(file_obj.dest, name)
-        open(dest, 'w').write(contents)
+    def change_file(self, file_obj, name, contents=None):
+        change_file(file_obj.src, name, contents)
+        file_obj.cleanup()
 
     def file_url(self, file=None):
         args = [self.files[0].pk, self.files[1].pk]
@@ -414,7 +424,7 @@ class TestDiffViewer(FilesBase, amo.tests.WebappTestCase):
 
     def test_view_one_missing(self):
         self.file_viewer.extract()
-        os.remove(os.path.join(self.file_viewer.right.dest, 'manifest.webapp'))
+        self.change_file(self.file_viewer.right, 'manifest.webapp')
         res = self.client.get(self.file_url(not_binary))
         doc = pq(res.content)
         eq_(len(doc('pre')), 3)
@@ -422,22 +432,20 @@ class TestDiffViewer(FilesBase, amo.tests.WebappTestCase):
 
     def test_view_left_binary(self):
         self.file_viewer.extract()
-        filename = os.path.join(self.file_viewer.left.dest, 'manifest.webapp')
-        open(filename, 'w').write('MZ')
+        self.change_file(self.file_viewer.left, 'manifest.webapp', 'MZ')
         res = self.client.get(self.file_url(not_binary))
         assert 'This file is not viewable online' in res.content
 
     def test_view_right_binary(self):
         self.file_viewer.extract()
-        filename = os.path.join(self.file_viewer.right.dest, 'manifest.webapp')
-        open(filename, 'w').write('MZ')
+        self.change_file(self.file_viewer.right, 'manifest.webapp', 'MZ')
         assert not self.file_viewer.is_diffable()
         res = self.client.get(self.file_url(not_binary))
         assert 'This file is not viewable online' in res.content
 
     def test_different_tree(self):
         self.file_viewer.extract()
-        os.remove(os.path.join(self.file_viewer.left.dest, not_binary))
+        self.change_file(self.file_viewer.left, not_binary)
         res = self.client.get(self.file_url(not_binary))
         doc = pq(res.content)
         eq_(doc('h4:last').text(), 'Deleted files:')
@@ -3,7 +3,6 @@ import json
 import logging
 import os
 import re
-import shutil
 import stat
 import StringIO
 import tempfile
@@ -264,52 +263,6 @@ def extract_zip(source, remove=False, fatal=True):
     return tempdir
 
 
-def copy_over(source, dest):
-    """
-    Copies from the source to the destination, removing the destination
-    if it exists and is a directory.
-    """
-    if os.path.exists(dest) and os.path.isdir(dest):
-        shutil.rmtree(dest)
-    shutil.copytree(source, dest)
-    # mkdtemp will set the directory permissions to 700
-    # for the webserver to read them, we need 755
-    os.chmod(dest, stat.S_IRWXU | stat.S_IRGRP |
-             stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-    shutil.rmtree(source)
-
-
-def extract_xpi(xpi, path, expand=False):
-    """
-    If expand is given, will look inside the expanded file
-    and find anything in the whitelist and try and expand it as well.
-    It will do up to 10 iterations, after that you are on your own.
-
-    It will replace the expanded file with a directory and the expanded
-    contents. If you have 'foo.jar', that contains 'some-image.jpg', then
-    it will create a folder, foo.jar, with an image inside.
-    """
-    expand_whitelist = ['.jar', '.xpi']
-    tempdir = extract_zip(xpi)
-
-    if expand:
-        for x in xrange(0, 10):
-            flag = False
-            for root, dirs, files in os.walk(tempdir):
-                for name in files:
-                    if os.path.splitext(name)[1] in expand_whitelist:
-                        src = os.path.join(root, name)
-                        if not os.path.isdir(src):
-                            dest = extract_zip(src, remove=True, fatal=False)
-                            if dest:
-                                copy_over(dest, src)
-                                flag = True
-            if not flag:
-                break
-
-    copy_over(tempdir, path)
-
-
 def parse_addon(pkg, addon=None):
     """
     pkg is a filepath or a django.core.files.UploadedFile
@@ -13,7 +13,7 @@ from cache_nuggets.lib import Message, Token
 from tower import ugettext as _
 
 from amo.decorators import json_view
-from amo.utils import HttpResponseSendFile, urlparams
+from amo.utils import urlparams
 from mkt.access import acl
 from mkt.files import forms
 from mkt.files.decorators import (compare_webapp_file_view, etag, last_modified,
@@ -92,12 +92,13 @@ def browse(request, viewer, key=None, type_='file'):
         extract_file(viewer)
 
     if viewer.is_extracted():
-        data.update({'status': True, 'files': viewer.get_files()})
         key = viewer.get_default(key)
+        data.update({'status': True, 'files': viewer.get_files(key)})
         if key not in data['files']:
             raise http.Http404
 
         viewer.select(key)
+        viewer.hash_selected()
         data['key'] = key
 
         binary = viewer.is_binary()
@@ -147,14 +148,16 @@ def compare(request, diff, key=None, type_='file'):
         extract_file(diff.right)
 
     if diff.is_extracted():
+        key = diff.left.get_default(key)
+        # Selecting first lists the files of any nested archive on the way.
+        diff.select(key)
+        diff.left.hash_selected(), diff.right.hash_selected()
         data.update({'status': True,
                      'files': diff.get_files(),
                      'files_deleted': diff.get_deleted_files()})
-        key = diff.left.get_default(key)
         if key not in data['files'] and key not in data['files_deleted']:
             raise http.Http404
 
-        diff.select(key)
         data['key'] = key
         if diff.is_diffable():
             data['left'], data['right'] = diff.read_file()
@@ -183,11 +186,11 @@ def serve(request, viewer, key):
     This is to serve files off of st.a.m.o, not standard a.m.o. For this we
     use token based authentication.
     """
-    files = viewer.get_files()
+    files = viewer.get_files(key)
     obj = files.get(key)
     if not obj:
         log.error(u'Couldn\'t find %s in %s (%d entries) for file %s' %
                   (key, files.keys()[:10], len(files.keys()), viewer.file.id))
         raise http.Http404()
-    return HttpResponseSendFile(request, obj['full'],
-                                content_type=obj['mimetype'])
+    return http.StreamingHttpResponse(viewer.iter_contents(obj),
+                                      content_type=obj['mimetype'])
@@ -1,8 +1,18 @@
+import atexit
 import datetime
 import hashlib
 import json
+import threading
+import time
 
-from django.db import models
+from django.conf import settings
+from django.db import connection, models
+
+import commonware.log
+from django_statsd.clients import statsd
+
+
+log = commonware.log.getLogger('z.monolith')
 
 
 class MonolithRecord(models.Model):
@@ -57,5 +67,90 @@ def record_stat(key, request, **data):
 
     record = MonolithRecord(key=key, user_hash=get_user_hash(request),
                             recorded=recorded, value=json.dumps(data))
-    record.save()
+    record_buffer.add(record)
     return record
+
+
+class RecordBuffer(object):
+    """Collects records in memory and saves them in bulk.
+
+    The records are saved once there are MONOLITH_BUFFER_SIZE of them, by a
+    timer MONOLITH_BUFFER_TIMEOUT seconds after the oldest one was added and
+    when the process exits. If saving them fails they are kept for the next
+    try, up to MONOLITH_BUFFER_MAX of them.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.started = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            if not self.records:
+                self.started = time.time()
+                self._start_timer()
+            self.records.append(record)
+            depth = len(self.records)
+            full = (depth >= settings.MONOLITH_BUFFER_SIZE or
+                    time.time() - self.started >=
+                    settings.MONOLITH_BUFFER_TIMEOUT)
+        statsd.gauge('monolith.buffer.depth', depth)
+        if full:
+            self.flush()
+
+    def _start_timer(self):
+        if self.timer:
+            self.timer.cancel()
+        self.timer = threading.Timer(settings.MONOLITH_BUFFER_TIMEOUT,
+                                     self._timed_flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        finally:
+            # The timer runs in its own thread, with its own connection.
+            connection.close()
+
+    def flush(self):
+        """Saves all the records in the buffer, never raises."""
+        with self.lock:
+            records, self.records = self.records, []
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+        if not records:
+            return
+        statsd.gauge('monolith.buffer.depth', 0)
+        try:
+            with statsd.timer('monolith.buffer.flush'):
+                MonolithRecord.objects.bulk_create(records)
+        except Exception:
+            log.error('Saving %s monolith records failed' % len(records),
+                      exc_info=True)
+            self._restore(records)
+            return
+        statsd.incr('monolith.buffer.flushed', len(records))
+
+    def _restore(self, records):
+        """Puts back records that failed to save, dropping the oldest."""
+        with self.lock:
+            if not self.records:
+                self.started = time.time()
+                self._start_timer()
+            self.records = records + self.records
+            dropped = len(self.records) - settings.MONOLITH_BUFFER_MAX
+            if dropped > 0:
+                self.records = self.records[dropped:]
+            depth = len(self.records)
+        if dropped > 0:
+            log.error('Dropped %s monolith records' % dropped)
+            statsd.incr('monolith.buffer.dropped', dropped)
+        statsd.gauge('monolith.buffer.depth', depth)
+
+
+record_buffer = RecordBuffer()
+atexit.register(record_buffer.flush)
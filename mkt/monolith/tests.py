@@ -6,15 +6,18 @@ from collections import namedtuple
 import mock
 from nose.tools import eq_, ok_
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import client
 
-from amo.tests import TestCase
+from amo.tests import app_factory, TestCase
 from mkt.api.tests.test_oauth import RestOAuth
+from mkt.ratings.models import Review
 from mkt.site.fixtures import fixture
+from mkt.users.models import UserProfile
 
-from .models import MonolithRecord, record_stat
-from .views import daterange
+from .models import MonolithRecord, record_stat, RecordBuffer
+from .views import _get_query_result, daterange
 
 
 class RequestFactory(client.RequestFactory):
@@ -66,6 +69,150 @@ class TestModels(TestCase):
             record_stat('app.install', self.request)
 
 
+class TestRecordBuffer(TestCase):
+
+    def setUp(self):
+        super(TestRecordBuffer, self).setUp()
+        self.request = RequestFactory()
+        self.buffer = RecordBuffer()
+        patcher = mock.patch('mkt.monolith.models.record_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('mkt.monolith.models.threading.Timer')
+        self.Timer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_buffered(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=3):
+            record_stat('app.install', self.request, value=1)
+            record_stat('app.install', self.request, value=2)
+            eq_(MonolithRecord.objects.count(), 0)
+            record_stat('app.install', self.request, value=3)
+        eq_(sorted(json.loads(r.value)['value']
+                   for r in MonolithRecord.objects.all()), [1, 2, 3])
+        eq_(self.buffer.records, [])
+
+    @mock.patch('mkt.monolith.models.time.time')
+    def test_timeout(self, time):
+        time.return_value = 1000
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+            eq_(MonolithRecord.objects.count(), 0)
+            time.return_value = 1060
+            record_stat('app.install', self.request, value=2)
+        eq_(MonolithRecord.objects.count(), 2)
+
+    def test_flush(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=10):
+            record_stat('app.install', self.request, value=1)
+        self.buffer.flush()
+        eq_(MonolithRecord.objects.count(), 1)
+        self.buffer.flush()
+        eq_(MonolithRecord.objects.count(), 1)
+
+    @mock.patch('mkt.monolith.models.connection')
+    def test_timer(self, connection):
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+            record_stat('app.install', self.request, value=2)
+        eq_(self.Timer.call_count, 1)
+        eq_(self.Timer.call_args[0][0], 60)
+        eq_(MonolithRecord.objects.count(), 0)
+
+        # The process goes idle, the timer saves the records.
+        self.Timer.call_args[0][1]()
+        eq_(MonolithRecord.objects.count(), 2)
+        assert connection.close.called
+        assert self.Timer.return_value.cancel.called
+
+    @mock.patch.object(MonolithRecord.objects, 'bulk_create')
+    def test_flush_failed(self, bulk_create):
+        bulk_create.side_effect = Exception
+        with self.settings(MONOLITH_BUFFER_SIZE=10):
+            record_stat('app.install', self.request, value=1)
+            record_stat('app.install', self.request, value=2)
+        self.buffer.flush()
+        eq_([json.loads(r.value)['value'] for r in self.buffer.records],
+            [1, 2])
+
+        bulk_create.side_effect = None
+        self.buffer.flush()
+        eq_(len(bulk_create.call_args[0][0]), 2)
+        eq_(self.buffer.records, [])
+
+    @mock.patch.object(MonolithRecord.objects, 'bulk_create')
+    def test_flush_failed_drops_oldest(self, bulk_create):
+        bulk_create.side_effect = Exception
+        with self.settings(MONOLITH_BUFFER_SIZE=2, MONOLITH_BUFFER_MAX=3):
+            for value in range(4):
+                record_stat('app.install', self.request, value=value)
+        eq_([json.loads(r.value)['value'] for r in self.buffer.records],
+            [1, 2, 3])
+
+    @mock.patch('mkt.monolith.models.statsd')
+    def test_depth(self, statsd):
+        with self.settings(MONOLITH_BUFFER_SIZE=10):
+            record_stat('app.install', self.request, value=1)
+            record_stat('app.install', self.request, value=2)
+        statsd.gauge.assert_called_with('monolith.buffer.depth', 2)
+
+
+class TestQueryResult(TestCase):
+    fixtures = fixture('user_2519')
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserProfile.objects.get(pk=2519)
+        self.app = app_factory()
+        self.start = datetime.date(2013, 2, 1)
+        self.end = datetime.date(2013, 2, 4)
+        # A review before the range, and two on its second day.
+        for day, rating in ((datetime.date(2013, 1, 1), 1),
+                            (datetime.date(2013, 2, 2), 4),
+                            (datetime.date(2013, 2, 2), 4)):
+            review = Review.objects.create(addon=self.app, user=self.user,
+                                           rating=rating)
+            review.update(created=day)
+
+    def values(self, key):
+        return [(d['recorded'], d['value']['count'], d['value']['app-id'])
+                for d in _get_query_result(key, self.start, self.end)]
+
+    def test_slice(self):
+        eq_(self.values('apps_ratings'),
+            [(datetime.date(2013, 2, 2), 2, self.app.pk)])
+
+    def test_total(self):
+        eq_(self.values('apps_average_rating'),
+            [(datetime.date(2013, 2, 1), 1.0, self.app.pk),
+             (datetime.date(2013, 2, 2), 3.0, self.app.pk),
+             (datetime.date(2013, 2, 3), 3.0, self.app.pk)])
+
+    def test_total_with_reply(self):
+        # Replies have no rating and don't count towards the average.
+        reply = Review.objects.create(addon=self.app, user=self.user,
+                                      reply_to=Review.objects.all()[0],
+                                      rating=None)
+        reply.update(created=datetime.date(2013, 2, 2))
+        self.test_total()
+
+    def test_cached(self):
+        self.values('apps_ratings')
+        Review.objects.all().delete()
+        with self.assertNumQueries(0):
+            eq_(len(self.values('apps_ratings')), 1)
+
+    def test_pages(self):
+        result = _get_query_result('apps_average_rating', self.start,
+                                   self.end)
+        eq_(len(result), 3)
+        eq_([d['recorded'] for d in result[1:3]],
+            [datetime.date(2013, 2, 2), datetime.date(2013, 2, 3)])
+        eq_(result[0]['recorded'], datetime.date(2013, 2, 1))
+
+
 class TestMonolithResource(RestOAuth):
     fixtures = fixture('user_2519')
 
@@ -1,7 +1,11 @@
+import collections
 import datetime
+import itertools
 import logging
 
-from django.db.models import Avg, Count
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
 from rest_framework import status
 from rest_framework.exceptions import ParseError
 from rest_framework.generics import ListAPIView
@@ -23,36 +27,26 @@ log = logging.getLogger('z.monolith')
 
 # TODO: Move the stats that can be calculated on the fly from
 # apps/stats/tasks.py here.
+#
+# Each stat counts the objects of `qs` per app, either created on each day
+# ('slice') or created up to each day ('total'). With `average`, the average
+# of that field is returned instead of the count.
 STATS = {
     'apps_ratings': {
         'qs': Review.objects
-            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(count=Count('addon')),
+            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP),
         'type': 'slice',
-        'field_map': {
-            'count': 'count',
-            'app-id': 'addon'},
     },
     'apps_average_rating': {
         'qs': Review.objects
-            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(avg=Avg('rating')),
+            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP),
         'type': 'total',
-        'field_map': {
-            'count': 'avg',
-            'app-id': 'addon'},
+        'average': 'rating',
     },
     'apps_abuse_reports': {
         'qs': AbuseReport.objects
-            .filter(addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(count=Count('addon')),
+            .filter(addon__type=amo.ADDON_WEBAPP),
         'type': 'slice',
-        'field_map': {
-            'count': 'count',
-            'app-id': 'addon'},
     }
 }
 
@@ -62,12 +56,100 @@ def daterange(start, end):
         yield start + datetime.timedelta(n)
 
 
+class DailyStats(object):
+    """
+    The results of an on-the-fly stat, one for each app on each day. They are
+    only built for the page being returned.
+    """
+
+    def __init__(self, key, days, values):
+        self.key = key
+        self.days = days
+        self.values = values
+
+    def __len__(self):
+        return sum(len(self.values[day]) for day in self.days)
+
+    def __iter__(self):
+        for day in self.days:
+            for app_id, count in self.values[day]:
+                yield {
+                    'key': self.key,
+                    'recorded': day,
+                    'user_hash': None,
+                    'value': {'count': count, 'app-id': app_id}}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(itertools.islice(self, index.start, index.stop,
+                                         index.step))
+        try:
+            return next(itertools.islice(self, index, None))
+        except StopIteration:
+            raise IndexError(index)
+
+
+def _aggregate(stat, qs):
+    aggregates = {'count': Count('id')}
+    if stat.get('average'):
+        # Like Avg, only the objects that have a value are averaged.
+        aggregates = {'count': Count(stat['average']),
+                      'sum': Sum(stat['average'])}
+    return qs.order_by().annotate(**aggregates)
+
+
+def _get_daily_values(stat, start, end):
+    """
+    Returns the value of the stat for each app on each day from `start` to
+    `end`: {day: [(app id, value)]}. The objects are grouped by app and day
+    in a single query, plus one for the objects before `start` when they are
+    totalled.
+    """
+    qs = stat['qs']
+    created = 'DATE(%s.created)' % qs.model._meta.db_table
+    rows = _aggregate(stat, qs.filter(created__gte=start, created__lt=end)
+                               .extra(select={'day': created})
+                               .values('addon', 'day'))
+
+    by_day = collections.defaultdict(list)
+    for row in rows:
+        by_day[row['day']].append(row)
+
+    # For totals, keep running counts and sums per app from the beginning of
+    # time.
+    running = {}
+    if stat['type'] == 'total':
+        for row in _aggregate(stat, qs.filter(created__lt=start)
+                                      .values('addon')):
+            running[row['addon']] = (row['count'], row.get('sum'))
+
+    values = {}
+    for day in daterange(start, end):
+        if stat['type'] != 'total':
+            running = {}
+        for row in by_day.get(day, []):
+            count, sum_ = running.get(row['addon'], (0, 0))
+            running[row['addon']] = (count + row['count'],
+                                     (sum_ or 0) + (row.get('sum') or 0))
+        if stat.get('average'):
+            values[day] = [(app_id, float(sum_) / count)
+                           for app_id, (count, sum_) in running.items()
+                           if count]
+        else:
+            values[day] = [(app_id, count)
+                           for app_id, (count, sum_) in running.items()]
+        values[day].sort()
+    return values
+
+
+def _cache_key(key, day):
+    return 'monolith:stats:%s:%s' % (key, day.isoformat())
+
+
 def _get_query_result(key, start, end):
     # To do on-the-fly queries we have to produce results as if they
-    # were calculated daily, which means we need to iterate over each
-    # day in the range and perform an aggregation on this date.
-
-    data = []
+    # were calculated daily. Past days never change, so they are cached and
+    # the other days are calculated together.
     today = datetime.date.today()
     stat = STATS[key]
 
@@ -77,29 +159,23 @@ def _get_query_result(key, start, end):
     if not end:
         end = today
 
-    for day in daterange(start, end):
-        if stat['type'] == 'total':
-            # If it's a totalling queryset, we want to filter by the
-            # end date until the beginning of time to get the total
-            # objects up until this point in time.
-            date_filtered = stat['qs'].filter(
-                created__lt=(day + datetime.timedelta(days=1)))
-        else:
-            # Otherwise, we want to filter by both start/end to get
-            # counts on a specific day.
-            date_filtered = stat['qs'].filter(
-                created__gte=day,
-                created__lt=(day + datetime.timedelta(days=1)))
-
-        data.extend([{
-            'key': key,
-            'recorded': day,
-            'user_hash': None,
-            'value': {'count': d.get(stat['field_map']['count']),
-                      'app-id': d.get(stat['field_map']['app-id'])}}
-            for d in date_filtered])
-
-    return data
+    days = list(daterange(start, end))
+    keys = dict((day, _cache_key(key, day)) for day in days)
+    cached = cache.get_many(keys.values())
+    values = dict((day, cached[keys[day]]) for day in days
+                  if keys[day] in cached)
+
+    missing = [day for day in days if day not in values]
+    if missing:
+        computed = _get_daily_values(
+            stat, missing[0], missing[-1] + datetime.timedelta(days=1))
+        values.update(computed)
+        cache.set_many(dict((keys[day], value)
+                            for day, value in computed.items()
+                            if day < today),
+                       settings.MONOLITH_STATS_CACHE_TIMEOUT)
+
+    return DailyStats(key, days, values)
 
 
 class MonolithView(CORSMixin, MarketplaceView, ListAPIView):
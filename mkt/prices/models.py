@@ -313,6 +313,35 @@ def add_uuid(sender, **kw):
             record.save()
 
 
+@receiver(models.signals.post_save, sender=AddonPurchase,
+          dispatch_uid='invalidate_purchase_cache')
+@receiver(models.signals.post_delete, sender=AddonPurchase,
+          dispatch_uid='invalidate_purchase_cache_delete')
+def invalidate_purchase_cache(sender, instance, **kw):
+    """
+    Clear the purchase from the receipt verification cache, so that refunds
+    and chargebacks are picked up by the verifier straight away.
+    """
+    if not kw.get('raw') and instance.uuid:
+        from services.cache import purchase_cache  # Circular import
+        purchase_cache.delete_app(instance.addon_id, instance.uuid)
+
+
+@receiver(models.signals.post_save, sender=Contribution,
+          dispatch_uid='invalidate_inapp_purchase_cache')
+def invalidate_inapp_purchase_cache(sender, instance, **kw):
+    """
+    Clear refunded or charged back in-app purchases from the receipt
+    verification cache.
+    """
+    if (not kw.get('raw') and
+            instance.type in [amo.CONTRIB_REFUND, amo.CONTRIB_CHARGEBACK]):
+        from services.cache import purchase_cache  # Circular import
+        purchase_cache.delete_inapp(instance.pk)
+        if instance.related_id:
+            purchase_cache.delete_inapp(instance.related_id)
+
+
 @write
 @receiver(models.signals.post_save, sender=Contribution,
           dispatch_uid='create_addon_purchase')
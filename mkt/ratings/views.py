@@ -20,6 +20,7 @@ from mkt.api.authorization import (AllowOwner, AllowRelatedAppOwner, AnyOf,
 from mkt.api.base import CORSMixin, MarketplaceView
 from mkt.ratings.serializers import RatingFlagSerializer, RatingSerializer
 from mkt.regions import get_region
+from mkt.reviewers.utils import invalidate_queue_counts
 from mkt.webapps.models import Webapp
 from mkt.ratings.models import Review, ReviewFlag
 
@@ -189,3 +190,4 @@ class RatingFlagViewSet(CORSMixin, CreateModelMixin, GenericViewSet):
     def post_save(self, obj, created=False):
         review = self.kwargs['review']
         Review.objects.filter(id=review).update(editorreview=True)
+        invalidate_queue_counts('moderated')
@@ -22,7 +22,7 @@ from mkt.purchase.models import Contribution
 from mkt.receipts.utils import create_receipt, create_receipt_data
 from mkt.site.fixtures import fixture
 from mkt.webapps.models import Addon
-from services import utils, verify
+from services import cache, utils, verify
 from mkt.users.models import UserProfile
 
 
@@ -37,6 +37,8 @@ class ReceiptTest(amo.tests.TestCase):
     fixtures = fixture('prices', 'webapp_337141', 'user_999')
 
     def setUp(self):
+        verify._verifiers.clear()
+        verify.purchase_cache.clear()
         self.app = Addon.objects.get(pk=337141)
         self.inapp = InAppProduct.objects.create(logo_url='image.png',
                                                  name='Kiwii',
@@ -264,6 +266,29 @@ class TestVerify(ReceiptTest):
             eq_(res['status'], 'refunded')
         eq_(log.call_count, 2)
 
+    def test_purchase_cached(self):
+        self.make_purchase()
+        eq_(self.verify_receipt_data(self.sample_app_receipt())['status'],
+            'ok')
+        with self.assertNumQueries(0):
+            res = self.verify_receipt_data(self.sample_app_receipt())
+        eq_(res['status'], 'ok')
+
+    def test_purchase_not_cached(self):
+        eq_(self.verify_receipt_data(self.sample_app_receipt())['reason'],
+            'NO_PURCHASE')
+        self.make_purchase()
+        eq_(self.verify_receipt_data(self.sample_app_receipt())['status'],
+            'ok')
+
+    def test_purchase_cache_refund(self):
+        purchase = self.make_purchase()
+        eq_(self.verify_receipt_data(self.sample_app_receipt())['status'],
+            'ok')
+        purchase.update(type=amo.CONTRIB_REFUND)
+        eq_(self.verify_receipt_data(self.sample_app_receipt())['status'],
+            'refunded')
+
     @mock.patch('services.verify.receipt_cef.log')
     def test_inapp_refund(self, log):
         for type in [amo.CONTRIB_REFUND, amo.CONTRIB_CHARGEBACK]:
@@ -351,12 +376,60 @@ class TestVerify(ReceiptTest):
     @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
     def test_crack_receipt_new_called(self, trunion_verify, settings):
         # Check that we can decode our receipt and get a dictionary back.
+        settings.SIGNING_VALID_ISSUERS = ['foo.com']
+        settings.SIGNING_VERIFIER_CACHE_TTL = 60
         self.app.update(type=amo.ADDON_WEBAPP, manifest_url='http://a.com')
         verify.decode_receipt(
             'jwt_public_key~' + create_receipt(
                 self.app, self.user, str(uuid.uuid4())))
         assert trunion_verify.called
 
+    @mock.patch('services.verify.settings')
+    @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
+    def test_verifier_cached(self, trunion_verify, settings):
+        settings.SIGNING_VALID_ISSUERS = ['foo.com']
+        settings.SIGNING_VERIFIER_CACHE_TTL = 60
+        receipt = 'jwt_public_key~' + create_receipt(
+            self.app, self.user, str(uuid.uuid4()))
+        eq_(verify.decode_receipt(receipt)['typ'], u'purchase-receipt')
+        eq_(verify.decode_receipt(receipt)['typ'], u'purchase-receipt')
+        eq_(trunion_verify.call_count, 1)
+        eq_(trunion_verify.return_value.verify.call_count, 2)
+
+    @mock.patch('services.verify.time')
+    @mock.patch('services.verify.settings')
+    @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
+    def test_verifier_refreshed(self, trunion_verify, settings, time_):
+        settings.SIGNING_VALID_ISSUERS = ['foo.com']
+        settings.SIGNING_VERIFIER_CACHE_TTL = 60
+        time_.return_value = 1000
+        verify.get_verifier()
+        time_.return_value = 1061
+        verify.get_verifier()
+        eq_(trunion_verify.call_count, 2)
+
+    @mock.patch('services.verify.settings')
+    @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
+    def test_crack_receipt_not_verified(self, trunion_verify, settings):
+        settings.SIGNING_VALID_ISSUERS = ['foo.com']
+        settings.SIGNING_VERIFIER_CACHE_TTL = 60
+        trunion_verify.return_value.verify.return_value = False
+        with self.assertRaises(verify.VerificationError):
+            verify.decode_receipt(
+                'jwt_public_key~' + create_receipt(
+                    self.app, self.user, str(uuid.uuid4())))
+
+    @mock.patch('services.verify.jwt.decode')
+    @mock.patch('services.verify.settings')
+    @mock.patch('services.verify.receipts.certs.ReceiptVerifier')
+    def test_crack_receipt_not_verified_not_decoded(self, trunion_verify,
+                                                    settings, decode):
+        settings.SIGNING_VALID_ISSUERS = ['foo.com']
+        settings.SIGNING_VERIFIER_CACHE_TTL = 60
+        trunion_verify.return_value.verify.return_value = False
+        eq_(verify.crack_receipt('cert~receipt'), (False, None))
+        assert not decode.called
+
     def test_crack_borked_receipt(self):
         self.app.update(type=amo.ADDON_WEBAPP, manifest_url='http://a.com')
         purchase = self.make_purchase()
@@ -383,6 +456,71 @@ class TestVerify(ReceiptTest):
         assert ('Cache-Control', 'no-cache') in hdrs, 'No cache header needed'
 
 
+@mock.patch.object(settings, 'SITE_URL', 'http://foo.com/')
+@mock.patch.object(settings, 'WEBAPPS_RECEIPT_URL', '/verifyme/')
+class TestBatchVerify(ReceiptTest):
+
+    def setUp(self):
+        super(TestBatchVerify, self).setUp()
+        AddonPurchase.objects.create(addon=self.app, user=self.user,
+                                     uuid='some-uuid')
+
+    @mock.patch.object(verify, 'decode_receipt')
+    def verify_batch(self, receipts, decode_receipt):
+        decode_receipt.side_effect = receipts
+        batch = verify.BatchVerify(
+            [''] * len(receipts),
+            RequestFactory().get('/verifyme/').META
+        )
+        batch.cursor = connection.cursor()
+        return batch.check_full()
+
+    def test_order(self):
+        not_purchased = create_receipt_data(self.app, self.user, 'nope')
+        no_user = self.sample_app_receipt()
+        del no_user['user']
+        res = self.verify_batch([not_purchased, self.sample_app_receipt(),
+                                 no_user])
+        eq_([r['status'] for r in res], ['invalid', 'ok', 'invalid'])
+        eq_(res[0]['reason'], 'NO_PURCHASE')
+        eq_(res[2]['reason'], 'NO_DIRECTED_IDENTIFIER')
+
+    def test_other_app(self):
+        # The purchase's uuid with another app isn't a purchase.
+        other = create_receipt_data(amo.tests.app_factory(), self.user,
+                                    'some-uuid')
+        res = self.verify_batch([other, self.sample_app_receipt()])
+        eq_([r['status'] for r in res], ['invalid', 'ok'])
+
+    def test_inapp(self):
+        contribution = Contribution.objects.create(
+            addon=self.app, inapp_product=self.inapp,
+            type=amo.CONTRIB_NO_CHARGE, user=self.user)
+        res = self.verify_batch([
+            self.sample_inapp_receipt(contribution),
+            create_receipt_data(self.app, self.user, 'nope')])
+        eq_([r['status'] for r in res], ['ok', 'invalid'])
+
+    def test_one_query_per_table(self):
+        contribution = Contribution.objects.create(
+            addon=self.app, inapp_product=self.inapp,
+            type=amo.CONTRIB_PURCHASE, user=self.user)
+        receipts = ([self.sample_app_receipt()] * 5 +
+                    [self.sample_inapp_receipt(contribution)] * 5)
+        with self.assertNumQueries(2):
+            res = self.verify_batch(receipts)
+        eq_([r['status'] for r in res], ['ok'] * 10)
+
+    def test_not_a_list(self):
+        with self.assertRaises(ValueError):
+            verify.BatchVerify({'receipt': 'foo'}, {})
+
+    @mock.patch.object(verify.settings, 'RECEIPT_BATCH_MAX', 2)
+    def test_too_many(self):
+        with self.assertRaises(ValueError):
+            verify.BatchVerify(['a', 'b', 'c'], {})
+
+
 class TestBase(amo.tests.TestCase):
 
     def create(self, data, request=None):
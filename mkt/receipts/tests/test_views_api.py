@@ -232,3 +232,47 @@ class TestReissue(amo.tests.TestCase):
         data = json.loads(res.content)
         ok_(data['receipt'])
         eq_(data['status'], 'expired')
+
+    @mock.patch('mkt.receipts.views.BatchVerify.check_full')
+    def test_batch(self, check_full):
+        receipts = [create_receipt(self.addon, self.user, 'some-uuid'),
+                    'bogus']
+        check_full.return_value = [{'status': 'expired'},
+                                   {'status': 'invalid',
+                                    'reason': 'NO_PURCHASE'}]
+        res = self.client.post(self.url, data=json.dumps(receipts),
+                               content_type='application/json')
+        eq_(res.status_code, 200)
+        data = json.loads(res.content)
+        eq_(len(data), 2)
+        ok_(data[0]['receipt'])
+        eq_(data[0]['status'], 'expired')
+        eq_(data[1], {'receipt': '', 'reason': 'NO_PURCHASE',
+                      'status': 'invalid'})
+
+    @mock.patch('mkt.receipts.views.reissue_receipts')
+    @mock.patch('mkt.receipts.views.BatchVerify.check_full')
+    def test_batch_signs_once(self, check_full, reissue_receipts):
+        check_full.return_value = [{'status': 'expired'},
+                                   {'status': 'valid'},
+                                   {'status': 'expired'}]
+        reissue_receipts.return_value = ['new-a', 'new-c']
+        res = self.client.post(self.url, data=json.dumps(['a', 'b', 'c']),
+                               content_type='application/json')
+        eq_(res.status_code, 200)
+        reissue_receipts.assert_called_once_with(['a', 'c'])
+        eq_([r['receipt'] for r in json.loads(res.content)],
+            ['new-a', '', 'new-c'])
+
+    def test_batch_not_list(self):
+        res = self.client.post(self.url, data='[not json',
+                               content_type='application/json')
+        eq_(res.status_code, 400)
+
+    @mock.patch('mkt.receipts.views.reissue_receipts')
+    @mock.patch('services.verify.settings.RECEIPT_BATCH_MAX', 2)
+    def test_batch_too_many(self, reissue_receipts):
+        res = self.client.post(self.url, data=json.dumps(['a', 'b', 'c']),
+                               content_type='application/json')
+        eq_(res.status_code, 400)
+        assert not reissue_receipts.called
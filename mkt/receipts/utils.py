@@ -43,6 +43,19 @@ def sign(data):
         return jwt.encode(data, get_key(), u'RS512')
 
 
+def sign_many(data):
+    """
+    Returns a list of signed receipts. If the seperate signing server is
+    present then they are all sent to it at once.
+
+    :params data: a list of the receipts to be signed.
+    """
+    if settings.SIGNING_SERVER_ACTIVE:
+        return receipt.sign_many(data)
+    else:
+        return [jwt.encode(d, get_key(), u'RS512') for d in data]
+
+
 def create_receipt(webapp, user, uuid, flavour=None, contrib=None):
     return sign(create_receipt_data(webapp, user, uuid, flavour=flavour,
                                     contrib=contrib))
@@ -127,11 +140,11 @@ def create_inapp_receipt(contrib):
                           flavour='inapp', contrib=contrib)
 
 
-def reissue_receipt(receipt):
+def reissue_data(receipt):
     """
-    Reissues and existing receipt by updating the timestamps and resigning
-    the receipt. This requires a well formatted receipt, but does not verify
-    the receipt contents.
+    Returns the contents of an existing receipt with updated timestamps,
+    ready to be signed again. This requires a well formatted receipt, but does
+    not verify the receipt contents.
 
     :params receipt: an existing receipt
     """
@@ -143,7 +156,27 @@ def reissue_receipt(receipt):
         'iat': time_,
         'nbf': time_,
     })
-    return sign(data)
+    return data
+
+
+def reissue_receipt(receipt):
+    """
+    Reissues and existing receipt by updating the timestamps and resigning
+    the receipt. This requires a well formatted receipt, but does not verify
+    the receipt contents.
+
+    :params receipt: an existing receipt
+    """
+    return sign(reissue_data(receipt))
+
+
+def reissue_receipts(receipts):
+    """
+    Reissues a list of existing receipts, signing them all at once.
+
+    :params receipts: a list of existing receipts
+    """
+    return sign_many([reissue_data(r) for r in receipts])
 
 
 @nottest
@@ -1,6 +1,7 @@
 import json
 
 from django import http
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404, render
@@ -32,12 +33,12 @@ from mkt.installs.utils import record as utils_record
 from mkt.prices.models import AddonPurchase
 from mkt.receipts import forms
 from mkt.receipts.utils import (create_receipt, create_test_receipt, get_uuid,
-                                reissue_receipt)
+                                reissue_receipt, reissue_receipts)
 from mkt.reviewers.views import reviewer_required
 from mkt.users.models import UserProfile
 from mkt.webapps.decorators import app_view_factory
 from mkt.webapps.models import Addon, Installed, Webapp
-from services.verify import get_headers, Verify
+from services.verify import BatchVerify, get_headers, Verify
 
 
 log = commonware.log.getLogger('z.receipts')
@@ -307,8 +308,14 @@ def reissue(request):
     """
     Reissues an existing receipt, provided from the client. Will only do
     so if the receipt is a full receipt and expired.
+
+    A JSON list of receipts is verified as a batch and the expired ones are
+    signed together, the results are returned as a list in the same order.
     """
     raw = request.read()
+    if raw.lstrip().startswith('['):
+        return reissue_batch(request, raw)
+
     verify = Verify(raw, request.META)
     output = verify.check_full()
 
@@ -323,3 +330,31 @@ def reissue(request):
     receipt_cef.log(request._request, None, 'sign', 'Receipt reissue signing')
     return Response({'reason': '', 'receipt': reissue_receipt(raw),
                      'status': 'expired'})
+
+
+def reissue_batch(request, raw):
+    try:
+        receipts = json.loads(raw)
+        outputs = BatchVerify(receipts, request.META).check_full()
+    except ValueError:
+        return Response({'error_message': 'Expected a list of at most %s '
+                                          'receipts' %
+                                          settings.RECEIPT_BATCH_MAX},
+                        status=400)
+
+    expired = []
+    for receipt, output in zip(receipts, outputs):
+        output['receipt'] = ''
+        if output['status'] == 'expired':
+            output['reason'] = ''
+            expired.append((receipt, output))
+        else:
+            log.info('Receipt not expired returned: {0}'.format(output))
+
+    if expired:
+        receipt_cef.log(request._request, None, 'sign',
+                        'Receipt reissue signing')
+        signed = reissue_receipts([receipt for receipt, output in expired])
+        for (receipt, output), new in zip(expired, signed):
+            output['receipt'] = new
+    return Response(outputs)
@@ -0,0 +1,17 @@
+import commonware.log
+import cronjobs
+
+from mkt.reviewers.utils import count_queues
+
+
+cron_log = commonware.log.getLogger('mkt.reviewers.cron')
+
+
+@cronjobs.register
+def reconcile_queue_counts():
+    """
+    Counts the reviewer queues again, correcting any counts that weren't
+    invalidated when the queues changed.
+    """
+    counts = count_queues()
+    cron_log.info('Reviewer queue counts: %s' % counts)
@@ -11,11 +11,14 @@ import amo.models
 import mkt.constants.comm as comm
 from amo.utils import cache_ns_key
 from mkt.comm.utils import create_comm_note
+from mkt.files.models import File
+from mkt.ratings.models import Review, ReviewFlag
 from mkt.tags.models import Tag
 from mkt.translations.fields import save_signal, TranslatedField
 from mkt.users.models import UserProfile
+from mkt.versions.models import Version
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import Addon
+from mkt.webapps.models import Addon, Geodata, Webapp
 
 
 user_log = commonware.log.getLogger('z.users')
@@ -444,3 +447,80 @@ def cleanup_queues(sender, instance, **kwargs):
 
 models.signals.post_delete.connect(cleanup_queues, sender=Addon,
                                    dispatch_uid='queue-addon-cleanup')
+
+
+def queue_counts_handler(queues=()):
+    """
+    Returns a signal handler that makes the counts of the queues, or all of
+    them if none are given, be counted again. See
+    `mkt.reviewers.utils.get_queue_counts`.
+    """
+    def handler(sender, instance=None, **kw):
+        if kw.get('raw'):
+            return
+        from mkt.reviewers.utils import invalidate_queue_counts
+        invalidate_queue_counts(*queues)
+    return handler
+
+
+# The queues that change when each model is saved or deleted.
+_queue_senders = (
+    (EscalationQueue, ('pending', 'rereview', 'updates', 'escalated',
+                       'region_cn')),
+    (RereviewQueue, ('rereview',)),
+    (AdditionalReview, ('additional_tarako',)),
+    (Review, ('moderated',)),
+    (ReviewFlag, ('moderated',)),
+    (Geodata, ('region_cn',)),
+)
+for model, queues in _queue_senders:
+    uid = 'queue-counts-%s' % model._meta.db_table
+    handler = queue_counts_handler(queues)
+    models.signals.post_save.connect(handler, sender=model, weak=False,
+                                     dispatch_uid=uid)
+    models.signals.post_delete.connect(handler, sender=model, weak=False,
+                                       dispatch_uid=uid)
+models.signals.post_delete.connect(queue_counts_handler(), sender=Addon,
+                                   weak=False, dispatch_uid='queue-counts-app')
+
+
+def file_queues_handler(sender, instance, created=True, **kw):
+    """Recount the updates queue when a pending file comes or goes."""
+    if not kw.get('raw') and created and instance.status == amo.STATUS_PENDING:
+        from mkt.reviewers.utils import invalidate_queue_counts
+        invalidate_queue_counts('updates')
+
+
+def version_queues_handler(sender, instance, **kw):
+    """Recount the updates queue when a version is deleted."""
+    if not kw.get('raw') and instance.deleted:
+        from mkt.reviewers.utils import invalidate_queue_counts
+        invalidate_queue_counts('updates')
+
+
+models.signals.post_save.connect(file_queues_handler, sender=File,
+                                 dispatch_uid='queue-counts-file')
+models.signals.post_delete.connect(file_queues_handler, sender=File,
+                                   dispatch_uid='queue-counts-file')
+models.signals.post_save.connect(version_queues_handler, sender=Version,
+                                 dispatch_uid='queue-counts-version')
+
+
+@File.on_change
+def watch_file_queues(old_attr={}, new_attr={}, instance=None, sender=None,
+                      **kw):
+    """Recount the updates queue when a file goes in or out of pending."""
+    old, new = old_attr.get('status'), new_attr.get('status')
+    if old != new and amo.STATUS_PENDING in (old, new):
+        from mkt.reviewers.utils import invalidate_queue_counts
+        invalidate_queue_counts('updates')
+
+
+@Webapp.on_change
+def watch_queues(old_attr={}, new_attr={}, instance=None, sender=None, **kw):
+    """Recount the queues when an app changes status."""
+    for attr in ('status', 'disabled_by_user', 'is_packaged'):
+        if attr in new_attr and old_attr.get(attr) != new_attr[attr]:
+            from mkt.reviewers.utils import invalidate_queue_counts
+            invalidate_queue_counts()
+            return
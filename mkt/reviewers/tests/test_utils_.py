@@ -1,7 +1,13 @@
 # -*- coding: utf8 -*-
-import amo.tests
+from nose.tools import eq_
 
-from mkt.reviewers.utils import create_sort_link
+import amo
+import amo.tests
+from mkt.reviewers.cron import reconcile_queue_counts
+from mkt.reviewers.models import EscalationQueue
+from mkt.reviewers.utils import (create_sort_link, get_queue_counts,
+                                 invalidate_queue_counts, QUEUES)
+from mkt.webapps.models import Webapp
 
 
 class TestCreateSortLink(amo.tests.TestCase):
@@ -43,3 +49,56 @@ class TestCreateSortLink(amo.tests.TestCase):
         assert 'sort=name' in link
         assert 'order=asc' in link
         assert 'text_query=Feliz+A%C3%B1o' in link
+
+
+class TestQueueCounts(amo.tests.TestCase):
+
+    def setUp(self):
+        self.app = amo.tests.app_factory(status=amo.STATUS_PENDING)
+        invalidate_queue_counts()
+
+    def test_counts(self):
+        counts = get_queue_counts()
+        eq_(sorted(counts.keys()), sorted(QUEUES))
+        eq_(counts['pending'], 1)
+
+    def test_cached(self):
+        get_queue_counts()
+        with self.assertNumQueries(0):
+            eq_(get_queue_counts()['pending'], 1)
+
+    def test_status_change(self):
+        get_queue_counts()
+        self.app.update(status=amo.STATUS_PUBLIC)
+        eq_(get_queue_counts()['pending'], 0)
+
+    def test_escalation(self):
+        get_queue_counts()
+        EscalationQueue.objects.create(addon=self.app)
+        counts = get_queue_counts()
+        eq_(counts['pending'], 0)
+        eq_(counts['escalated'], 1)
+
+    def test_file_status_change(self):
+        self.app.update(is_packaged=True, status=amo.STATUS_PUBLIC)
+        file_ = self.app.current_version.all_files[0]
+        file_.update(status=amo.STATUS_PENDING)
+        eq_(get_queue_counts()['updates'], 1)
+        file_.update(status=amo.STATUS_PUBLIC)
+        eq_(get_queue_counts()['updates'], 0)
+
+    def test_file_other_change(self):
+        file_ = self.app.current_version.all_files[0]
+        get_queue_counts()
+        file_.update(size=1)
+        with self.assertNumQueries(0):
+            get_queue_counts()
+
+    def test_reconcile(self):
+        get_queue_counts()
+        # Changes that don't send signals are picked up by the cron.
+        Webapp.objects.filter(pk=self.app.pk).update(
+            status=amo.STATUS_PUBLIC)
+        eq_(get_queue_counts()['pending'], 1)
+        reconcile_queue_counts()
+        eq_(get_queue_counts()['pending'], 0)
@@ -8,6 +8,7 @@ from os import path
 
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
@@ -43,6 +44,7 @@ from mkt.files.models import File
 from mkt.ratings.models import Review, ReviewFlag
 from mkt.reviewers.models import (CannedResponse, EscalationQueue,
                                   RereviewQueue, ReviewerScore)
+from mkt.reviewers.utils import set_viewing, viewing_key
 from mkt.reviewers.views import (_do_sort, _progress, app_review, queue_apps,
                                  route_reviewer)
 from mkt.site.fixtures import fixture
@@ -244,6 +246,13 @@ class TestReviewersHome(AppReviewerTest, AccessMixin):
         self.assertAlmostEqual(percentages['updates']['old'], 33.333333333333)
         self.assertAlmostEqual(percentages['updates']['med'], 33.333333333333)
 
+    def test_progress_queries(self):
+        # One query per queue, then the result is cached.
+        with self.assertNumQueries(4):
+            _progress()
+        with self.assertNumQueries(0):
+            _progress()
+
     def test_stats_waiting(self):
         self.apps[0].latest_version.update(nomination=self.days_ago(1))
         self.apps[1].latest_version.update(nomination=self.days_ago(5))
@@ -399,6 +408,24 @@ class TestAppQueue(AppReviewerTest, AccessMixin, FlagsMixin, SearchMixin,
         eq_(self.client.post(reverse('reviewers.queue_viewing')).status_code,
             200)
 
+    def test_queue_viewing(self):
+        other = user_factory(display_name='Other reviewer')
+        editor = UserProfile.objects.get(username='editor')
+        set_viewing(self.apps[0].id, other)
+        set_viewing(self.apps[1].id, editor)
+        res = self.client.post(reverse('reviewers.queue_viewing'), {
+            'addon_ids': ','.join(str(app.id) for app in self.apps)})
+        eq_(res.status_code, 200)
+        eq_(json.loads(res.content), {str(self.apps[0].id): 'Other reviewer'})
+
+    def test_queue_viewing_user_id(self):
+        # Locks that only hold the user id still show the name.
+        other = user_factory(display_name='Other reviewer')
+        cache.set(viewing_key(self.apps[0].id), other.id, 100)
+        res = self.client.post(reverse('reviewers.queue_viewing'), {
+            'addon_ids': str(self.apps[0].id)})
+        eq_(json.loads(res.content), {str(self.apps[0].id): 'Other reviewer'})
+
     def test_template_links(self):
         r = self.client.get(self.url)
         eq_(r.status_code, 200)
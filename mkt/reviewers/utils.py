@@ -6,13 +6,16 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.utils import translation
+from django.db.models import Q
 from django.utils.datastructures import SortedDict
 
 import commonware.log
 import waffle
+from django_statsd.clients import statsd
 from tower import ugettext_lazy as _lazy
 
 import amo
+import mkt
 from amo.helpers import absolutify
 from amo.utils import JSONEncoder, to_language
 from mkt.access import acl
@@ -20,9 +23,12 @@ from mkt.comm.utils import create_comm_note
 from mkt.constants import comm
 from mkt.constants.features import FeatureProfile
 from mkt.files.models import File
-from mkt.reviewers.models import EscalationQueue, RereviewQueue, ReviewerScore
+from mkt.ratings.models import Review
+from mkt.reviewers.models import (AdditionalReview, EscalationQueue,
+                                  QUEUE_TARAKO, RereviewQueue, ReviewerScore)
 from mkt.site.helpers import product_as_dict
 from mkt.site.mail import send_mail_jinja
+from mkt.users.models import UserProfile
 from mkt.webapps.models import Webapp
 from mkt.webapps.tasks import set_storefront_data
 
@@ -597,6 +603,45 @@ def create_sort_link(pretty_name, sort_field, get_params, sort, order):
                                         url_class, pretty_name)
 
 
+def viewing_key(addon_id):
+    return '%s:review_viewing:%s' % (settings.CACHE_PREFIX, addon_id)
+
+
+def set_viewing(addon_id, user):
+    """
+    Marks `user` as viewing the app. The lock holds the user's name as well
+    as their id so that nobody has to look the user up to show who has it.
+    """
+    # We want to save it for twice as long as the ping interval,
+    # just to account for latency and the like.
+    cache.set(viewing_key(addon_id), (user.id, user.name),
+              amo.EDITOR_VIEWING_INTERVAL * 2)
+
+
+def get_viewing(addon_ids):
+    """
+    Returns a dict of addon id to the (user id, name) of whoever is viewing
+    it, for the apps in `addon_ids` that somebody is viewing. The whole page
+    is read from the cache at once.
+    """
+    keys = dict((viewing_key(addon_id), addon_id) for addon_id in addon_ids)
+    viewing = dict((keys[key], value)
+                   for key, value in cache.get_many(keys.keys()).items()
+                   if value)
+
+    # Locks set before the name was stored with them only hold the user id.
+    old = dict((addon_id, value) for addon_id, value in viewing.items()
+               if not isinstance(value, (list, tuple)))
+    if old:
+        names = dict((user.id, user.name) for user in
+                     UserProfile.objects.filter(id__in=set(old.values())))
+        for addon_id, user_id in old.items():
+            viewing[addon_id] = (user_id, names.get(user_id, u''))
+
+    return dict((addon_id, tuple(value))
+                for addon_id, value in viewing.items())
+
+
 class AppsReviewing(object):
     """
     Class to manage the list of apps a reviewer is currently reviewing.
@@ -613,11 +658,9 @@ class AppsReviewing(object):
         ids = []
         my_apps = cache.get(self.key)
         if my_apps:
-            for id in my_apps.split(','):
-                valid = cache.get(
-                    '%s:review_viewing:%s' % (settings.CACHE_PREFIX, id))
-                if valid and valid == self.user_id:
-                    ids.append(id)
+            viewing = get_viewing(my_apps.split(','))
+            ids = [id for id, (user_id, name) in viewing.items()
+                   if user_id == self.user_id]
 
         apps = []
         for app in Webapp.objects.filter(id__in=ids):
@@ -660,6 +703,87 @@ def device_queue_search(request):
         Webapp.objects.filter(**filters))
 
 
+# The reviewer queues whose counts are kept in the cache.
+QUEUES = ('pending', 'rereview', 'updates', 'escalated', 'moderated',
+          'region_cn', 'additional_tarako')
+
+
+def queue_querysets():
+    """Returns the queryset of the apps in each reviewer queue."""
+    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
+                                                                  flat=True)
+    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
+
+    return {
+        'pending': Webapp.objects.no_cache()
+                         .exclude(id__in=excluded_ids)
+                         .filter(type=amo.ADDON_WEBAPP,
+                                 disabled_by_user=False,
+                                 status=amo.STATUS_PENDING),
+        'rereview': (RereviewQueue.objects.no_cache()
+                                  .exclude(addon__in=excluded_ids)
+                                  .filter(addon__disabled_by_user=False)),
+        # This will work as long as we disable files of existing unreviewed
+        # versions when a new version is uploaded.
+        'updates': File.objects.no_cache()
+                       .exclude(version__addon__id__in=excluded_ids)
+                       .filter(version__addon__type=amo.ADDON_WEBAPP,
+                               version__addon__disabled_by_user=False,
+                               version__addon__is_packaged=True,
+                               version__addon__status__in=public_statuses,
+                               version__deleted=False,
+                               status=amo.STATUS_PENDING),
+        'escalated': EscalationQueue.objects.no_cache()
+                                    .filter(addon__disabled_by_user=False),
+        'moderated': Review.objects.no_cache()
+                           .exclude(Q(addon__isnull=True) |
+                                    Q(reviewflag__isnull=True))
+                           .exclude(addon__status=amo.STATUS_DELETED)
+                           .filter(addon__type=amo.ADDON_WEBAPP,
+                                   editorreview=True),
+        'region_cn': Webapp.objects.pending_in_region(mkt.regions.CN),
+        'additional_tarako': (
+            AdditionalReview.objects
+                            .unreviewed(queue=QUEUE_TARAKO)),
+    }
+
+
+def queue_count_key(queue):
+    return 'reviewers:queue_count:%s' % queue
+
+
+def get_queue_counts():
+    """
+    Returns the number of apps in each reviewer queue from the cache. Only
+    the queues that changed since they were last counted are counted again.
+    """
+    keys = dict((queue_count_key(queue), queue) for queue in QUEUES)
+    counts = dict((keys[key], count)
+                  for key, count in cache.get_many(keys.keys()).items())
+    missing = [queue for queue in QUEUES if queue not in counts]
+    statsd.incr('reviewers.queue_counts.hit', len(QUEUES) - len(missing))
+    if missing:
+        statsd.incr('reviewers.queue_counts.miss', len(missing))
+        counts.update(count_queues(missing))
+    return counts
+
+
+def count_queues(queues=QUEUES):
+    """Counts the apps in the queues and stores the counts in the cache."""
+    querysets = queue_querysets()
+    counts = dict((queue, querysets[queue].count()) for queue in queues)
+    cache.set_many(dict((queue_count_key(queue), count)
+                        for queue, count in counts.items()),
+                   settings.REVIEWER_QUEUE_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_queue_counts(*queues):
+    """Forgets the counts of the queues, or all of them if none are given,
+    so that they are counted again the next time they are read."""
+    cache.delete_many([queue_count_key(queue) for queue in queues or QUEUES])
+
+
 def log_reviewer_action(addon, user, msg, action, **kwargs):
     create_comm_note(addon, addon.latest_version, user, msg,
                      note_type=comm.ACTION_MAP(action.id))
@@ -14,16 +14,18 @@ from django.contrib import messages
 from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Count, Q
 from django.db.models.signals import post_save
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.datastructures import SortedDict
 from django.views.decorators.cache import never_cache
 
 import commonware.log
 import jinja2
 import requests
-from cache_nuggets.lib import Token
+from cache_nuggets.lib import memoize, Token
+from django_statsd.clients import statsd
 from elasticsearch_dsl.filter import F
 from rest_framework import serializers
 from rest_framework.exceptions import ParseError
@@ -64,7 +66,9 @@ from mkt.reviewers.models import (AdditionalReview, EditorSubscription,
 from mkt.reviewers.serializers import (ReviewersESAppSerializer,
                                        ReviewingSerializer)
 from mkt.reviewers.utils import (AppsReviewing, clean_sort_param,
-                                 device_queue_search, log_reviewer_action)
+                                 device_queue_search, get_queue_counts,
+                                 get_viewing, invalidate_queue_counts,
+                                 log_reviewer_action, set_viewing)
 from mkt.search.views import SearchView
 from mkt.site.helpers import product_as_dict
 from mkt.submit.forms import AppFeaturesForm
@@ -142,48 +146,7 @@ def home(request):
 
 
 def queue_counts(request):
-    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
-                                                                  flat=True)
-    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
-
-    counts = {
-        'pending': Webapp.objects.no_cache()
-                         .exclude(id__in=excluded_ids)
-                         .filter(type=amo.ADDON_WEBAPP,
-                                 disabled_by_user=False,
-                                 status=amo.STATUS_PENDING)
-                         .count(),
-        'rereview': (RereviewQueue.objects.no_cache()
-                                  .exclude(addon__in=excluded_ids)
-                                  .filter(addon__disabled_by_user=False)
-                                  .count()),
-        # This will work as long as we disable files of existing unreviewed
-        # versions when a new version is uploaded.
-        'updates': File.objects.no_cache()
-                       .exclude(version__addon__id__in=excluded_ids)
-                       .filter(version__addon__type=amo.ADDON_WEBAPP,
-                               version__addon__disabled_by_user=False,
-                               version__addon__is_packaged=True,
-                               version__addon__status__in=public_statuses,
-                               version__deleted=False,
-                               status=amo.STATUS_PENDING)
-                       .count(),
-        'escalated': EscalationQueue.objects.no_cache()
-                                    .filter(addon__disabled_by_user=False)
-                                    .count(),
-        'moderated': Review.objects.no_cache()
-                           .exclude(Q(addon__isnull=True) |
-                                    Q(reviewflag__isnull=True))
-                           .exclude(addon__status=amo.STATUS_DELETED)
-                           .filter(addon__type=amo.ADDON_WEBAPP,
-                                   editorreview=True)
-                           .count(),
-        'region_cn': Webapp.objects.pending_in_region(mkt.regions.CN).count(),
-        'additional_tarako': (
-            AdditionalReview.objects
-                            .unreviewed(queue=QUEUE_TARAKO)
-                            .count()),
-    }
+    counts = get_queue_counts()
 
     if 'pro' in request.GET:
         counts.update({'device': device_queue_search(request).count()})
@@ -197,14 +160,18 @@ def queue_counts(request):
     return rv
 
 
+@memoize(prefix='reviewers-progress',
+         time=settings.REVIEWER_PROGRESS_TIMEOUT)
 def _progress():
     """Returns unreviewed apps progress.
 
     Return the number of apps still unreviewed for a given period of time and
-    the percentage.
+    the percentage. The apps in each queue are counted into the periods
+    with one query.
     """
 
-    days_ago = lambda n: datetime.datetime.now() - datetime.timedelta(days=n)
+    now = datetime.datetime.now()
+    days_ago = lambda n: now - datetime.timedelta(days=n)
     excluded_ids = EscalationQueue.objects.values_list('addon', flat=True)
     public_statuses = amo.WEBAPPS_APPROVED_STATUSES
 
@@ -233,25 +200,37 @@ def _progress():
                     'version__nomination')
     }
 
-    operators_and_values = {
-        'new': ('gt', days_ago(5)),
-        'med': ('range', (days_ago(10), days_ago(5))),
-        'old': ('lt', days_ago(10)),
-        'week': ('gte', days_ago(7))
-    }
+    # The condition on the date for each period, and its parameters.
+    periods = SortedDict([
+        ('new', ('{0} > %s', [days_ago(5)])),
+        ('med', ('{0} BETWEEN %s AND %s', [days_ago(10), days_ago(5)])),
+        ('old', ('{0} < %s', [days_ago(10)])),
+        ('week', ('{0} >= %s', [days_ago(7)])),
+    ])
 
     types = base_filters.keys()
     progress = {}
 
-    for t in types:
-        tmp = {}
-        base_query, field = base_filters[t]
-        for k in operators_and_values.keys():
-            operator, value = operators_and_values[k]
-            filter_ = {}
-            filter_['%s__%s' % (field, operator)] = value
-            tmp[k] = base_query.filter(**filter_).count()
-        progress[t] = tmp
+    with statsd.timer('reviewers.progress'):
+        cursor = connection.cursor()
+        for t in types:
+            base_query, field = base_filters[t]
+            sql, params = (base_query.no_cache().order_by()
+                                     .values_list(field, flat=True)
+                                     .query.sql_with_params())
+            # The dates are the only column of the queue's query.
+            column = connection.ops.quote_name(field.rpartition('__')[2])
+            sums, sum_params = [], []
+            for condition, condition_params in periods.values():
+                sums.append('SUM(CASE WHEN %s THEN 1 ELSE 0 END)' %
+                            condition.format(column))
+                sum_params.extend(condition_params)
+            cursor.execute('SELECT %s FROM (%s) AS dates' %
+                           (', '.join(sums), sql),
+                           sum_params + list(params))
+            progress[t] = dict((k, int(count or 0)) for k, count in
+                               zip(periods.keys(), cursor.fetchone()))
+    statsd.incr('reviewers.progress.queries', len(types))
 
     # Return the percent of (p)rogress out of (t)otal.
     pct = lambda p, t: (p / float(t)) * 100 if p > 0 else 0
@@ -491,6 +470,9 @@ def app_review(request, addon):
                 raise
             else:
                 transaction.commit()
+            # The review updates the app and its files without signals, so
+            # the queues have to be counted again.
+            invalidate_queue_counts()
         if resp:
             return resp
         raise
@@ -1326,24 +1308,19 @@ def review_viewing(request):
 
     addon_id = request.POST['addon_id']
     user_id = request.user.id
-    current_name = ''
     is_user = 0
-    key = '%s:review_viewing:%s' % (settings.CACHE_PREFIX, addon_id)
     interval = amo.EDITOR_VIEWING_INTERVAL
 
     # Check who is viewing.
-    currently_viewing = cache.get(key)
+    currently_viewing, current_name = get_viewing([addon_id]).get(
+        addon_id, (None, ''))
 
     # If nobody is viewing or current user is, set current user as viewing
     if not currently_viewing or currently_viewing == user_id:
-        # We want to save it for twice as long as the ping interval,
-        # just to account for latency and the like.
-        cache.set(key, user_id, interval * 2)
+        set_viewing(addon_id, request.user)
         currently_viewing = user_id
         current_name = request.user.name
         is_user = 1
-    else:
-        current_name = UserProfile.objects.get(pk=currently_viewing).name
 
     AppsReviewing(request).add(addon_id)
 
@@ -1358,16 +1335,10 @@ def queue_viewing(request):
     if 'addon_ids' not in request.POST:
         return {}
 
-    viewing = {}
     user_id = request.user.id
-
-    for addon_id in request.POST['addon_ids'].split(','):
-        addon_id = addon_id.strip()
-        key = '%s:review_viewing:%s' % (settings.CACHE_PREFIX, addon_id)
-        currently_viewing = cache.get(key)
-        if currently_viewing and currently_viewing != user_id:
-            viewing[addon_id] = (UserProfile.objects
-                                            .get(id=currently_viewing)
-                                            .display_name)
+    addon_ids = [addon_id.strip()
+                 for addon_id in request.POST['addon_ids'].split(',')]
+    viewing = dict((addon_id, name) for addon_id, (viewer, name)
+                   in get_viewing(addon_ids).items() if viewer != user_id)
 
     return viewing
@@ -1,5 +1,6 @@
 import logging
 import sys
+from collections import OrderedDict
 
 from django.conf import settings
 
@@ -10,6 +11,7 @@ from elasticsearch_dsl import Search
 
 import amo
 from amo.decorators import write
+from lib.es import connections
 from lib.es.models import Reindexing
 from lib.post_request_task.task import task as post_request_task
 
@@ -26,47 +28,22 @@ class BaseIndexer(object):
     - extract_document(cls, pk=None, obj=None)
 
     """
-    _es = {}
-
-    @classmethod
-    def _key(cls, es_settings):
-        """
-        Create a hashed key based on settings.
-
-        This allows us to cache Elasticsearch objects based on settings.
-
-        """
-        es_settings = sorted(es_settings.items(), key=lambda item: item[0])
-        es_settings = repr([(k, v) for k, v in es_settings])
-        return tuple(es_settings)
-
     @classmethod
-    def get_es(cls, **overrides):
+    def get_es(cls, use='search', **overrides):
         """
-        Returns an Elasticsearch object using Django settings.
+        Returns the shared Elasticsearch client for `use`, see
+        `lib.es.connections.get_es`.
 
-        We override elasticutil's `get_es` because we're using the official
-        elasticsearch client library.
+        Searches use the default `search` client, indexing should ask for the
+        `indexing` one.
 
         """
-        defaults = {
-            'hosts': settings.ES_HOSTS,
-            'timeout': getattr(settings, 'ES_TIMEOUT', 10),
-        }
-        defaults.update(overrides)
-
-        key = cls._key(defaults)
-        if key in cls._es:
-            return cls._es[key]
-
-        es = elasticsearch.Elasticsearch(**defaults)
-        cls._es[key] = es
-        return es
+        return connections.get_es(use, **overrides)
 
     @classmethod
     def index(cls, document, id_=None, es=None, index=None):
         """Index one document."""
-        es = es or cls.get_es()
+        es = es or cls.get_es('indexing')
         index = index or cls.get_index()
         es.index(index=index, doc_type=cls.get_mapping_type_name(),
                  body=document, id=id_)
@@ -74,7 +51,7 @@ class BaseIndexer(object):
     @classmethod
     def bulk_index(cls, documents, id_field='id', es=None, index=None):
         """Index of a bunch of documents."""
-        es = es or cls.get_es()
+        es = es or cls.get_es('indexing')
         index = index or cls.get_index()
         type = cls.get_mapping_type_name()
 
@@ -84,6 +61,24 @@ class BaseIndexer(object):
 
         helpers.bulk(es, actions)
 
+    @classmethod
+    def extract_documents(cls, objs):
+        """
+        Extracts the documents for a list of objects. Returns a list of
+        (obj, document or exception) tuples, so that one broken object doesn't
+        stop the others from being indexed.
+
+        Indexers can override this to load related data for all the objects
+        at once.
+        """
+        docs = []
+        for obj in objs:
+            try:
+                docs.append((obj, cls.extract_document(obj.id, obj)))
+            except Exception as e:
+                docs.append((obj, e))
+        return docs
+
     @classmethod
     def index_ids(cls, ids, no_delay=False):
         """
@@ -100,9 +95,17 @@ class BaseIndexer(object):
         """
         Remove a document from the index.
         """
-        es = es or cls.get_es()
+        es = es or cls.get_es('indexing')
         index = index or cls.get_index()
         es.delete(index=index, doc_type=cls.get_mapping_type_name(), id=id_)
+        cls.indexed([id_])
+
+    @classmethod
+    def indexed(cls, ids):
+        """
+        Called once the documents for these IDs have been indexed or
+        unindexed, for indexers that need to clear caches.
+        """
 
     @classmethod
     def refresh_index(cls, es=None, index=None):
@@ -225,7 +228,7 @@ class BaseIndexer(object):
     @classmethod
     def setup_mapping(cls):
         """Creates the ES index/mapping."""
-        cls.get_es().indices.create(
+        cls.get_es('indexing').indices.create(
             index=cls.get_index(), body={'mappings': cls.get_mapping(),
                                          'settings': cls.get_settings()})
 
@@ -263,7 +266,7 @@ class BaseIndexer(object):
         # more than one index.
         indices = Reindexing.get_indices(index)
 
-        es = cls.get_es(urls=settings.ES_URLS)
+        es = cls.get_es('indexing')
         for id_ in ids:
             for idx in indices:
                 try:
@@ -316,21 +319,43 @@ class BaseIndexer(object):
         return mapping
 
 
-@post_request_task(acks_late=True)
+@post_request_task(acks_late=True, merge_arg=0)
 @write
 def index(ids, indexer, **kw):
     """
     Given a list of IDs and an indexer, index into ES.
     If an reindexation is currently occurring, index on both the old and new.
+
+    The calls queued up during a request or task are merged into one, and
+    all the documents are sent to ES in one bulk request.
     """
+    ids = list(OrderedDict.fromkeys(ids))
     task_log.info('Indexing {0} {1}-{2}. [{3}]'.format(
         indexer.get_model()._meta.model_name, ids[0], ids[-1], len(ids)))
 
     # If reindexing is currently occurring, index on both old and new indexes.
     indices = Reindexing.get_indices(indexer.get_index())
-
-    es = indexer.get_es(urls=settings.ES_URLS)
-    for obj in indexer.get_indexable().filter(id__in=ids):
-        doc = indexer.extract_document(obj.id, obj)
-        for idx in indices:
-            indexer.index(doc, id_=obj.id, es=es, index=idx)
+    doc_type = indexer.get_mapping_type_name()
+
+    actions = []
+    for obj, doc in indexer.extract_documents(
+            indexer.get_indexable().filter(id__in=ids)):
+        if isinstance(doc, Exception):
+            task_log.error(u'[{0}:{1}] failed to extract document: {2}'
+                           .format(doc_type, obj.id, doc))
+            continue
+        actions.extend({'_index': idx, '_type': doc_type, '_id': obj.id,
+                        '_source': doc} for idx in indices)
+
+    if not actions:
+        return
+
+    es = indexer.get_es('indexing')
+    success, errors = helpers.bulk(es, actions, raise_on_error=False)
+    for error in errors:
+        # Each error is keyed on the action, which is `index` here.
+        for result in error.values():
+            task_log.error(u'[{0}:{1}] failed to index into {2}: {3}'.format(
+                doc_type, result.get('_id'), result.get('_index'),
+                result.get('error')))
+    indexer.indexed(ids)
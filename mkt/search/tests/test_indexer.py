@@ -1,7 +1,11 @@
+import mock
 from nose.tools import eq_
 
 import amo
-from mkt.search.indexers import BaseIndexer
+from mkt.search.indexers import BaseIndexer, index
+from mkt.site.fixtures import fixture
+from mkt.webapps.indexers import WebappIndexer
+from mkt.webapps.models import Webapp
 
 
 class TestBaseIndexer(amo.tests.TestCase):
@@ -13,3 +17,31 @@ class TestBaseIndexer(amo.tests.TestCase):
         es1 = self.indexer().get_es()
         es2 = self.indexer().get_es()
         eq_(id(es1), id(es2))
+
+
+class TestIndex(amo.tests.TestCase):
+    fixtures = fixture('webapp_337141')
+
+    def setUp(self):
+        self.app = Webapp.objects.get(pk=337141)
+
+    @mock.patch('mkt.search.indexers.helpers.bulk')
+    @mock.patch('mkt.search.indexers.Reindexing.get_indices')
+    def test_bulk(self, get_indices, bulk):
+        get_indices.return_value = ['old', 'new']
+        bulk.return_value = (2, [])
+        index([self.app.pk, self.app.pk], WebappIndexer)
+        eq_(bulk.call_count, 1)
+        actions = bulk.call_args[0][1]
+        eq_([(a['_index'], a['_id']) for a in actions],
+            [('old', self.app.pk), ('new', self.app.pk)])
+
+    @mock.patch('mkt.search.indexers.task_log')
+    @mock.patch('mkt.search.indexers.helpers.bulk')
+    def test_bulk_errors(self, bulk, task_log):
+        bulk.return_value = (0, [{'index': {'_id': self.app.pk,
+                                            '_index': 'apps',
+                                            'error': 'Boom'}}])
+        index([self.app.pk], WebappIndexer)
+        eq_(task_log.error.call_count, 1)
+        assert 'Boom' in task_log.error.call_args[0][0]
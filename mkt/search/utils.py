@@ -1,3 +1,5 @@
+from elasticsearch import TransportError
+from elasticsearch_dsl.result import Response
 from elasticsearch_dsl.search import Search as dslSearch
 from statsd import statsd
 
@@ -9,3 +11,65 @@ class Search(dslSearch):
             results = super(Search, self).execute()
             statsd.timing('search.took', results.took)
             return results
+
+
+class MultiSearch(object):
+    """
+    Sends several searches on the same index to ES in a single msearch
+    request.
+
+    Each `multi[n]` stands in for the nth search and can be given to the
+    ESPaginator: slicing it picks the page to fetch from every search, and
+    the first one executed fetches them all.
+    """
+
+    def __init__(self, es, index, doc_type, searches):
+        self.es = es
+        self.index = index
+        self.doc_type = doc_type
+        self.searches = list(searches)
+        self._slice = None
+        self._responses = None
+
+    def __getitem__(self, n):
+        return PendingSearch(self, n)
+
+    def slice(self, k):
+        if k != self._slice:
+            self._slice = k
+            self._responses = None
+
+    def execute(self):
+        if self._responses is None:
+            body = []
+            for sq in self.searches:
+                if self._slice is not None:
+                    sq = sq[self._slice]
+                body += [{'index': self.index, 'type': self.doc_type},
+                         sq.to_dict()]
+
+            with statsd.timer('search.msearch'):
+                results = self.es.msearch(body=body)
+
+            self._responses = []
+            for result in results['responses']:
+                if 'error' in result:
+                    raise TransportError(500, result['error'])
+                statsd.timing('search.took', result['took'])
+                self._responses.append(Response(result))
+        return self._responses
+
+
+class PendingSearch(object):
+    """One of the searches of a MultiSearch."""
+
+    def __init__(self, multi, n):
+        self.multi = multi
+        self.n = n
+
+    def __getitem__(self, k):
+        self.multi.slice(k)
+        return self
+
+    def execute(self):
+        return self.multi.execute()[self.n]
@@ -470,6 +470,11 @@ LANGUAGES = lazy(langs, dict)(AMO_LANGUAGES)
 # than this will include the `API-Status: Deprecated` header.
 API_CURRENT_VERSION = 1
 
+# Number of seconds the user id and groups behind an OAuth key are cached, to
+# save looking them up on every API request. They are forgotten straight away
+# when the key or the user's groups change.
+API_OAUTH_PRINCIPAL_CACHE_TIMEOUT = 60
+
 # When True, the API will return a full traceback when an exception occurs.
 API_SHOW_TRACEBACKS = False
 
@@ -533,6 +538,15 @@ BROWSERID_AUDIENCES = [SITE_URL]
 # it's not possible to invalidate these queries.
 CACHE_COUNT_TIMEOUT = 60
 
+# Number of seconds the consumer feed responses are served from the cache,
+# editing the feed makes them stale straight away. While a stale response is
+# being rebuilt, it's served to the other requests for up to
+# CACHE_FEED_STALE_TIMEOUT seconds and they wait CACHE_FEED_REBUILD_TIMEOUT
+# seconds before trying to rebuild it themselves.
+CACHE_FEED_REBUILD_TIMEOUT = 30
+CACHE_FEED_STALE_TIMEOUT = 60 * 60 * 24
+CACHE_FEED_TIMEOUT = 60 * 5
+
 # A Django cache machine setting, that hasn't been updated to use the
 # new PREFIX in the CACHE settings.
 CACHE_PREFIX = 'marketplace:%s' % build_id
@@ -698,6 +712,24 @@ ES_URLS = ['http://%s' % h for h in ES_HOSTS]
 ES_USE_PLUGINS = False
 ES_TIMEOUT = 30
 
+# Settings for the Elasticsearch clients of each use, on top of the ones
+# below. These are passed on to elasticsearch.Elasticsearch, see
+# lib.es.connections.
+ES_CONNECTIONS = {
+    # Searches are done while a page waits on them.
+    'search': {'timeout': 10},
+    # Bulk indexing sends a lot of documents at once.
+    'indexing': {'timeout': 60 * 2},
+}
+# How many HTTP connections each client keeps open to each host.
+ES_POOL_MAXSIZE = 10
+# How long, in seconds, a host that failed is left alone before trying again.
+ES_DEAD_TIMEOUT = 60
+# Whether to ask the cluster for its nodes when a connection fails and every
+# ES_SNIFF_INTERVAL seconds, rather than only using ES_HOSTS.
+ES_SNIFF = False
+ES_SNIFF_INTERVAL = 60 * 5
+
 # When True include full tracebacks in JSON. This is useful for QA on preview.
 EXPOSE_VALIDATOR_TRACEBACKS = True
 
@@ -919,6 +951,17 @@ MINIFY_MOZMARKET = True
 MONOLITH_SERVER = None
 MONOLITH_INDEX = 'time_*'
 MONOLITH_MAX_DATE_RANGE = 365
+# The monolith records are saved in bulk, once this many have been collected
+# or the oldest is this many seconds old.
+MONOLITH_BUFFER_SIZE = 100
+MONOLITH_BUFFER_TIMEOUT = 60
+# How many records to keep while saving them fails, older ones are dropped.
+MONOLITH_BUFFER_MAX = 1000
+# How many connections to keep open to monolith, and how long to wait for it.
+MONOLITH_POOL_MAXSIZE = 10
+MONOLITH_TIMEOUT = 10
+# How long to cache the on-the-fly stats of past days.
+MONOLITH_STATS_CACHE_TIMEOUT = 60 * 60 * 24 * 30
 
 # The issuer for unverified Persona email addresses.
 # We only trust one issuer to grant us unverified emails.
@@ -981,6 +1024,9 @@ PRODUCT_ICON_EXPIRY = 1
 # Read-only mode setup.
 READ_ONLY = False
 
+# The most receipts that can be verified or reissued in one batch.
+RECEIPT_BATCH_MAX = 100
+
 # Outgoing URL bouncer
 REDIRECT_URL = 'http://outgoing.mozilla.org/v1/'
 REDIRECT_SECRET_KEY = ''
@@ -990,6 +1036,14 @@ REDIS_BACKENDS = {'master': 'redis://localhost:6379?socket_timeout=0.5'}
 # Allow URLs from these servers. Use full domain names.
 REDIRECT_URL_WHITELIST = ['addons.mozilla.org']
 
+# How long to keep the progress of the reviewer queues shown on the reviewer
+# home page.
+REVIEWER_PROGRESS_TIMEOUT = 60
+
+# How long to keep the counts of the reviewer queues. They are counted again
+# sooner when the queues change, and by the reconcile_queue_counts cron.
+REVIEWER_QUEUE_COUNTS_TIMEOUT = 60 * 60
+
 REST_FRAMEWORK = {
     'DEFAULT_MODEL_SERIALIZER_CLASS':
         'rest_framework.serializers.HyperlinkedModelSerializer',
@@ -1043,6 +1097,26 @@ SERVICES_DATABASE = {
     'HOST': '',
 }
 
+# The connection pool used by the services scripts. SERVICES_DATABASE_POOL_SIZE
+# connections are kept open, up to SERVICES_DATABASE_POOL_OVERFLOW more are
+# opened when busy and requests wait at most SERVICES_DATABASE_POOL_TIMEOUT
+# seconds for a connection before failing. When serving with gevent these
+# should be raised to match the number of concurrent requests.
+SERVICES_DATABASE_POOL_OVERFLOW = 10
+SERVICES_DATABASE_POOL_SIZE = 5
+SERVICES_DATABASE_POOL_TIMEOUT = 30
+
+# How long, in seconds, the receipt verification service caches purchase
+# lookups in memcache. The marketplace clears these entries on refunds and
+# chargebacks.
+SERVICES_PURCHASE_CACHE_TIMEOUT = 60 * 5
+
+# How long, in seconds, and how many purchase lookups each receipt
+# verification process caches in memory. These can't be cleared by the
+# marketplace so keep the timeout short.
+SERVICES_PURCHASE_CACHE_LOCAL_TIMEOUT = 10
+SERVICES_PURCHASE_CACHE_SIZE = 10000
+
 SHORTER_LANGUAGES = {'en': 'en-US', 'ga': 'ga-IE', 'pt': 'pt-PT',
                      'sv': 'sv-SE', 'zh': 'zh-CN'}
 
@@ -1066,6 +1140,10 @@ SIGNED_APPS_REVIEWER_SERVER = ''
 # And how long we'll give the server to respond.
 SIGNED_APPS_SERVER_TIMEOUT = 10
 
+# How long a process signing a version keeps the other processes from signing
+# it too, they wait until it is done.
+SIGNED_APPS_LOCK_TIMEOUT = 60
+
 # Send the more terse manifest signatures to the app signing server.
 SIGNED_APPS_OMIT_PER_FILE_SIGS = True
 
@@ -1076,12 +1154,25 @@ SIGNING_SERVER = ''
 # is a temporary flag that we will remove.
 SIGNING_SERVER_ACTIVE = False
 
+# How many connections to keep open to the signing server in each process.
+SIGNING_SERVER_POOL_SIZE = 10
+
+# How many times to retry the requests that can't connect to the signing
+# server, waiting SIGNING_SERVER_RETRY_BACKOFF seconds and then twice as long
+# each time.
+SIGNING_SERVER_RETRIES = 2
+SIGNING_SERVER_RETRY_BACKOFF = 0.1
+
 # And how long we'll give the server to respond.
 SIGNING_SERVER_TIMEOUT = 10
 
 # The domains that we will accept certificate issuers for receipts.
 SIGNING_VALID_ISSUERS = []
 
+# How long, in seconds, the receipt verification service will hold on to a
+# receipt verifier and the issuer certificates it has fetched.
+SIGNING_VERIFIER_CACHE_TTL = 60 * 60
+
 # Put the aliases for your slave databases in this list.
 SLAVE_DATABASES = []
 
@@ -1152,6 +1243,12 @@ TOWER_KEYWORDS = {
 }
 TOWER_ADD_HEADERS = True
 
+# Number of seconds the translations loaded with the models are cached in
+# memcache, and in each process, which keeps TRANSLATIONS_CACHE_SIZE of them.
+TRANSLATIONS_CACHE_LOCAL_TIMEOUT = 60
+TRANSLATIONS_CACHE_SIZE = 10000
+TRANSLATIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Path to uglifyjs (our JS minifier).
 UGLIFY_BIN = os.environ.get('UGLIFY_BIN',
                             path('node_modules/uglify-js/bin/uglifyjs'))
@@ -1170,6 +1267,10 @@ VALIDATE_ADDONS = True
 VALIDATION_FAQ_URL = ('https://wiki.mozilla.org/AMO:Editors/EditorGuide/'
                       'AddonReviews#Step_2:_Automatic_validation')
 
+# How long to keep validation results, by content hash, so that identical
+# uploads and manifests don't go through the validator again.
+VALIDATOR_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Allowed `installs_allowed_from` values for manifest validator.
 VALIDATOR_IAF_URLS = ['https://marketplace.firefox.com']
 
@@ -0,0 +1,71 @@
+"""
+Caches the translation rows loaded by mkt.translations.transformer, keyed on
+the translation id and locale.
+
+Lookups go to an in process LRU first and then memcache. Saving or deleting a
+translation deletes its memcache entry, the in process entries are kept short
+so that other processes pick the change up soon.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from django_statsd.clients import statsd
+
+from lib.utils import LRUCache
+
+
+class TranslationCache(object):
+    """
+    The rows are tuples of the Translation field values, or an empty tuple
+    for a translation that doesn't exist in that locale, so that it isn't
+    looked up again.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.TRANSLATIONS_CACHE_SIZE,
+                              settings.TRANSLATIONS_CACHE_LOCAL_TIMEOUT)
+
+    def key(self, id_, locale):
+        # MySQL compares the locales without case.
+        return 'translations:%s:%s' % (id_, unicode(locale).lower())
+
+    def get_many(self, keys):
+        """Returns a dict of the rows found for `keys`."""
+        found, missing = {}, []
+        for key in keys:
+            row = self.local.get(key)
+            if row is None:
+                missing.append(key)
+            else:
+                found[key] = row
+
+        if found:
+            statsd.incr('translations.cache.local', len(found))
+        if missing:
+            rows = cache.get_many(missing)
+            for key, row in rows.items():
+                self.local.set(key, row)
+            found.update(rows)
+            if rows:
+                statsd.incr('translations.cache.memcache', len(rows))
+            if len(missing) > len(rows):
+                statsd.incr('translations.cache.miss',
+                            len(missing) - len(rows))
+        return found
+
+    def set_many(self, rows):
+        for key, row in rows.items():
+            self.local.set(key, row)
+        cache.set_many(rows, settings.TRANSLATIONS_CACHE_TIMEOUT)
+
+    def delete(self, id_, locale):
+        key = self.key(id_, locale)
+        self.local.delete(key)
+        cache.delete(key)
+
+    def clear(self):
+        """Clears the in process cache, the rest is in memcache."""
+        self.local.clear()
+
+
+translation_cache = TranslationCache()
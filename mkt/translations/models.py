@@ -10,6 +10,7 @@ import amo.models
 from amo import urlresolvers
 
 from . import utils
+from .cache import translation_cache
 
 
 log = commonware.log.getLogger('z.translations')
@@ -23,6 +24,8 @@ class TranslationManager(amo.models.ManagerBase):
         qs = Translation.objects.filter(id__in=filter(None, ids),
                                         locale=locale)
         qs.update(localized_string=None, localized_string_clean=None)
+        for id_ in filter(None, ids):
+            translation_cache.delete(id_, locale)
 
 
 class Translation(amo.models.ModelBase):
@@ -253,6 +256,19 @@ class TranslationSequence(models.Model):
         db_table = 'translations_seq'
 
 
+def invalidate_translation_cache(sender, instance, **kw):
+    translation_cache.delete(instance.id, instance.locale)
+
+for cls in [Translation, PurifiedTranslation, LinkifiedTranslation,
+            NoLinksTranslation, NoLinksNoMarkupTranslation]:
+    models.signals.post_save.connect(
+        invalidate_translation_cache, sender=cls,
+        dispatch_uid='translation_cache_invalidate')
+    models.signals.post_delete.connect(
+        invalidate_translation_cache, sender=cls,
+        dispatch_uid='translation_cache_invalidate')
+
+
 def delete_translation(obj, fieldname):
     field = obj._meta.get_field(fieldname)
     trans_id = getattr(obj, field.attname)
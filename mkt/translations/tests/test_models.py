@@ -3,6 +3,7 @@ from contextlib import nested
 
 import django
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connections, reset_queries
 from django.test.utils import override_settings
 from django.utils import translation
@@ -15,7 +16,8 @@ from nose import SkipTest
 from nose.tools import eq_
 from test_utils import trans_eq, TestCase
 
-from mkt.translations import widgets
+from mkt.translations import transformer, widgets
+from mkt.translations.cache import translation_cache
 from mkt.translations.models import (LinkifiedTranslation, NoLinksTranslation,
                                  NoLinksNoMarkupTranslation,
                                  PurifiedTranslation, Translation,
@@ -75,6 +77,8 @@ class TranslationTestCase(TestCase):
 
     def setUp(self):
         super(TranslationTestCase, self).setUp()
+        cache.clear()
+        translation_cache.clear()
         self.redirect_url = settings.REDIRECT_URL
         self.redirect_secret_key = settings.REDIRECT_SECRET_KEY
         settings.REDIRECT_URL = None
@@ -406,12 +410,37 @@ class TranslationTestCase(TestCase):
         eq_(obj.name.id, orig_name_id)
         eq_(obj.name.locale, 'de')
 
+    def test_translations_cached(self):
+        TranslatedModel.objects.no_cache().get(id=1)
+        with patch.object(transformer, 'get_query') as get_query:
+            o = TranslatedModel.objects.no_cache().get(id=1)
+        assert not get_query.called
+        trans_eq(o.name, 'some name', 'en-US')
+        trans_eq(o.description, 'some description', 'en-US')
+
+    def test_translations_cached_fallback(self):
+        translation.activate('de')
+        TranslatedModel.objects.no_cache().get(id=4)
+        with patch.object(transformer, 'get_query') as get_query:
+            o = TranslatedModel.objects.no_cache().get(id=4)
+        assert not get_query.called
+        trans_eq(o.name, 'hot dogs', 'en-US')
+
+    def test_translations_cache_invalidated(self):
+        o = TranslatedModel.objects.no_cache().get(id=1)
+        o.name = 'new name'
+        o.save()
+        o = TranslatedModel.objects.no_cache().get(id=1)
+        trans_eq(o.name, 'new name', 'en-US')
+
 
 class TranslationMultiDbTests(TestCase):
     fixtures = ['testapp/test_models.json']
 
     def setUp(self):
         super(TranslationMultiDbTests, self).setUp()
+        cache.clear()
+        translation_cache.clear()
         translation.activate('en-US')
 
     def tearDown(self):
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import connections, models, router
 from django.utils import translation
 
+from mkt.translations.cache import translation_cache
 from mkt.translations.fields import TranslatedField
 from mkt.translations.models import Translation
 
@@ -14,23 +15,31 @@ no_locale_join = """LEFT OUTER JOIN translations {t}
 
 trans_fields = [f.name for f in Translation._meta.fields]
 
+# The queries made by build_query, see get_query.
+_queries = {}
 
-def build_query(model, connection):
-    qn = connection.ops.quote_name
-    selects, joins, params = [], [], []
 
-    # The model can define a fallback locale (which may be a Field).
+def get_fallback(model):
+    """The model can define a fallback locale (which may be a Field)."""
     if hasattr(model, 'get_fallback'):
-        fallback = model.get_fallback()
-    else:
-        fallback = settings.LANGUAGE_CODE
+        return model.get_fallback()
+    return settings.LANGUAGE_CODE
 
+
+def get_translated_fields(model):
     if not hasattr(model._meta, 'translated_fields'):
         model._meta.translated_fields = [f for f in model._meta.fields
                                          if isinstance(f, TranslatedField)]
+    return model._meta.translated_fields
+
+
+def build_query(model, connection):
+    qn = connection.ops.quote_name
+    selects, joins, params = [], [], []
+    fallback = get_fallback(model)
 
     # Add the selects and joins for each translated field on the model.
-    for field in model._meta.translated_fields:
+    for field in get_translated_fields(model):
         if isinstance(fallback, models.Field):
             fallback_str = '%s.%s' % (qn(model._meta.db_table),
                                       qn(fallback.column))
@@ -61,27 +70,106 @@ def build_query(model, connection):
     return s, params
 
 
+def get_query(model, connection):
+    """
+    Returns `build_query(model, connection)`, which is only built once for
+    each connection, locale and fallback.
+    """
+    key = (model, connection.alias, translation.get_language(),
+           get_fallback(model))
+    query = _queries.get(key)
+    if query is None:
+        query = _queries[key] = build_query(model, connection)
+    return query
+
+
+def get_locales(item, field, fallback):
+    """The locales to look the field's translation up in, in order."""
+    locales = [translation.get_language()]
+    if field.require_locale:
+        if isinstance(fallback, models.Field):
+            locales.append(getattr(item, fallback.attname))
+        else:
+            locales.append(fallback)
+    return locales
+
+
+def get_cached_trans(items, model, fallback):
+    """
+    Sets the translations found in the cache on the items. Returns the items
+    that need to be looked up in the database.
+    """
+    wanted = []
+    for item in items:
+        for field in get_translated_fields(model):
+            trans_id = getattr(item, field.attname)
+            if trans_id is not None:
+                wanted.append((item, field, trans_id,
+                               get_locales(item, field, fallback)))
+
+    rows = translation_cache.get_many(
+        set(translation_cache.key(trans_id, locale)
+            for _, _, trans_id, locales in wanted for locale in locales))
+
+    missing = {}
+    for item, field, trans_id, locales in wanted:
+        for locale in locales:
+            row = rows.get(translation_cache.key(trans_id, locale))
+            if row is None:
+                # Not cached.
+                missing[item.pk] = item
+                break
+            if row:
+                setattr(item, field.name, Translation(*row))
+                break
+        else:
+            if not field.require_locale:
+                # The fallback is in any locale, which isn't cached.
+                missing[item.pk] = item
+    return missing.values()
+
+
 def get_trans(items):
     if not items:
         return
 
     model = items[0].__class__
+    fallback = get_fallback(model)
+    items = get_cached_trans(items, model, fallback)
+    if not items:
+        return
+
     # FIXME: if we knew which db the queryset we are transforming used, we could
     # make sure we are re-using the same one.
     dbname = router.db_for_read(model)
     connection = connections[dbname]
-    sql, params = build_query(model, connection)
+    sql, params = get_query(model, connection)
     item_dict = dict((item.pk, item) for item in items)
     ids = ','.join(map(str, item_dict.keys()))
 
     cursor = connection.cursor()
     cursor.execute(sql.format(ids='(%s)' % ids), tuple(params))
     step = len(trans_fields)
+    cached = {}
     for row in cursor.fetchall():
         # We put the item's pk as the first selected field.
         item = item_dict[row[0]]
         for index, field in enumerate(model._meta.translated_fields):
+            trans_id = getattr(item, field.attname)
             start = 1 + step * index
             t = Translation(*row[start:start+step])
+            found = None
             if t.id is not None and t.localized_string is not None:
                 setattr(item, field.name, t)
+                found = translation_cache.key(t.id, t.locale)
+                cached[found] = tuple(row[start:start+step])
+
+            # Remember the locales it isn't in, up to the one it was found
+            # in.
+            if trans_id is not None:
+                for locale in get_locales(item, field, fallback):
+                    key = translation_cache.key(trans_id, locale)
+                    if key == found:
+                        break
+                    cached.setdefault(key, ())
+    translation_cache.set_many(cached)
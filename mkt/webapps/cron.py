@@ -143,11 +143,12 @@ def update_app_trending():
     """
     Update trending for all published apps.
 
-    Spread these tasks out successively by 15 seconds so they don't hit
-    Monolith all at once.
+    Each task makes a single Monolith query for all its apps. Spread these
+    tasks out successively by 15 seconds so they don't hit Monolith all at
+    once.
 
     """
-    chunk_size = 50
+    chunk_size = 500
     seconds_between = 15
 
     all_ids = list(Webapp.objects.filter(status=amo.STATUS_PUBLIC)
@@ -188,11 +189,12 @@ def update_app_downloads():
     """
     Update download/install stats for all apps.
 
-    Spread these tasks out successively by `seconds_between` seconds so they
-    don't hit Monolith all at once.
+    Each task makes a single Monolith query for all its apps. Spread these
+    tasks out successively by `seconds_between` seconds so they don't hit
+    Monolith all at once.
 
     """
-    chunk_size = 50
+    chunk_size = 500
     seconds_between = 2
 
     all_ids = list(Webapp.objects.filter(status=amo.STATUS_PUBLIC)
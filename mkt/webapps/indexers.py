@@ -1,10 +1,11 @@
 import math
 import sys
+from collections import defaultdict
 from operator import attrgetter
 
 from django.conf import settings
 from django.core.urlresolvers import reverse
-from django.db.models import Max, Min
+from django.db.models import Count, Max, Min
 from elasticsearch_dsl import F, filter as es_filter
 
 import commonware.log
@@ -210,50 +211,137 @@ class WebappIndexer(BaseIndexer):
         return mapping
 
     @classmethod
-    def extract_document(cls, pk=None, obj=None):
-        """Extracts the ElasticSearch index document for this instance."""
-        from mkt.webapps.models import (AppFeatures, attach_devices,
+    def get_bulk_data(cls, objs):
+        """
+        Attaches and loads the related data `extract_document` needs for a
+        list of apps, with one query per relation for the whole list rather
+        than several queries per app.
+        """
+        from mkt.collections.models import CollectionMembership
+        from mkt.reviewers.models import EscalationQueue
+        from mkt.webapps.models import (AddonUser, attach_devices,
                                         attach_prices, attach_tags,
-                                        attach_translations, Geodata,
-                                        Installed, RatingDescriptors,
-                                        RatingInteractives, Webapp)
-
-        if obj is None:
-            obj = cls.get_model().objects.no_cache().get(pk=pk)
+                                        attach_translations, Installed,
+                                        Preview, Webapp)
 
         # Attach everything we need to index apps.
         for transform in (attach_devices, attach_prices, attach_tags,
                           attach_translations):
-            transform([obj])
+            transform(objs)
+
+        ids = [obj.id for obj in objs]
+        data = {
+            'collections': defaultdict(list),
+            'installs': defaultdict(int),
+            'owners': defaultdict(list),
+            'previews': defaultdict(list),
+            'reviewed': {},
+            'versions': defaultdict(list),
+        }
+
+        data['escalated'] = set(
+            EscalationQueue.objects.filter(addon__in=ids)
+            .values_list('addon', flat=True))
+
+        for cms in CollectionMembership.objects.filter(app__in=ids):
+            data['collections'][cms.app_id].append(
+                {'id': cms.collection_id, 'order': cms.order})
+
+        for row in (Installed.objects.filter(addon__in=ids).order_by()
+                    .values('addon').annotate(count=Count('id'))):
+            data['installs'][row['addon']] = row['count']
+
+        for addon_id, user_id in (AddonUser.objects
+                                  .filter(addon__in=ids,
+                                          role=amo.AUTHOR_ROLE_OWNER)
+                                  .values_list('addon', 'user')):
+            data['owners'][addon_id].append(user_id)
+
+        for p in Preview.objects.filter(addon__in=ids).no_transforms():
+            data['previews'][p.addon_id].append(
+                {'filetype': p.filetype, 'modified': p.modified,
+                 'id': p.id, 'sizes': p.sizes})
+
+        for row in (Version.objects.filter(addon__in=ids).order_by()
+                    .values('addon').annotate(reviewed=Min('reviewed'))):
+            data['reviewed'][row['addon']] = row['reviewed']
+
+        for addon_id, pk, version in (Version.objects.filter(addon__in=ids)
+                                      .values_list('addon', 'id',
+                                                   'version')):
+            data['versions'][addon_id].append(
+                {'version': version,
+                 'resource_uri': reverse('version-detail',
+                                         kwargs={'pk': pk})})
+
+        data['max_downloads'] = float(
+            Webapp.objects.aggregate(Max('weekly_downloads')).values()[0] or 0)
+
+        return data
+
+    @classmethod
+    def extract_documents(cls, objs):
+        """
+        Extracts the ElasticSearch index documents for a list of apps, loading
+        the related data for all of them at once.
+
+        Returns a list of (obj, document or exception) tuples, so that one
+        broken app doesn't stop the others from being indexed.
+        """
+        objs = list(objs)
+        data = cls.get_bulk_data(objs)
+        docs = []
+        for obj in objs:
+            try:
+                docs.append((obj, cls.extract_document(obj.id, obj=obj,
+                                                       bulk_data=data)))
+            except Exception as e:
+                docs.append((obj, e))
+        return docs
+
+    @classmethod
+    def extract_document(cls, pk=None, obj=None, bulk_data=None):
+        """
+        Extracts the ElasticSearch index document for this instance.
+
+        `bulk_data` is what `get_bulk_data` returns for a list of apps
+        including this one, if not passed it is loaded for this app alone.
+        """
+        from mkt.webapps.models import (AppFeatures, Geodata,
+                                        RatingDescriptors, RatingInteractives)
+
+        if obj is None:
+            obj = cls.get_model().objects.no_cache().get(pk=pk)
+
+        if bulk_data is None:
+            bulk_data = cls.get_bulk_data([obj])
 
         latest_version = obj.latest_version
         version = obj.current_version
         geodata = obj.geodata
         features = (version.features.to_dict()
                     if version else AppFeatures().to_dict())
-        is_escalated = obj.escalationqueue_set.exists()
+        is_escalated = obj.id in bulk_data['escalated']
 
         try:
             status = latest_version.statuses[0][1] if latest_version else None
         except IndexError:
             status = None
 
-        installed_ids = list(Installed.objects.filter(addon=obj)
-                             .values_list('id', flat=True))
+        installs = bulk_data['installs'][obj.id]
 
         attrs = ('app_slug', 'bayesian_rating', 'created', 'id', 'is_disabled',
                  'last_updated', 'modified', 'premium_type', 'status', 'type',
                  'uses_flash', 'weekly_downloads')
         d = dict(zip(attrs, attrgetter(*attrs)(obj)))
 
-        d['boost'] = len(installed_ids) or 1
+        d['boost'] = installs or 1
         d['app_type'] = obj.app_type_id
         d['author'] = obj.developer_name
         d['banner_regions'] = geodata.banner_regions_slugs()
         d['category'] = obj.categories if obj.categories else []
         if obj.is_published:
-            d['collection'] = [{'id': cms.collection_id, 'order': cms.order}
-                               for cms in obj.collectionmembership_set.all()]
+            d['collection'] = bulk_data['collections'][obj.id]
         else:
             d['collection'] = []
         d['content_ratings'] = (obj.get_content_ratings_by_body(es=True) or
@@ -295,12 +383,9 @@ class WebappIndexer(BaseIndexer):
         d['name'] = list(
             set(string for _, string in obj.translations[obj.name_id]))
         d['name_sort'] = unicode(obj.name).lower()
-        d['owners'] = [au.user.id for au in
-                       obj.addonuser_set.filter(role=amo.AUTHOR_ROLE_OWNER)]
-        d['popularity'] = len(installed_ids)
-        d['previews'] = [{'filetype': p.filetype, 'modified': p.modified,
-                          'id': p.id, 'sizes': p.sizes}
-                         for p in obj.previews.all()]
+        d['owners'] = bulk_data['owners'][obj.id]
+        d['popularity'] = installs
+        d['previews'] = bulk_data['previews'][obj.id]
         try:
             p = obj.addonpremium.price
             d['price_tier'] = p.name
@@ -312,8 +397,7 @@ class WebappIndexer(BaseIndexer):
             'count': obj.total_reviews,
         }
         d['region_exclusions'] = obj.get_excluded_region_ids()
-        d['reviewed'] = obj.versions.filter(
-            deleted=False).aggregate(Min('reviewed')).get('reviewed__min')
+        d['reviewed'] = bulk_data['reviewed'].get(obj.id)
         if version:
             d['supported_locales'] = filter(
                 None, version.supported_locales.split(','))
@@ -332,15 +416,12 @@ class WebappIndexer(BaseIndexer):
                 'region_exclusions': upsell_obj.get_excluded_region_ids()
             }
 
-        d['versions'] = [dict(version=v.version,
-                              resource_uri=reverse_version(v))
-                         for v in obj.versions.all()]
+        d['versions'] = bulk_data['versions'][obj.id]
 
         # Calculate weight. It's similar to popularity, except that we can
         # expose the number - it's relative to the max weekly downloads for
         # the whole database.
-        max_downloads = float(
-            Webapp.objects.aggregate(Max('weekly_downloads')).values()[0] or 0)
+        max_downloads = bulk_data['max_downloads']
         if max_downloads:
             d['weight'] = math.ceil(d['weekly_downloads'] / max_downloads * 5)
         else:
@@ -426,12 +507,12 @@ class WebappIndexer(BaseIndexer):
         qs = Webapp.with_deleted.no_cache().filter(id__in=ids)
 
         docs = []
-        for obj in qs:
-            try:
-                docs.append(cls.extract_document(obj.id, obj=obj))
-            except Exception as e:
+        for obj, doc in cls.extract_documents(qs):
+            if isinstance(doc, Exception):
                 sys.stdout.write('Failed to index webapp {0}: {1}\n'.format(
-                    obj.id, e))
+                    obj.id, doc))
+            else:
+                docs.append(doc)
 
         WebappIndexer.bulk_index(docs, es=ES, index=index or cls.get_index())
 
@@ -463,15 +544,3 @@ class WebappIndexer(BaseIndexer):
 
         return sq
 
-
-def reverse_version(version):
-    """
-    The try/except AttributeError allows this to be used where the input is
-    ambiguous, and could be either an already-reversed URL or a Version object.
-    """
-    if version:
-        try:
-            return reverse('version-detail', kwargs={'pk': version.pk})
-        except AttributeError:
-            return version
-    return
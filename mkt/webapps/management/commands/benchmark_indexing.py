@@ -0,0 +1,55 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from mkt.webapps.indexers import WebappIndexer
+from mkt.webapps.models import Webapp
+
+HELP = ('Compare the queries per document when extracting app documents one '
+        'by one and in bulk')
+
+
+class Command(BaseCommand):
+    """
+    Usage:
+
+        python manage.py benchmark_indexing --apps=<number of apps>
+
+    """
+
+    option_list = BaseCommand.option_list + (
+        make_option('--apps', type='int', default=100,
+                    help='How many apps to extract documents for'),
+    )
+
+    help = HELP
+
+    def extract(self, extract, ids):
+        objs = list(Webapp.with_deleted.no_cache().filter(id__in=ids))
+        with CaptureQueriesContext(connection) as queries:
+            start = time.time()
+            extract(objs)
+            elapsed = time.time() - start
+        return len(queries), elapsed
+
+    def handle(self, *args, **kwargs):
+        ids = list(WebappIndexer.get_indexable()
+                   .values_list('id', flat=True)[:kwargs['apps']])
+        if not ids:
+            print 'No apps to extract.'
+            return
+
+        def one_by_one(objs):
+            for obj in objs:
+                WebappIndexer.extract_document(obj.id, obj=obj)
+
+        for name, extract in (('extract_document', one_by_one),
+                              ('extract_documents',
+                               WebappIndexer.extract_documents)):
+            queries, elapsed = self.extract(extract, ids)
+            print ('%s: %s apps, %.1f queries and %.1fms per document'
+                   % (name, len(ids), float(queries) / len(ids),
+                      elapsed * 1000 / len(ids)))
@@ -2503,6 +2503,17 @@ def update_cached_manifests(sender, **kw):
         update_cached_manifests.delay(sender.id)
 
 
+@receiver(signals.version_changed, dispatch_uid='presign_packaged_app')
+def presign_packaged_app(sender, **kw):
+    """
+    Signs the new current version of a packaged app, so that it is ready
+    before anyone downloads it.
+    """
+    if (not kw.get('raw') and sender.is_packaged and
+            sender.current_version):
+        packaged.presign.delay([sender.current_version.id])
+
+
 @Webapp.on_change
 def watch_status(old_attr={}, new_attr={}, instance=None, sender=None, **kw):
     """Set nomination date when app is pending review."""
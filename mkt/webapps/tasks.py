@@ -1,3 +1,4 @@
+import collections
 import datetime
 import hashlib
 import itertools
@@ -14,6 +15,7 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
+from django.db import connection, transaction
 from django.template import Context, loader
 
 import pytz
@@ -44,7 +46,8 @@ from mkt.site.mail import send_mail_jinja
 from mkt.users.models import UserProfile
 from mkt.users.utils import get_task_user
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import Addon, AppManifest, Preview, Webapp
+from mkt.webapps.models import (Addon, AppManifest, Preview, Trending,
+                                Webapp)
 from mkt.webapps.utils import get_locale_properties
 
 
@@ -333,14 +336,14 @@ def update_supported_locales(ids, **kw):
                 _log(app, u'Updating supported locales failed.', exc_info=True)
 
 
-@post_request_task(acks_late=True)
+@post_request_task(acks_late=True, merge_arg=0)
 @write
 def index_webapps(ids, **kw):
     # DEPRECATED: call WebappIndexer.index_ids directly.
     WebappIndexer.index_ids(ids, no_delay=True)
 
 
-@post_request_task(acks_late=True)
+@post_request_task(acks_late=True, merge_arg=0)
 @write
 def unindex_webapps(ids, **kw):
     # DEPRECATED: call WebappIndexer.unindexer directly.
@@ -631,7 +634,7 @@ def import_manifests(ids, **kw):
                               '%s: %s' % (app.id, version.id, e))
 
 
-def _get_trending(app_id, region=None):
+def _trending(count_1, count_3):
     """
     Calculate trending.
 
@@ -641,159 +644,207 @@ def _get_trending(app_id, region=None):
     trending = (a - b) / b if a > 100 and b > 1 else 0
 
     """
-    client = get_monolith_client()
+    if count_1 > 100 and count_3 > 1:
+        return (count_1 - count_3) / count_3
+    return 0.0
 
-    kwargs = {'app-id': app_id}
-    if region:
-        kwargs['region'] = region.slug
 
-    today = datetime.datetime.today()
+def _get_trending(ids):
+    """
+    Returns the trending values of the apps globally and in every region,
+    from a single monolith query: {(app id, region id): value}, region 0
+    being global. Apps with no trending are left out.
 
-    # If we query monolith with interval=week and the past 7 days
-    # crosses a Monday, Monolith splits the counts into two. We want
-    # the sum over the past week so we need to `sum` these.
-    try:
-        count_1 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(7), today, 'week', **kwargs)
-            if c.get('count'))
-    except ValueError as e:
-        task_log.info('Call to ES failed: {0}'.format(e))
-        count_1 = 0
+    """
+    client = get_monolith_client()
 
-    # If count_1 isn't more than 100, stop here to avoid extra Monolith calls.
-    if not count_1 > 100:
-        return 0.0
+    today = datetime.datetime.today()
+    periods = (('week', days_ago(7), today),
+               ('prior', days_ago(28), days_ago(8)))
+    regions = [(0, None)] + [(r.id, r.slug)
+                             for r in mkt.regions.REGIONS_DICT.values()]
+
+    # One facet per period and region, each summing the installs per app.
+    facets = {}
+    for period, start, end in periods:
+        date_range = {'range': {'date': {
+            'gte': start.date().strftime('%Y-%m-%d'),
+            'lte': end.date().strftime('%Y-%m-%d'),
+        }}}
+        for region_id, slug in regions:
+            filters = [date_range]
+            if slug:
+                filters.append({'term': {'region': slug}})
+            facets['%s_%s' % (period, region_id)] = {
+                'terms_stats': {
+                    'key_field': 'app-id',
+                    'value_field': 'app_installs',
+                    'size': len(ids),
+                },
+                'facet_filter': {'and': filters},
+            }
+    query = {
+        'query': {'filtered': {
+            'query': {'match_all': {}},
+            'filter': {'terms': {'app-id': ids}},
+        }},
+        'facets': facets,
+        'size': 0}
 
-    # Get the average installs for the prior 3 weeks. Don't use the `len` of
-    # the returned counts because of week boundaries.
     try:
-        count_3 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(28), days_ago(8), 'week', **kwargs)
-            if c.get('count')) / 3
-    except ValueError as e:
+        resp = client.raw(query)
+    except Exception as e:
         task_log.info('Call to ES failed: {0}'.format(e))
-        count_3 = 0
-
-    if count_3 > 1:
-        return (count_1 - count_3) / count_3
-    else:
-        return 0.0
+        return {}
+
+    counts = collections.defaultdict(lambda: {'week': 0, 'prior': 0})
+    for name, facet in resp.get('facets', {}).items():
+        period, region_id = name.split('_')
+        for term in facet.get('terms', []):
+            counts[(int(term['term']), int(region_id))][period] += (
+                term.get('total') or 0)
+
+    # Average the installs for the prior 3 weeks.
+    values = {}
+    for key, count in counts.items():
+        value = _trending(count['week'], count['prior'] / 3)
+        if value:
+            values[key] = value
+    return values
 
 
 @task
 @write
 def update_trending(ids, **kw):
-    count = 0
-    times = []
+    t_start = time.time()
+    ids = list(Webapp.objects.filter(id__in=ids).values_list('id', flat=True))
+    if not ids:
+        return
 
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
+    values = _get_trending(ids)
 
-        count += 1
-        t_start = time.time()
+    # Replace the rows whose value changed and add the missing ones.
+    existing = dict(((t.addon_id, t.region), t) for t in
+                    Trending.objects.no_cache().filter(addon__in=ids))
+    stale, new = [], []
+    for (app_id, region_id), value in values.items():
+        trending = existing.get((app_id, region_id))
+        if trending and trending.value == value:
+            continue
+        if trending:
+            stale.append(trending.pk)
+        new.append(Trending(addon_id=app_id, region=region_id, value=value))
 
-        # Calculate global trending, then per-region trending below.
-        value = _get_trending(app.id)
-        if value:
-            trending, created = app.trending.get_or_create(
-                region=0, defaults={'value': value})
-            if not created:
-                trending.update(value=value)
+    with transaction.atomic():
+        if stale:
+            Trending.objects.filter(pk__in=stale).delete()
+        Trending.objects.bulk_create(new)
 
-        for region in mkt.regions.REGIONS_DICT.values():
-            value = _get_trending(app.id, region)
-            if value:
-                trending, created = app.trending.get_or_create(
-                    region=region.id, defaults={'value': value})
-                if not created:
-                    trending.update(value=value)
+    task_log.info('Trending calculated for %s apps, %s values updated. Time '
+                  'overall: %0.2fs' % (len(ids), len(new),
+                                       time.time() - t_start))
 
-        times.append(time.time() - t_start)
 
-    task_log.info('Trending calculated for %s apps. Avg time overall: '
-                  '%0.2fs' % (count, sum(times) / count))
+def _get_downloads(ids):
+    """
+    Returns the weekly and total downloads of the apps, from a single monolith
+    query: {app id: (weekly, total)}.
 
+    Raises an exception if the query fails.
 
-@task
-@write
-def update_downloads(ids, **kw):
+    """
     client = get_monolith_client()
-    count = 0
-
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
 
-        appid = {'app-id': app.id}
+    def installs(facet_filter=None):
+        facet = {
+            'terms_stats': {
+                'key_field': 'app-id',
+                'value_field': 'app_installs',
+                'size': len(ids),
+            }
+        }
+        if facet_filter:
+            facet['facet_filter'] = facet_filter
+        return facet
 
-        # Get weekly downloads.
-        query = {
+    query = {
+        'query': {'filtered': {
             'query': {'match_all': {}},
-            'facets': {
-                'installs': {
-                    'date_histogram': {
-                        'value_field': 'app_installs',
-                        'interval': 'week',
-                        'key_field': 'date',
-                    },
-                    'facet_filter': {
-                        'and': [
-                            {'term': appid},
-                            {'range': {'date': {
-                                'gte': days_ago(8).date().strftime('%Y-%m-%d'),
-                                'lte': days_ago(1).date().strftime('%Y-%m-%d'),
-                            }}}
-                        ]
-                    }
-                }
-            },
-            'size': 0}
+            'filter': {'terms': {'app-id': ids}},
+        }},
+        'facets': {
+            'weekly': installs({'range': {'date': {
+                'gte': days_ago(8).date().strftime('%Y-%m-%d'),
+                'lte': days_ago(1).date().strftime('%Y-%m-%d'),
+            }}}),
+            'total': installs(),
+        },
+        'size': 0}
+
+    resp = client.raw(query)
+    facets = resp.get('facets', {})
+    weekly, total = [
+        dict((int(t['term']), int(t.get('total') or 0))
+             for t in facets.get(name, {}).get('terms', []))
+        for name in ('weekly', 'total')]
+    return dict((id_, (weekly.get(id_, 0), total.get(id_, 0)))
+                for id_ in ids)
+
+
+def _update_downloads(downloads):
+    """
+    Sets the weekly and total downloads of the apps with a single UPDATE:
+    {app id: (weekly, total)}.
 
-        try:
-            resp = client.raw(query)
-            # If we query monolith with interval=week and the past 7 days
-            # crosses a Monday, Monolith splits the counts into two. We want
-            # the sum over the past week so we need to `sum` these.
-            weekly = sum(
-                c['total'] for c in
-                resp.get('facets', {}).get('installs', {}).get('entries')
-                if c.get('total'))
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            weekly = 0
-
-        # Get total downloads.
-        query = {'query': {'match_all': {}},
-                 'facets': {
-                     'installs': {
-                         'statistical': {'field': 'app_installs'},
-                         'facet_filter': {'term': appid}}},
-                 'size': 0}
-        try:
-            resp = client.raw(query)
-            total = resp.get('facets', {}).get('installs', {}).get('total', 0)
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            total = 0
-
-        # Update Webapp object, if needed.
-        update = False
-        signal = False
-        if weekly != app.weekly_downloads:
-            update = True
-            signal = True
-        if total != app.total_downloads:
-            update = True
-
-        if update:
-            # Note: Calling `update` will trigger a reindex on the app if
-            # `_signal` is True. Since we only index `weekly_downloads`, we
-            # can skip reindexing if this hasn't changed.
-            count += 1
-            app.update(weekly_downloads=weekly, total_downloads=total,
-                       _signal=signal)
+    """
+    ids = downloads.keys()
+    cases = ' '.join(['WHEN %s THEN %s'] * len(ids))
+    sql = ('UPDATE {table} SET weekly_downloads = CASE id {cases} END, '
+           'total_downloads = CASE id {cases} END WHERE id IN ({ids})'
+           .format(table=Webapp._meta.db_table, cases=cases,
+                   ids=', '.join(['%s'] * len(ids))))
+    params = []
+    for i in (0, 1):
+        for id_ in ids:
+            params.extend([id_, downloads[id_][i]])
+    params.extend(ids)
+    connection.cursor().execute(sql, params)
+
+
+@task
+@write
+def update_downloads(ids, **kw):
+    apps = list(Webapp.objects.no_cache().filter(id__in=ids)
+                .no_transforms())
+    if not apps:
+        return
+
+    try:
+        downloads = _get_downloads([app.id for app in apps])
+    except Exception as e:
+        task_log.info('Call to ES failed: {0}'.format(e))
+        return
+
+    changed = {}
+    reindex = []
+    for app in apps:
+        weekly, total = downloads[app.id]
+        if (weekly, total) != (app.weekly_downloads, app.total_downloads):
+            changed[app.id] = (weekly, total)
+            # Since we only index `weekly_downloads`, we can skip reindexing
+            # if this hasn't changed.
+            if weekly != app.weekly_downloads:
+                reindex.append(app.id)
+
+    if changed:
+        _update_downloads(changed)
+        Webapp.objects.invalidate(*[app for app in apps
+                                    if app.id in changed])
+    if reindex:
+        WebappIndexer.index_ids(reindex)
 
     task_log.info('App downloads updated for %s out of %s apps.'
-                  % (count, len(ids)))
+                  % (len(changed), len(ids)))
 
 
 class PreGenAPKError(Exception):
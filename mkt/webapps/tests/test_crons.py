@@ -23,7 +23,7 @@ from mkt.webapps import cron
 from mkt.webapps.cron import (clean_old_signed, mkt_gc, update_app_trending,
                               update_downloads)
 from mkt.webapps.models import Addon, Webapp
-from mkt.webapps.tasks import _get_trending
+from mkt.webapps.tasks import _get_trending, update_trending
 
 
 class TestLastUpdated(amo.tests.TestCase):
@@ -125,51 +125,54 @@ class TestWeeklyDownloads(amo.tests.TestCase):
     def setUp(self):
         self.app = Webapp.objects.create(type=amo.ADDON_WEBAPP,
                                          status=amo.STATUS_PUBLIC)
+        self.app2 = Webapp.objects.create(type=amo.ADDON_WEBAPP,
+                                          status=amo.STATUS_PUBLIC)
 
     def get_app(self):
         return Webapp.objects.get(pk=self.app.pk)
 
-    @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_weekly_downloads(self, _mock):
-        client = mock.Mock()
-        raw = {
+    def raw(self, weekly=(), total=()):
+        return {
             'facets': {
-                'installs': {
-                    '_type': 'date_histogram',
-                    'entries': [
-                        {'count': 3,
-                         'time': 1390780800000,
-                         'total': 19.0},
-                        {'count': 62,
-                         'time': 1391385600000,
-                         'total': 236.0}
-                    ]
-                }
+                'weekly': {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': id_, 'total': count}
+                              for id_, count in weekly],
+                },
+                'total': {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': id_, 'total': count}
+                              for id_, count in total],
+                },
             }
         }
-        client.raw.return_value = raw
+
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.index_ids')
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_weekly_downloads(self, _mock, index_ids):
+        client = mock.Mock()
+        client.raw.return_value = self.raw(
+            weekly=[(self.app.pk, 255.0)],
+            total=[(self.app.pk, 300.0), (self.app2.pk, 10.0)])
         _mock.return_value = client
 
         eq_(self.app.weekly_downloads, 0)
 
-        update_downloads([self.app.pk])
+        update_downloads([self.app.pk, self.app2.pk])
 
         self.app.reload()
         eq_(self.app.weekly_downloads, 255)
+        eq_(self.app.total_downloads, 300)
+        # A single query for all the apps.
+        eq_(client.raw.call_count, 1)
+        # Only the apps whose weekly downloads changed are reindexed.
+        index_ids.assert_called_once_with([self.app.pk])
 
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.index_ids')
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_total_downloads(self, _mock):
+    def test_total_downloads(self, _mock, index_ids):
         client = mock.Mock()
-        raw = {
-            'facets': {
-                'installs': {
-                    u'_type': u'statistical',
-                    u'count': 49,
-                    u'total': 6638.0
-                }
-            }
-        }
-        client.raw.return_value = raw
+        client.raw.return_value = self.raw(total=[(self.app.pk, 6638.0)])
         _mock.return_value = client
 
         eq_(self.app.total_downloads, 0)
@@ -178,19 +181,20 @@ class TestWeeklyDownloads(amo.tests.TestCase):
 
         self.app.reload()
         eq_(self.app.total_downloads, 6638)
+        assert not index_ids.called
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_monolith_error(self, _mock):
+        self.app.update(weekly_downloads=5, total_downloads=10)
         client = mock.Mock()
-        client.side_effect = ValueError
         client.raw.side_effect = Exception
         _mock.return_value = client
 
         update_downloads([self.app.pk])
 
         self.app.reload()
-        eq_(self.app.weekly_downloads, 0)
-        eq_(self.app.total_downloads, 0)
+        eq_(self.app.weekly_downloads, 5)
+        eq_(self.app.total_downloads, 10)
 
 
 class TestCleanup(amo.tests.TestCase):
@@ -254,53 +258,88 @@ class TestUpdateTrending(amo.tests.TestCase):
 
     @mock.patch('mkt.webapps.tasks._get_trending')
     def test_trending_saved(self, _mock):
-        _mock.return_value = 12.0
+        regions = mkt.regions.REGIONS_DICT.values()
+        _mock.return_value = dict(
+            [((self.app.id, 0), 12.0)] +
+            [((self.app.id, region.id), 12.0) for region in regions])
         update_app_trending()
 
         eq_(self.app.get_trending(), 12.0)
-        for region in mkt.regions.REGIONS_DICT.values():
+        for region in regions:
             eq_(self.app.get_trending(region=region), 12.0)
 
         # Test running again updates the values as we'd expect.
-        _mock.return_value = 2.0
+        _mock.return_value = dict(
+            [((self.app.id, 0), 2.0)] +
+            [((self.app.id, region.id), 2.0) for region in regions])
         update_app_trending()
         eq_(self.app.get_trending(), 2.0)
-        for region in mkt.regions.REGIONS_DICT.values():
+        for region in regions:
             eq_(self.app.get_trending(region=region), 2.0)
+        eq_(self.app.trending.count(), len(regions) + 1)
+
+    @mock.patch('mkt.webapps.tasks._get_trending')
+    def test_trending_unchanged(self, _mock):
+        _mock.return_value = {(self.app.id, 0): 12.0}
+        update_trending([self.app.id])
+        trending = self.app.trending.get()
+        update_trending([self.app.id])
+        eq_(self.app.trending.get().pk, trending.pk)
+
+    def raw(self, week, prior, region=0):
+        return {
+            'facets': {
+                'week_%s' % region: {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': self.app.id, 'total': week}],
+                },
+                'prior_%s' % region: {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': self.app.id, 'total': prior}],
+                },
+            }
+        }
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_get_trending(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 133.0, 'date': date(2013, 8, 26)},
-            {'count': 122.0, 'date': date(2013, 9, 2)},
-        ]
+        client.raw.return_value = self.raw(255.0, 255.0)
         _mock.return_value = client
 
-        # 1st week count: 133 + 122 = 255
-        # Prior 3 weeks get averaged: (133 + 122) / 3 = 85
+        # 1st week count: 255
+        # Prior 3 weeks get averaged: 255 / 3 = 85
         # (255 - 85) / 85 = 2.0
-        eq_(_get_trending(self.app.id), 2.0)
+        eq_(_get_trending([self.app.id]), {(self.app.id, 0): 2.0})
+
+        # All the apps and regions are fetched in one query.
+        eq_(client.raw.call_count, 1)
+        facets = client.raw.call_args[0][0]['facets']
+        eq_(len(facets), 2 * (len(mkt.regions.REGIONS_DICT) + 1))
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_get_trending_threshold(self, _mock):
+    def test_get_trending_region(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 49.0, 'date': date(2013, 8, 26)},
-            {'count': 50.0, 'date': date(2013, 9, 2)},
-        ]
+        client.raw.return_value = self.raw(255.0, 255.0,
+                                           region=mkt.regions.US.id)
         _mock.return_value = client
+        eq_(_get_trending([self.app.id]),
+            {(self.app.id, mkt.regions.US.id): 2.0})
 
-        # 1st week count: 49 + 50 = 99
-        # 99 is less than 100 so we return 0.0.
-        eq_(_get_trending(self.app.id), 0.0)
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_get_trending_threshold(self, _mock):
+        client = mock.Mock()
+        # 1st week count: 99
+        # 99 is less than 100 so there is no trending.
+        client.raw.return_value = self.raw(99.0, 30.0)
+        _mock.return_value = client
+        eq_(_get_trending([self.app.id]), {})
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_get_trending_monolith_error(self, _mock):
         client = mock.Mock()
-        client.side_effect = ValueError
+        client.raw.side_effect = ValueError
         _mock.return_value = client
-        eq_(_get_trending(self.app.id), 0.0)
+        eq_(_get_trending([self.app.id]), {})
 
 
 @mock.patch('os.stat')
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from nose.tools import eq_, ok_
 
 import amo.tests
@@ -70,6 +73,30 @@ class TestWebappIndexer(amo.tests.TestCase):
         eq_(doc['latest_version']['has_editor_comment'], False)
         eq_(doc['latest_version']['has_info_request'], False)
 
+    def _get_objs(self, *apps):
+        return list(Webapp.objects.no_cache().filter(
+            id__in=[app.pk for app in apps]).order_by('id'))
+
+    def test_extract_documents(self):
+        app2 = amo.tests.app_factory()
+        EscalationQueue.objects.create(addon=app2)
+        single = [WebappIndexer.extract_document(obj.pk, obj)
+                  for obj in self._get_objs(self.app, app2)]
+        eq_([doc for obj, doc in
+             WebappIndexer.extract_documents(self._get_objs(self.app, app2))],
+            single)
+
+    def test_extract_documents_queries(self):
+        app2 = amo.tests.app_factory()
+        objs = self._get_objs(self.app, app2)
+        with CaptureQueriesContext(connection) as single:
+            for obj in objs:
+                WebappIndexer.extract_document(obj.pk, obj)
+        objs = self._get_objs(self.app, app2)
+        with CaptureQueriesContext(connection) as bulk:
+            WebappIndexer.extract_documents(objs)
+        ok_(len(bulk) < len(single))
+
     def test_extract_category(self):
         self.app.update(categories=['books'])
         obj, doc = self._get_doc()
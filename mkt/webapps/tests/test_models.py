@@ -2043,6 +2043,24 @@ class TestPackagedSigning(amo.tests.WebappTestCase):
         eq_(sign.call_args[0][0], self.app.current_version.pk)
         eq_(sign.call_args[1]['reviewer'], True)
 
+    @mock.patch('lib.crypto.packaged.presign')
+    def test_presign_new_version(self, presign):
+        self.app.update(is_packaged=True)
+        version = amo.tests.version_factory(
+            addon=self.app, version='2.0',
+            file_kw={'status': amo.STATUS_PUBLIC})
+        self.app.update_version()
+        eq_(self.app.current_version, version)
+        presign.delay.assert_called_with([version.pk])
+
+    @mock.patch('lib.crypto.packaged.presign')
+    def test_presign_not_packaged(self, presign):
+        self.app.update(is_packaged=False)
+        amo.tests.version_factory(addon=self.app, version='2.0',
+                                  file_kw={'status': amo.STATUS_PUBLIC})
+        self.app.update_version()
+        assert not presign.delay.called
+
 
 class TestUpdateStatus(amo.tests.TestCase):
 
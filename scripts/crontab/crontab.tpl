@@ -5,9 +5,11 @@ DJANGO_SETTINGS_MODULE='settings_local_mkt'
 
 HOME=/tmp
 
+# Every ten minutes.
+*/10 * * * * %(z_cron)s reconcile_queue_counts --settings=settings_local_mkt
+
 # Once per hour.
 20 * * * * %(z_cron)s addon_last_updated
-50 * * * * %(z_cron)s cleanup_extracted_file
 
 # 2014-06-23: Disabled to stop sending 2MB emails for old AMO files.
 # TODO: Determine if we need this. If not, remove. If so, re-enable after removing AMO files.
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Load tests a receipt verification server, to compare the gevent server in
+services/wsgi/receiptverify_gevent.py against the standard WSGI one.
+
+Start each server in turn and point this at them with the same options::
+
+    python scripts/verify_load.py --receipt receipt.txt \\
+        --requests 5000 --concurrency 200 http://127.0.0.1:9000/verify/
+
+The receipt file should contain a receipt that is valid for the server being
+tested, otherwise you are only testing how fast it can reject receipts.
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import optparse
+import sys
+import time
+import urllib2
+
+from gevent.pool import Pool
+
+
+def post(url, data, timings, errors):
+    start = time.time()
+    try:
+        urllib2.urlopen(urllib2.Request(url, data)).read()
+    except Exception:
+        errors.append(sys.exc_info()[1])
+    else:
+        timings.append(time.time() - start)
+
+
+def percentile(timings, pct):
+    return timings[min(len(timings) - 1, int(len(timings) * pct / 100.0))]
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options] URL')
+    parser.add_option('--receipt', help='File containing the receipt to '
+                                        'verify.')
+    parser.add_option('--requests', default=1000, type='int')
+    parser.add_option('--concurrency', default=100, type='int')
+    options, args = parser.parse_args()
+    if len(args) != 1 or not options.receipt:
+        parser.print_help()
+        sys.exit(1)
+
+    url = args[0]
+    data = open(options.receipt).read().strip()
+    timings, errors = [], []
+    pool = Pool(options.concurrency)
+
+    start = time.time()
+    for i in range(options.requests):
+        pool.spawn(post, url, data, timings, errors)
+    pool.join()
+    elapsed = time.time() - start
+
+    timings.sort()
+    print 'Requests:    %s (%s errors)' % (options.requests, len(errors))
+    print 'Concurrency: %s' % options.concurrency
+    print 'Elapsed:     %.2fs' % elapsed
+    print 'Throughput:  %.1f requests/s' % (options.requests / elapsed)
+    if timings:
+        for pct in (50, 90, 99):
+            print 'p%s:         %.1fms' % (pct,
+                                          percentile(timings, pct) * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import hashlib
+
+from django.core.cache import cache
+from django_statsd.clients import statsd
+
+from lib.utils import LRUCache
+from services.utils import settings
+
+
+class PurchaseCache(object):
+    """
+    Caches the result of the purchase lookups done by the receipt
+    verification service, so that devices verifying the same receipt over and
+    over again don't hit the database every time.
+
+    Lookups go to the in process LRU first and then memcache. The marketplace
+    deletes the memcache entry when a purchase is refunded or charged back,
+    the in process entries are kept short so that change is picked up soon.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.SERVICES_PURCHASE_CACHE_SIZE,
+                              settings.SERVICES_PURCHASE_CACHE_LOCAL_TIMEOUT)
+
+    def app_key(self, app_id, uuid):
+        # The uuid comes from the receipt, so hash it to get a memcache safe
+        # key.
+        uuid = hashlib.md5(unicode(uuid).encode('utf-8')).hexdigest()
+        return 'services:purchase:app:%s:%s' % (app_id, uuid)
+
+    def inapp_key(self, contribution_id):
+        return 'services:purchase:inapp:%s' % contribution_id
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            statsd.incr('services.verify.purchase_cache.local')
+            return value
+
+        value = cache.get(key)
+        if value is not None:
+            statsd.incr('services.verify.purchase_cache.memcache')
+            self.local.set(key, value)
+            return value
+
+        statsd.incr('services.verify.purchase_cache.miss')
+        return None
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        cache.set(key, value, settings.SERVICES_PURCHASE_CACHE_TIMEOUT)
+
+    def delete(self, key):
+        self.local.delete(key)
+        cache.delete(key)
+
+    def delete_app(self, app_id, uuid):
+        self.delete(self.app_key(app_id, uuid))
+
+    def delete_inapp(self, contribution_id):
+        self.delete(self.inapp_key(contribution_id))
+
+    def clear(self):
+        self.local.clear()
+
+
+purchase_cache = PurchaseCache()
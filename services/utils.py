@@ -18,6 +18,7 @@ import MySQLdb as mysql
 import sqlalchemy.pool as pool
 
 from django.utils import importlib
+from django_statsd.clients import statsd
 settings = importlib.import_module(settingmodule)
 
 from mkt.constants.payments import (CONTRIB_CHARGEBACK, CONTRIB_NO_CHARGE,
@@ -32,7 +33,24 @@ def getconn():
                          passwd=db['PASSWORD'], db=db['NAME'])
 
 
-mypool = pool.QueuePool(getconn, max_overflow=10, pool_size=5, recycle=300)
+mypool = pool.QueuePool(getconn,
+                        max_overflow=settings.SERVICES_DATABASE_POOL_OVERFLOW,
+                        pool_size=settings.SERVICES_DATABASE_POOL_SIZE,
+                        timeout=settings.SERVICES_DATABASE_POOL_TIMEOUT,
+                        recycle=300)
+
+
+def connect():
+    """
+    Checks a connection out of the pool, recording how long we had to wait
+    for it and how busy the pool is. When the pool is exhausted, the wait
+    goes up and the overflow hits SERVICES_DATABASE_POOL_OVERFLOW.
+    """
+    with statsd.timer('services.db.checkout'):
+        conn = mypool.connect()
+    statsd.gauge('services.db.checkedout', mypool.checkedout())
+    statsd.gauge('services.db.overflow', max(mypool.overflow(), 0))
+    return conn
 
 
 def log_configure():
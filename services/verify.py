@@ -14,11 +14,12 @@ from lib.cef_loggers import receipt_cef
 from lib.crypto.receipt import sign
 from lib.utils import static_url
 
+from services.cache import purchase_cache
 from services.utils import settings
 
 from utils import (CONTRIB_CHARGEBACK, CONTRIB_NO_CHARGE, CONTRIB_PURCHASE,
-                   CONTRIB_REFUND, log_configure, log_exception, log_info,
-                   mypool)
+                   CONTRIB_REFUND, connect, log_configure, log_exception,
+                   log_info)
 
 # Go configure the log.
 log_configure()
@@ -28,6 +29,7 @@ import receipts  # NOQA, used for patching in the tests
 
 status_codes = {
     200: '200 OK',
+    400: '400 Bad Request',
     405: '405 Method Not Allowed',
     500: '500 Internal Server Error',
 }
@@ -58,16 +60,37 @@ class Verify:
         # This is so the unit tests can override the connection.
         self.conn, self.cursor = None, None
 
+        # Purchases looked up ahead of time by BatchVerify, if any.
+        self.purchases = None
+
     def check_full(self):
         """
         This is the default that verify will use, this will
         do the entire stack of checks.
         """
+        try:
+            self.check_receipt()
+        except InvalidReceipt, err:
+            return self.invalid(str(err))
+
+        return self.check_purchase_status()
+
+    def check_receipt(self):
+        """
+        Decodes the receipt and verifies that it is a purchase receipt for
+        the receipt verification domain.
+        """
         receipt_domain = urlparse(static_url('WEBAPPS_RECEIPT_URL')).netloc
+        self.decoded = self.decode()
+        self.check_type('purchase-receipt')
+        self.check_url(receipt_domain)
+
+    def check_purchase_status(self):
+        """
+        Checks the purchase of an already decoded receipt and returns the
+        status that will be sent back to the app.
+        """
         try:
-            self.decoded = self.decode()
-            self.check_type('purchase-receipt')
-            self.check_url(receipt_domain)
             self.check_purchase()
         except InvalidReceipt, err:
             return self.invalid(str(err))
@@ -220,7 +243,7 @@ class Verify:
         Django ORM.
         """
         if not self.cursor:
-            self.conn = mypool.connect()
+            self.conn = connect()
             self.cursor = self.conn.cursor()
 
     def check_purchase(self):
@@ -237,15 +260,7 @@ class Verify:
         """
         Verifies that the inapp has been purchased.
         """
-        self.setup_db()
-        sql = """SELECT i.guid, c.type FROM stats_contributions c
-                 JOIN inapp_products i ON i.id=c.inapp_product_id
-                 WHERE c.id = %(contribution_id)s LIMIT 1;"""
-        self.cursor.execute(
-            sql,
-            {'contribution_id': self.get_contribution_id()}
-        )
-        result = self.cursor.fetchone()
+        result = self.fetch_purchase_inapp(self.get_contribution_id())
         if not result:
             log_info('Invalid in-app receipt, no purchase')
             raise InvalidReceipt('NO_PURCHASE')
@@ -254,6 +269,27 @@ class Verify:
         self.check_purchase_type(purchase_type)
         self.check_inapp_product(contribution_inapp_id)
 
+    def fetch_purchase_inapp(self, contribution_id):
+        """
+        Returns the (guid, type) of the inapp purchase for the contribution,
+        or None if there isn't one.
+        """
+        if self.purchases is not None:
+            return self.purchases['inapp'].get(contribution_id)
+
+        key = purchase_cache.inapp_key(contribution_id)
+        result = purchase_cache.get(key)
+        if result is None:
+            self.setup_db()
+            sql = """SELECT i.guid, c.type FROM stats_contributions c
+                     JOIN inapp_products i ON i.id=c.inapp_product_id
+                     WHERE c.id = %(contribution_id)s LIMIT 1;"""
+            self.cursor.execute(sql, {'contribution_id': contribution_id})
+            result = self.cursor.fetchone()
+            if result:
+                purchase_cache.set(key, tuple(result))
+        return result
+
     def check_inapp_product(self, contribution_inapp_id):
         if contribution_inapp_id != self.get_inapp_id():
             log_info('Invalid receipt, inapp_id does not match')
@@ -263,19 +299,34 @@ class Verify:
         """
         Verifies that the app has been purchased by the user.
         """
-        self.setup_db()
-        sql = """SELECT type FROM addon_purchase
-                 WHERE addon_id = %(app_id)s
-                 AND uuid = %(uuid)s LIMIT 1;"""
-        self.cursor.execute(sql, {'app_id': self.get_app_id(),
-                                  'uuid': self.get_user()})
-        result = self.cursor.fetchone()
+        result = self.fetch_purchase_app(self.get_app_id(), self.get_user())
         if not result:
             log_info('Invalid app receipt, no purchase')
             raise InvalidReceipt('NO_PURCHASE')
 
         self.check_purchase_type(result[0])
 
+    def fetch_purchase_app(self, app_id, uuid):
+        """
+        Returns the (type,) of the purchase of the app by the user, or None
+        if there isn't one.
+        """
+        if self.purchases is not None:
+            return self.purchases['app'].get((app_id, uuid))
+
+        key = purchase_cache.app_key(app_id, uuid)
+        result = purchase_cache.get(key)
+        if result is None:
+            self.setup_db()
+            sql = """SELECT type FROM addon_purchase
+                     WHERE addon_id = %(app_id)s
+                     AND uuid = %(uuid)s LIMIT 1;"""
+            self.cursor.execute(sql, {'app_id': app_id, 'uuid': uuid})
+            result = self.cursor.fetchone()
+            if result:
+                purchase_cache.set(key, tuple(result))
+        return result
+
     def check_purchase_type(self, purchase_type):
         """
         Verifies that the purchase type is of a valid type.
@@ -353,6 +404,112 @@ class Verify:
         return {'status': 'expired'}
 
 
+class BatchVerify:
+    """
+    Verifies a list of receipts in one go. The purchases for all the receipts
+    are looked up with one query per table, rather than one per receipt, and
+    the statuses are returned in the same order as the receipts.
+    """
+
+    def __init__(self, receipts, environ):
+        if (not isinstance(receipts, list) or
+                not all(isinstance(r, basestring) for r in receipts)):
+            raise ValueError('Expected a list of receipts')
+        if len(receipts) > settings.RECEIPT_BATCH_MAX:
+            raise ValueError('Expected at most %s receipts' %
+                             settings.RECEIPT_BATCH_MAX)
+
+        self.verifiers = [Verify(receipt, environ) for receipt in receipts]
+
+        # This is so the unit tests can override the connection.
+        self.conn, self.cursor = None, None
+
+    def check_full(self):
+        results = {}
+        pending = []
+        for verifier in self.verifiers:
+            try:
+                verifier.check_receipt()
+            except InvalidReceipt, err:
+                results[verifier] = verifier.invalid(str(err))
+            else:
+                pending.append(verifier)
+
+        purchases = self.fetch_purchases(pending)
+        for verifier in pending:
+            verifier.purchases = purchases
+            results[verifier] = verifier.check_purchase_status()
+
+        return [results[verifier] for verifier in self.verifiers]
+
+    def setup_db(self):
+        if not self.cursor:
+            self.conn = connect()
+            self.cursor = self.conn.cursor()
+
+    def fetch_purchases(self, verifiers):
+        """
+        Looks up the purchases for all the decoded receipts. Receipts with
+        broken store data are skipped here, they will be marked as invalid
+        when their purchase is checked.
+        """
+        apps, contributions = set(), set()
+        for verifier in verifiers:
+            try:
+                if 'contrib' in verifier.get_storedata():
+                    contributions.add(verifier.get_contribution_id())
+                else:
+                    apps.add((verifier.get_app_id(), verifier.get_user()))
+            except InvalidReceipt:
+                continue
+
+        purchases = {'app': {}, 'inapp': {}}
+
+        # Anything that is already cached doesn't need to be looked up.
+        for app_id, uuid in list(apps):
+            result = purchase_cache.get(purchase_cache.app_key(app_id, uuid))
+            if result is not None:
+                purchases['app'][(app_id, uuid)] = result
+                apps.remove((app_id, uuid))
+
+        for contribution_id in list(contributions):
+            result = purchase_cache.get(
+                purchase_cache.inapp_key(contribution_id))
+            if result is not None:
+                purchases['inapp'][contribution_id] = result
+                contributions.remove(contribution_id)
+
+        if apps:
+            self.setup_db()
+            # The uuids are unique, so they are enough to use the index. The
+            # app they belong to is checked here.
+            uuids = set(uuid for app_id, uuid in apps)
+            sql = """SELECT addon_id, uuid, type FROM addon_purchase
+                     WHERE uuid IN ({0});""".format(
+                ', '.join(['%s'] * len(uuids)))
+            self.cursor.execute(sql, list(uuids))
+            for app_id, uuid, purchase_type in self.cursor.fetchall():
+                if ((app_id, uuid) in apps and
+                        (app_id, uuid) not in purchases['app']):
+                    purchases['app'][(app_id, uuid)] = (purchase_type,)
+                    purchase_cache.set(purchase_cache.app_key(app_id, uuid),
+                                       (purchase_type,))
+
+        if contributions:
+            self.setup_db()
+            sql = """SELECT c.id, i.guid, c.type FROM stats_contributions c
+                     JOIN inapp_products i ON i.id=c.inapp_product_id
+                     WHERE c.id IN ({0});""".format(
+                ', '.join(['%s'] * len(contributions)))
+            self.cursor.execute(sql, list(contributions))
+            for contribution_id, guid, purchase_type in self.cursor.fetchall():
+                purchases['inapp'][contribution_id] = (guid, purchase_type)
+                purchase_cache.set(purchase_cache.inapp_key(contribution_id),
+                                   (guid, purchase_type))
+
+        return purchases
+
+
 def get_headers(length):
     return [('Access-Control-Allow-Origin', '*'),
             ('Access-Control-Allow-Methods', 'POST'),
@@ -362,6 +519,53 @@ def get_headers(length):
             ('Last-Modified', format_date_time(time()))]
 
 
+# Process wide cache of receipt verifiers, keyed on the valid issuers. The
+# verifier keeps hold of the issuer certificates it has fetched, so building a
+# new one for every request means fetching and parsing them every time. Each
+# entry is a tuple of (verifier, expiry) so that the certificates get
+# refreshed every SIGNING_VERIFIER_CACHE_TTL seconds.
+_verifiers = {}
+
+
+def get_verifier():
+    """
+    Returns a cached ReceiptVerifier for the current valid issuers, building
+    a new one if there isn't one or it has expired.
+    """
+    issuers = tuple(settings.SIGNING_VALID_ISSUERS)
+    now = time()
+    cached = _verifiers.get(issuers)
+    if cached and cached[1] > now:
+        statsd.incr('services.verify.verifier.hit')
+        return cached[0]
+
+    statsd.incr('services.verify.verifier.refresh')
+    verifier = certs.ReceiptVerifier(valid_issuers=list(issuers))
+    _verifiers[issuers] = (verifier,
+                           now + settings.SIGNING_VERIFIER_CACHE_TTL)
+    return verifier
+
+
+def crack_receipt(receipt):
+    """
+    Verifies the receipt against the certificate and decodes its payload.
+    Returns a tuple of (verified, payload), the payload is None if the
+    receipt isn't verified.
+    """
+    # ReceiptVerifier.verify() only tells us if the receipt is valid, and
+    # raises for an expired one, it doesn't hand back the payload it parsed.
+    # So the payload is decoded here, once and only for receipts worth
+    # reading, without checking the signature again.
+    try:
+        verified = get_verifier().verify(receipt)
+    except ExpiredSignatureError:
+        # Until we can do something meaningful with this, just ignore.
+        verified = True
+    if not verified:
+        return False, None
+    return True, jwt.decode(receipt.split('~')[1], verify=False)
+
+
 def decode_receipt(receipt):
     """
     Cracks the receipt using the private key. This will probably change
@@ -369,16 +573,9 @@ def decode_receipt(receipt):
     """
     with statsd.timer('services.decode'):
         if settings.SIGNING_SERVER_ACTIVE:
-            verifier = certs.ReceiptVerifier(valid_issuers=
-                                             settings.SIGNING_VALID_ISSUERS)
-            try:
-                result = verifier.verify(receipt)
-            except ExpiredSignatureError:
-                # Until we can do something meaningful with this, just ignore.
-                return jwt.decode(receipt.split('~')[1], verify=False)
-            if not result:
+            verified, raw = crack_receipt(receipt)
+            if not verified:
                 raise VerificationError()
-            return jwt.decode(receipt.split('~')[1], verify=False)
         else:
             key = jwt.rsa_load(settings.WEBAPPS_RECEIPT_KEY)
             raw = jwt.decode(receipt, key)
@@ -394,7 +591,7 @@ def status_check(environ):
         return 500, 'SIGNING_SERVER_ACTIVE is not set'
 
     try:
-        conn = mypool.connect()
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute('SELECT id FROM users_install ORDER BY id DESC LIMIT 1')
     except Exception, err:
@@ -408,7 +605,15 @@ def receipt_check(environ):
     with statsd.timer('services.verify'):
         data = environ['wsgi.input'].read()
         try:
-            verify = Verify(data, environ)
+            # A JSON list of receipts is verified as a batch, anything else
+            # is treated as a single receipt.
+            if data.lstrip().startswith('['):
+                try:
+                    verify = BatchVerify(json.loads(data), environ)
+                except ValueError:
+                    return 400, ''
+            else:
+                verify = Verify(data, environ)
             return 200, json.dumps(verify.check_full())
         except:
             log_exception('<none>')
@@ -0,0 +1,73 @@
+"""
+Serves the receipt verifier with gevent, so that a single process can handle
+many concurrent verifications instead of blocking a worker on every database
+query.
+
+The standard library is monkey patched and PyMySQL, which is pure python,
+stands in for MySQLdb so that database queries yield to other greenlets
+too. Use it as a gunicorn worker::
+
+    gunicorn -k gevent -c wsgi/receiptverify_gevent.py verify:application
+
+Or run it directly::
+
+    python wsgi/receiptverify_gevent.py --port 9000 --concurrency 1000
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import pymysql
+pymysql.install_as_MySQLdb()
+
+import optparse
+import os
+import site
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'settings_local_mkt'
+
+wsgidir = os.path.dirname(__file__)
+for path in ['../',
+             '../..',
+             '../../..',
+             '../../vendor/lib/python',
+             '../../apps']:
+    site.addsitedir(os.path.abspath(os.path.join(wsgidir, path)))
+
+from verify import application  # NOQA
+
+
+def counted(app, pool):
+    """
+    Wraps the WSGI app, recording how many requests are being handled at
+    once. When this sits at the pool size, requests are queueing up.
+    """
+    from django_statsd.clients import statsd
+
+    def wrapper(environ, start_response):
+        statsd.gauge('services.verify.concurrent', len(pool))
+        return app(environ, start_response)
+    return wrapper
+
+
+def main():
+    from gevent.pool import Pool
+    from gevent.pywsgi import WSGIServer
+
+    parser = optparse.OptionParser()
+    parser.add_option('--host', default='127.0.0.1')
+    parser.add_option('--port', default=9000, type='int')
+    parser.add_option('--concurrency', default=1000, type='int',
+                      help='Maximum number of requests handled at once, '
+                           'further connections wait to be accepted.')
+    options, args = parser.parse_args()
+
+    pool = Pool(options.concurrency)
+    server = WSGIServer((options.host, options.port),
+                        counted(application, pool), spawn=pool)
+    print 'Serving receipt verification on %s:%s' % (options.host,
+                                                     options.port)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
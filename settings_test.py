@@ -114,6 +114,9 @@ IARC_MOCK = True
 # Ensure that exceptions aren't re-raised.
 DEBUG_PROPAGATE_EXCEPTIONS = False
 
+# Save the monolith records straight away, unless testing the buffer.
+MONOLITH_BUFFER_SIZE = 1
+
 PAYMENT_PROVIDERS = ['bango']
 
 # When not testing this specific feature, make sure it's off.